@@ -16,6 +16,9 @@ from app.db.database import Base
 from app.models.user import User
 from app.models.post import Post
 from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.notification import Notification
+from app.models.upload import UploadSession
+from app.models.account_deletion import AccountDeletion
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,39 @@
+"""Add (user, created_at, id) indexes for follower/following keyset pagination
+
+Revision ID: 0001_follow_keyset_indexes
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_follow_keyset_indexes'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_follows_following_created', ['following_id', 'created_at', 'id']),
+    ('ix_follows_follower_created', ['follower_id', 'created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY on PostgreSQL so a large follows table stays writable;
+    # it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'follows', columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='follows', if_exists=True, postgresql_concurrently=True)
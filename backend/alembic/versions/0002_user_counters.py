@@ -0,0 +1,44 @@
+"""Add maintained followers/following/posts counters to users
+
+Revision ID: 0002_user_counters
+Revises: 0001_follow_keyset_indexes
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_user_counters'
+down_revision: Union[str, Sequence[str], None] = '0001_follow_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('followers_count', 'following_count', 'posts_count')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all() already have them
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    for name in COUNTERS:
+        if name not in existing:
+            op.add_column('users', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill in one pass; afterwards the app keeps them current and
+    # `python recompute_counters.py` re-syncs them if they ever drift
+    op.execute("""
+        UPDATE users SET
+            followers_count = (SELECT count(*) FROM follows WHERE follows.following_id = users.id),
+            following_count = (SELECT count(*) FROM follows WHERE follows.follower_id = users.id),
+            posts_count = (SELECT count(*) FROM posts WHERE posts.author_id = users.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in COUNTERS:
+        op.drop_column('users', name)
@@ -0,0 +1,35 @@
+"""Add maintained likes_count to posts
+
+Revision ID: 0003_post_likes_count
+Revises: 0002_user_counters
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_post_likes_count'
+down_revision: Union[str, Sequence[str], None] = '0002_user_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all() already have it
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    if 'likes_count' not in existing:
+        op.add_column('posts', sa.Column('likes_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    op.execute("""
+        UPDATE posts SET likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = posts.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'likes_count')
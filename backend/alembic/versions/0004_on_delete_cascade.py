@@ -0,0 +1,105 @@
+"""Let the database cascade deletes through foreign keys
+
+Revision ID: 0004_on_delete_cascade
+Revises: 0003_post_likes_count
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from itertools import groupby
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_on_delete_cascade'
+down_revision: Union[str, Sequence[str], None] = '0003_post_likes_count'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table, ON DELETE rule), grouped by table
+FOREIGN_KEYS = (
+    ('posts', 'author_id', 'users', 'CASCADE'),
+    ('posts', 'parent_id', 'posts', 'SET NULL'),
+    ('posts', 'original_post_id', 'posts', 'CASCADE'),
+    ('likes', 'user_id', 'users', 'CASCADE'),
+    ('likes', 'post_id', 'posts', 'CASCADE'),
+    ('comments', 'author_id', 'users', 'CASCADE'),
+    ('comments', 'post_id', 'posts', 'CASCADE'),
+    ('comments', 'parent_id', 'comments', 'CASCADE'),
+    ('reposts', 'user_id', 'users', 'CASCADE'),
+    ('reposts', 'post_id', 'posts', 'CASCADE'),
+    ('follows', 'follower_id', 'users', 'CASCADE'),
+    ('follows', 'following_id', 'users', 'CASCADE'),
+    ('notifications', 'user_id', 'users', 'CASCADE'),
+    ('notifications', 'actor_id', 'users', 'CASCADE'),
+    ('notifications', 'post_id', 'posts', 'CASCADE'),
+    ('notifications', 'comment_id', 'comments', 'CASCADE'),
+    ('upload_sessions', 'user_id', 'users', 'CASCADE'),
+)
+
+# SQLite foreign keys are unnamed; batch mode names them by this convention
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+def _set_ondelete(with_rules: bool) -> None:
+    """Recreate each foreign key whose ON DELETE rule differs from the target.
+    
+    Tables that do not exist yet are skipped (later migrations or create_all()
+    build them with the rules), and keys that already match are left alone,
+    so re-running after ``alembic stamp base`` does not rebuild and revalidate
+    every constraint.
+    """
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, keys in groupby(FOREIGN_KEYS, key=lambda key: key[0]):
+        if not inspector.has_table(table):
+            continue
+        
+        existing = {tuple(fk['constrained_columns']): fk for fk in inspector.get_foreign_keys(table)}
+        changes = []
+        for _, column, referred, ondelete in keys:
+            target = ondelete if with_rules else None
+            fk = existing.get((column,))
+            if fk is not None and _rule(fk) == target:
+                continue
+            name = (fk and fk['name']) or NAMING_CONVENTION['fk'] % {
+                'table_name': table, 'column_0_name': column, 'referred_table_name': referred
+            }
+            changes.append((name, fk is not None, column, referred, target))
+        if not changes:
+            continue
+        
+        if bind.dialect.name == 'sqlite':
+            # SQLite cannot alter constraints; batch mode copies the table
+            with op.batch_alter_table(table, recreate='always', naming_convention=NAMING_CONVENTION) as batch:
+                for name, exists, column, referred, ondelete in changes:
+                    if exists:
+                        batch.drop_constraint(name, type_='foreignkey')
+                    batch.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+        else:
+            for name, exists, column, referred, ondelete in changes:
+                if exists:
+                    op.drop_constraint(name, table, type_='foreignkey')
+                op.create_foreign_key(name, table, referred, [column], ['id'], ondelete=ondelete)
+
+
+def _rule(fk: dict) -> Optional[str]:
+    """A reflected foreign key's ON DELETE rule, None for the default (NO ACTION)."""
+    ondelete = (fk.get('options') or {}).get('ondelete')
+    if ondelete is None or ondelete.upper() == 'NO ACTION':
+        return None
+    return ondelete.upper()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _set_ondelete(with_rules=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_ondelete(with_rules=False)
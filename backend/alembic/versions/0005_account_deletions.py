@@ -0,0 +1,50 @@
+"""Add account_deletions for tracking background account purges
+
+Revision ID: 0005_account_deletions
+Revises: 0004_on_delete_cascade
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_account_deletions'
+down_revision: Union[str, Sequence[str], None] = '0004_on_delete_cascade'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all() already have it
+    if sa.inspect(op.get_bind()).has_table('account_deletions'):
+        return
+    
+    op.create_table(
+        'account_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('stage', sa.String(length=20), nullable=False),
+        sa.Column('deleted_rows', sa.BigInteger(), nullable=False),
+        sa.Column('batches', sa.Integer(), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('requested_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_account_deletions_id', 'account_deletions', ['id'])
+    op.create_index('ix_account_deletions_user_id', 'account_deletions', ['user_id'])
+    op.create_index('ix_account_deletions_status', 'account_deletions', ['status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_deletions')
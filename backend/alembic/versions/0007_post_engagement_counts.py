@@ -0,0 +1,39 @@
+"""Add maintained comments_count and reposts_count to posts
+
+Revision ID: 0007_post_engagement_counts
+Revises: 0006_upload_sessions
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_post_engagement_counts'
+down_revision: Union[str, Sequence[str], None] = '0006_upload_sessions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all() already have them
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('posts')}
+    for column in ('comments_count', 'reposts_count'):
+        if column not in existing:
+            op.add_column('posts', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+    
+    op.execute("""
+        UPDATE posts SET
+            comments_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id),
+            reposts_count = (SELECT count(*) FROM reposts WHERE reposts.post_id = posts.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'reposts_count')
+    op.drop_column('posts', 'comments_count')
@@ -0,0 +1,41 @@
+"""Add site-wide counters, starting with the public post count
+
+Revision ID: 0008_site_counters
+Revises: 0007_post_engagement_counts
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_site_counters'
+down_revision: Union[str, Sequence[str], None] = '0007_post_engagement_counts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all() already have it
+    if not sa.inspect(op.get_bind()).has_table('site_counters'):
+        op.create_table(
+            'site_counters',
+            sa.Column('name', sa.String(length=50), primary_key=True),
+            sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+        )
+    
+    # Posts by active users, as the public feed counts them
+    op.execute("DELETE FROM site_counters WHERE name = 'posts'")
+    op.execute("""
+        INSERT INTO site_counters (name, value)
+        SELECT 'posts', coalesce(sum(posts_count), 0) FROM users WHERE is_active = true
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('site_counters')
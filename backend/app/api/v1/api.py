@@ -2,7 +2,7 @@
 API v1 router configuration.
 """
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, posts, interactions, uploads, notifications
+from app.api.v1.endpoints import auth, users, posts, interactions, uploads, notifications, admin
 
 api_router = APIRouter()
 
@@ -13,3 +13,4 @@ api_router.include_router(posts.router, prefix="/posts", tags=["posts"])
 api_router.include_router(interactions.router, prefix="/interactions", tags=["interactions"])
 api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
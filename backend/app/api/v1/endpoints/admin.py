@@ -0,0 +1,63 @@
+"""
+Admin endpoints for production diagnostics.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import FileResponse
+
+from app.core.profiler import profile_store
+from app.db import slow_query
+from app.models.user import User
+from app.api.v1.endpoints.auth import get_current_admin
+
+router = APIRouter()
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Get the statement fingerprints with the highest total time on this worker."""
+    log = slow_query.slow_query_log
+    if log is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Slow-query log is disabled"
+        )
+    
+    return {
+        "threshold_ms": log.threshold * 1000,
+        "statements": [
+            {
+                "fingerprint": totals["fingerprint"],
+                "statement": totals["statement"],
+                "calls": totals["calls"],
+                "slow_calls": totals["slow_calls"],
+                "total_ms": round(totals["total_time"] * 1000, 3),
+                "mean_ms": round(totals["total_time"] * 1000 / totals["calls"], 3),
+                "max_ms": round(totals["max_time"] * 1000, 3),
+                "last_explain": totals["last_explain"]
+            }
+            for totals in log.top(limit)
+        ]
+    }
+
+
+@router.get("/profiles")
+async def list_profiles(current_admin: User = Depends(get_current_admin)):
+    """List stored request profiles on this worker's host, newest first."""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str, current_admin: User = Depends(get_current_admin)):
+    """Download a stored request profile."""
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    media_type = "text/plain" if name.endswith(".folded") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
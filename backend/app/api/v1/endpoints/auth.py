@@ -6,6 +6,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.core.config import settings
+from app.core.middleware import set_request_user
 from app.db.database import get_db
 from app.core.security import (
     verify_password, 
@@ -15,9 +17,11 @@ from app.core.security import (
 )
 from app.schemas.user import UserCreate, UserLogin, Token, TokenRefresh, UserResponse
 from app.models.user import User
+from app.services.profile_service import ProfileService
 
 router = APIRouter()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(
@@ -49,9 +53,52 @@ def get_current_user(
             detail="Inactive user"
         )
     
+    set_request_user(user.id)
     return user
 
 
+def get_optional_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[int]:
+    """Get the viewer's user id on public endpoints, or None for anonymous requests.
+    
+    The user is checked against the profile cache rather than loaded. A
+    token that is sent but invalid is still rejected, so clients know to
+    refresh it, and so is one of a deactivated user.
+    """
+    if credentials is None:
+        return None
+    
+    user_id = verify_token(credentials.credentials)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not ProfileService(db).is_active(int(user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
+    set_request_user(int(user_id))
+    return int(user_id)
+
+
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring them to be an admin (``ADMIN_EMAILS``)."""
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return current_user
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
@@ -1,24 +1,66 @@
 """
 Interaction endpoints for likes, comments, reposts, and follows.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.queries import (
+    fetch_comment_rows, fetch_follow_rows, fetch_followed_ids, fetch_user_card_rows_by_id,
+    fetch_liked_post_ids, fetch_reposted_post_ids
+)
 from app.schemas.interaction import (
     CommentCreate, CommentResponse, CommentWithAuthor,
-    FollowCreate, FollowResponse, UserFollowStats
+    FollowCreate, FollowResponse, FollowList, FollowListUser,
+    InteractionBatch, InteractionBatchResponse, InteractionResult, InteractionState,
+    MAX_BATCH_OPERATIONS
 )
 from app.models.user import User
 from app.models.post import Post
-from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.interaction import Comment, Follow
 from app.api.v1.endpoints.auth import get_current_user
 from app.services.notification_service import NotificationService
+from app.services.loaders import RequestLoaders, get_loaders
+from app.services.follow_graph import follow_graph
+from app.services.interaction_service import InteractionService
+from app.services.counter_service import CounterService
+from app.schemas.serializers import serialize_comment
 
 router = APIRouter()
 
 
+def _get_post_or_404(db: Session, post_id: int):
+    # Posts of deactivated authors are hidden, and being purged
+    post = db.query(Post.id, Post.author_id).join(User, Post.author_id == User.id).filter(
+        Post.id == post_id, User.is_active == True
+    ).first()
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
+    return post
+
+
+def _get_follow_target_or_404(db: Session, current_user: User, user_id: int) -> User:
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot follow yourself"
+        )
+    
+    target_user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    if not target_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return target_user
+
+
 # Like endpoints
 @router.post("/posts/{post_id}/like")
 async def like_post(
@@ -26,36 +68,98 @@ async def like_post(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Like or unlike a post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    """Like or unlike a post (toggle; prefer PUT / DELETE)."""
+    post = _get_post_or_404(db, post_id)
+    interactions = InteractionService(db)
+    
+    if interactions.unlike(current_user.id, post_id):
+        return {"message": "Post unliked", "liked": False}
+    interactions.like(current_user, post)
+    return {"message": "Post liked", "liked": True}
+
+
+@router.put("/posts/{post_id}/like")
+async def put_like(
+    post_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Like a post (idempotent)."""
+    post = _get_post_or_404(db, post_id)
+    InteractionService(db).like(current_user, post)
+    return {"message": "Post liked", "liked": True}
+
+
+@router.delete("/posts/{post_id}/like")
+async def delete_like(
+    post_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Unlike a post (idempotent)."""
+    InteractionService(db).unlike(current_user.id, post_id)
+    return {"message": "Post unliked", "liked": False}
+
+
+# Batch endpoints
+@router.get("/state", response_model=InteractionState)
+async def get_interaction_state(
+    post_ids: str = Query(..., description="Comma-separated post ids"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get which of the given posts the current user has liked or reposted."""
+    try:
+        ids = {int(post_id) for post_id in post_ids.split(",") if post_id.strip()}
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="post_ids must be comma-separated integers"
+        )
+    if len(ids) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_OPERATIONS} post ids per request"
         )
     
-    # Check if already liked
-    existing_like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.post_id == post_id
-    ).first()
+    return InteractionState(
+        liked=sorted(fetch_liked_post_ids(db, current_user.id, ids)),
+        reposted=sorted(fetch_reposted_post_ids(db, current_user.id, ids))
+    )
+
+
+@router.post("/batch", response_model=InteractionBatchResponse)
+async def apply_interaction_batch(
+    batch: InteractionBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply like/unlike/repost/unrepost operations in order, in one transaction.
     
-    if existing_like:
-        # Unlike
-        db.delete(existing_like)
-        db.commit()
-        return {"message": "Post unliked", "liked": False}
-    else:
-        # Like
-        new_like = Like(user_id=current_user.id, post_id=post_id)
-        db.add(new_like)
-        db.commit()
-        
-        # Create notification
-        notification_service = NotificationService(db)
-        notification_service.create_like_notification(post, current_user)
-        
-        return {"message": "Post liked", "liked": True}
+    Every operation is idempotent; likes and reposts of missing posts (or
+    posts of deactivated authors) are skipped.
+    """
+    post_ids = {op.post_id for op in batch.operations if op.action in ("like", "repost")}
+    posts = {
+        post.id: post for post in
+        db.query(Post.id, Post.author_id).join(User, Post.author_id == User.id).filter(
+            Post.id.in_(post_ids), User.is_active == True
+        )
+    } if post_ids else {}
+    
+    changed = InteractionService(db).apply_batch(
+        current_user, [(op.action, op.post_id) for op in batch.operations], posts
+    )
+    
+    return InteractionBatchResponse(results=[
+        InteractionResult(
+            action=op.action,
+            post_id=op.post_id,
+            found=op.action not in ("like", "repost") or op.post_id in posts,
+            changed=op_changed
+        )
+        for op, op_changed in zip(batch.operations, changed)
+    ])
 
 
 # Comment endpoints
@@ -67,12 +171,7 @@ async def create_comment(
     db: Session = Depends(get_db)
 ):
     """Create a comment on a post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
+    post = _get_post_or_404(db, post_id)
     
     comment = Comment(
         content=comment_data.content,
@@ -82,6 +181,7 @@ async def create_comment(
     )
     
     db.add(comment)
+    CounterService(db).comments_changed(post_id, 1)
     db.commit()
     db.refresh(comment)
     
@@ -96,28 +196,24 @@ async def create_comment(
 async def get_post_comments(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get comments for a post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
+    _get_post_or_404(db, post_id)
     
-    comments = db.query(Comment).filter(
+    comments = fetch_comment_rows(db, [
         Comment.post_id == post_id,
         Comment.parent_id.is_(None)  # Only top-level comments
-    ).order_by(Comment.created_at.asc()).all()
+    ])
     
-    comment_responses = []
-    for comment in comments:
-        comment_dict = comment.__dict__.copy()
-        comment_dict['author'] = comment.author
-        comment_responses.append(CommentWithAuthor(**comment_dict))
+    # Load each distinct author once
+    loaders.authors.queue(comment.author_id for comment in comments)
     
-    return comment_responses
+    return ORJSONResponse([
+        serialize_comment(comment, loaders.authors.get(comment.author_id))
+        for comment in comments
+    ])
 
 
 # Repost endpoints
@@ -127,135 +223,157 @@ async def repost(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Repost or un-repost a post."""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found"
-        )
-    
-    # Check if already reposted
-    existing_repost = db.query(Repost).filter(
-        Repost.user_id == current_user.id,
-        Repost.post_id == post_id
-    ).first()
+    """Repost or un-repost a post (toggle; prefer PUT / DELETE)."""
+    post = _get_post_or_404(db, post_id)
+    interactions = InteractionService(db)
     
-    if existing_repost:
-        # Un-repost - delete both the Repost record and the repost Post entry
-        db.delete(existing_repost)
-        
-        # Find and delete the repost post entry
-        repost_post = db.query(Post).filter(
-            Post.author_id == current_user.id,
-            Post.is_repost == True,
-            Post.original_post_id == post_id
-        ).first()
-        
-        if repost_post:
-            db.delete(repost_post)
-        
-        db.commit()
+    if interactions.unrepost(current_user.id, post_id):
         return {"message": "Post un-reposted", "reposted": False}
-    else:
-        # Repost - create both a Repost record and a new Post entry
-        new_repost = Repost(user_id=current_user.id, post_id=post_id)
-        db.add(new_repost)
-        
-        # Create a new post entry for the repost
-        repost_post = Post(
-            author_id=current_user.id,
-            content="Reposted",  # Give reposts a default content
-            is_repost=True,
-            original_post_id=post_id
-        )
-        db.add(repost_post)
-        db.commit()
-        
-        # Create notification
-        notification_service = NotificationService(db)
-        notification_service.create_repost_notification(post, current_user)
-        
-        return {"message": "Post reposted", "reposted": True}
+    interactions.repost(current_user, post)
+    return {"message": "Post reposted", "reposted": True}
+
+
+@router.put("/posts/{post_id}/repost")
+async def put_repost(
+    post_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Repost a post (idempotent)."""
+    post = _get_post_or_404(db, post_id)
+    InteractionService(db).repost(current_user, post)
+    return {"message": "Post reposted", "reposted": True}
+
+
+@router.delete("/posts/{post_id}/repost")
+async def delete_repost(
+    post_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Un-repost a post (idempotent)."""
+    InteractionService(db).unrepost(current_user.id, post_id)
+    return {"message": "Post un-reposted", "reposted": False}
 
 
 # Follow endpoints
-@router.post("/users/{user_id}/follow", response_model=FollowResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/users/{user_id}/follow", status_code=status.HTTP_201_CREATED)
 async def follow_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Follow or unfollow a user."""
-    if user_id == current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot follow yourself"
-        )
+    """Follow or unfollow a user (toggle; prefer PUT / DELETE)."""
+    target_user = _get_follow_target_or_404(db, current_user, user_id)
+    interactions = InteractionService(db)
     
-    target_user = db.query(User).filter(User.id == user_id).first()
-    if not target_user:
+    if interactions.unfollow(current_user.id, user_id):
+        return {"message": "User unfollowed", "following": False}
+    
+    new_follow = interactions.follow(current_user, target_user)
+    if new_follow is None:
+        # Followed concurrently by another request
+        return {"message": "User followed", "following": True}
+    return FollowResponse(
+        id=new_follow.id,
+        follower_id=current_user.id,
+        following_id=user_id,
+        created_at=new_follow.created_at
+    )
+
+
+@router.put("/users/{user_id}/follow")
+async def put_follow(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Follow a user (idempotent)."""
+    target_user = _get_follow_target_or_404(db, current_user, user_id)
+    InteractionService(db).follow(current_user, target_user)
+    return {"message": "User followed", "following": True}
+
+
+@router.delete("/users/{user_id}/follow")
+async def delete_follow(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Unfollow a user (idempotent)."""
+    InteractionService(db).unfollow(current_user.id, user_id)
+    return {"message": "User unfollowed", "following": False}
+
+
+def _follow_list(
+    db: Session,
+    current_user: User,
+    user_id: int,
+    criteria: list,
+    user_column,
+    cursor: Optional[str],
+    size: int
+) -> FollowList:
+    """One keyset page of a followers/following list, hydrated in batch."""
+    if not db.query(User.id).filter(User.id == user_id, User.is_active == True).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if already following
-    existing_follow = db.query(Follow).filter(
-        Follow.follower_id == current_user.id,
-        Follow.following_id == user_id
-    ).first()
+    before = None
+    if cursor is not None:
+        before = decode_cursor(cursor)
+        if before is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
     
-    if existing_follow:
-        # Unfollow
-        db.delete(existing_follow)
-        db.commit()
-        return {"message": "User unfollowed", "following": False}
+    # One extra row tells whether there is a next page
+    follows = fetch_follow_rows(db, criteria, user_column, before, size + 1)
+    has_more = len(follows) > size
+    follows = follows[:size]
+    
+    user_ids = [follow.user_id for follow in follows]
+    cards = fetch_user_card_rows_by_id(db, user_ids, active_only=True)
+    if follow_graph.loaded:
+        followed = {other_id for other_id in user_ids if follow_graph.is_following(current_user.id, other_id)}
     else:
-        # Follow
-        new_follow = Follow(follower_id=current_user.id, following_id=user_id)
-        db.add(new_follow)
-        db.commit()
-        db.refresh(new_follow)
-        
-        # Create notification
-        notification_service = NotificationService(db)
-        notification_service.create_follow_notification(target_user, current_user)
-        
-        return new_follow
-
-
-@router.get("/users/{user_id}/followers", response_model=List[UserFollowStats])
+        followed = fetch_followed_ids(db, current_user.id, user_ids)
+    
+    return FollowList(
+        users=[
+            FollowListUser(
+                **cards[follow.user_id]._asdict(),
+                followed_at=follow.created_at,
+                is_following=follow.user_id in followed
+            )
+            for follow in follows if follow.user_id in cards
+        ],
+        next_cursor=encode_cursor(follows[-1].created_at, follows[-1].id) if has_more else None
+    )
+
+
+@router.get("/users/{user_id}/followers", response_model=FollowList)
 async def get_user_followers(
     user_id: int,
+    cursor: Optional[str] = Query(None),
+    size: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's followers."""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # This is a simplified version - in a real app you'd want pagination
-    return [UserFollowStats(followers_count=user.followers_count, following_count=user.following_count)]
+    """Get user's followers, most recent first."""
+    return _follow_list(db, current_user, user_id, [Follow.following_id == user_id], Follow.follower_id, cursor, size)
 
 
-@router.get("/users/{user_id}/following", response_model=List[UserFollowStats])
+@router.get("/users/{user_id}/following", response_model=FollowList)
 async def get_user_following(
     user_id: int,
+    cursor: Optional[str] = Query(None),
+    size: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get users that this user follows."""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # This is a simplified version - in a real app you'd want pagination
-    return [UserFollowStats(followers_count=user.followers_count, following_count=user.following_count)]
+    """Get users that this user follows, most recently followed first."""
+    return _follow_list(db, current_user, user_id, [Follow.follower_id == user_id], Follow.following_id, cursor, size)
@@ -1,12 +1,18 @@
 """
 Notification endpoints.
 """
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.db.database import get_db
+from app.db.queries import fetch_notification_rows
+from app.schemas.serializers import serialize_notification
+from app.services.loaders import RequestLoaders, get_loaders
 from app.schemas.notification import (
     NotificationResponse, NotificationWithActor, NotificationStats,
     NotificationMarkRead, NotificationFilter
@@ -15,6 +21,8 @@ from app.models.notification import Notification, NotificationType
 from app.models.user import User
 from app.api.v1.endpoints.auth import get_current_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -28,6 +36,7 @@ async def test_notifications_endpoint():
 async def get_notifications(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     type: Optional[NotificationType] = None,
@@ -35,53 +44,25 @@ async def get_notifications(
     is_archived: Optional[bool] = None
 ):
     """Get user's notifications with filtering."""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    criteria = [Notification.user_id == current_user.id]
     
     # Apply filters
     if type:
-        query = query.filter(Notification.type == type)
+        criteria.append(Notification.type == type)
     if is_read is not None:
-        query = query.filter(Notification.is_read == is_read)
+        criteria.append(Notification.is_read == is_read)
     if is_archived is not None:
-        query = query.filter(Notification.is_archived == is_archived)
+        criteria.append(Notification.is_archived == is_archived)
     
-    # Get notifications with actor information
-    notifications = query.options(
-        joinedload(Notification.actor)
-    ).order_by(Notification.created_at.desc()).offset(offset).limit(limit).all()
+    notifications = fetch_notification_rows(db, criteria, offset, limit)
     
-    # Convert to response format
-    result = []
-    for notification in notifications:
-        notification_dict = {
-            'id': notification.id,
-            'user_id': notification.user_id,
-            'actor_id': notification.actor_id,
-            'type': notification.type,
-            'title': notification.title,
-            'message': notification.message,
-            'is_read': notification.is_read,
-            'is_archived': notification.is_archived,
-            'post_id': notification.post_id,
-            'comment_id': notification.comment_id,
-            'created_at': notification.created_at,
-            'updated_at': notification.updated_at,
-            'actor': None
-        }
-        
-        # Add actor information if available
-        if notification.actor:
-            notification_dict['actor'] = {
-                'id': notification.actor.id,
-                'username': notification.actor.username,
-                'full_name': notification.actor.full_name,
-                'avatar_url': notification.actor.avatar_url,
-                'is_verified': notification.actor.is_verified
-            }
-        
-        result.append(NotificationWithActor(**notification_dict))
+    # Load each distinct actor once
+    loaders.user_cards.queue(notification.actor_id for notification in notifications)
     
-    return result
+    return ORJSONResponse([
+        serialize_notification(notification, loaders.user_cards.get(notification.actor_id))
+        for notification in notifications
+    ])
 
 
 @router.get("/stats", response_model=NotificationStats)
@@ -112,8 +93,8 @@ async def get_notification_stats(
             unread=unread,
             recent=recent
         )
-    except Exception as e:
-        print(f"Error in get_notification_stats: {e}")
+    except Exception:
+        logger.exception("Error in get_notification_stats")
         # Return default stats if there's an error
         return NotificationStats(
             total=0,
@@ -1,19 +1,44 @@
 """
 Post endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.http_cache import make_weak_etag, etag_matches, not_modified_response, set_etag_headers
 from app.db.database import get_db
+from app.db.queries import fetch_post_rows, count_posts
 from app.schemas.post import PostCreate, PostResponse, PostWithAuthor, PostFeed
+from app.schemas.serializers import encode_post, encode_feed
 from app.models.post import Post
 from app.models.user import User
 from app.api.v1.endpoints.auth import get_current_user
+from app.services.version_service import VersionService
+from app.services.loaders import RequestLoaders, get_loaders
+from app.services.follow_graph import follow_graph
+from app.services.counter_service import CounterService
+from app.services.deletion_service import DeletionService
 
 router = APIRouter()
 
 
+def encode_post_rows(posts, loaders: RequestLoaders, viewer_state: bool = False) -> List[bytes]:
+    """Encode post rows, batch loading reposted originals and the viewer's like/repost state."""
+    loaders.posts.queue(post.original_post_id for post in posts if post.is_repost)
+    if viewer_state:
+        loaders.queue_viewer_state(post.id for post in posts)
+    
+    return [
+        encode_post(
+            post,
+            is_liked=loaders.liked.get(post.id) if viewer_state else None,
+            is_reposted=loaders.reposted.get(post.id) if viewer_state else None,
+            original_row=loaders.posts.get(post.original_post_id) if post.is_repost else None
+        )
+        for post in posts
+    ]
+
+
 @router.get("/test")
 async def test_posts_endpoint():
     """Test endpoint to verify GET method works."""
@@ -26,65 +51,30 @@ async def test_connection():
     return {"message": "Frontend can connect to backend", "status": "success", "timestamp": "2025-09-05T13:40:00Z"}
 
 
-@router.get("/public")
+@router.get("/public", response_model=PostFeed)
 async def get_public_posts(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get public posts without authentication."""
     offset = (page - 1) * size
     
-    # Get recent posts with author relationship loaded
-    posts = db.query(Post).options(joinedload(Post.author)).order_by(Post.created_at.desc()).offset(offset).limit(size).all()
-    total = db.query(Post).count()
+    # Get recent posts joined with their authors; polls are answered from
+    # their version before anything is encoded
+    posts = fetch_post_rows(db, [], offset, size)
+    total = CounterService(db).public_posts()
+    etag = make_weak_etag("public", page, size, VersionService.feed_page_version(posts, total, loaders))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
     
-    # Convert to response format
-    post_responses = []
-    for post in posts:
-        post_dict = {
-            'id': post.id,
-            'content': post.content,
-            'media_url': post.media_url,
-            'media_type': post.media_type,
-            'author_id': post.author_id,
-            'parent_id': post.parent_id,
-            'is_reply': post.is_reply,
-            'is_repost': post.is_repost,
-            'original_post_id': post.original_post_id,
-            'likes_count': post.likes_count,
-            'comments_count': post.comments_count,
-            'reposts_count': post.reposts_count,
-            'total_engagement': post.total_engagement,
-            'created_at': post.created_at,
-            'updated_at': post.updated_at,
-            'author': post.author
-        }
-        
-        # If this is a repost, include the original post data
-        if post.is_repost and post.original_post_id:
-            original_post = db.query(Post).options(joinedload(Post.author)).filter(Post.id == post.original_post_id).first()
-            if original_post:
-                post_dict['original_post'] = {
-                    'id': original_post.id,
-                    'content': original_post.content,
-                    'media_url': original_post.media_url,
-                    'media_type': original_post.media_type,
-                    'author_id': original_post.author_id,
-                    'created_at': original_post.created_at,
-                    'author': original_post.author
-                }
-        
-        post_responses.append(PostWithAuthor(**post_dict))
+    post_fragments = encode_post_rows(posts, loaders)
     
-    return PostFeed(
-        posts=post_responses,
-        total=total,
-        page=page,
-        size=size,
-        has_next=(offset + size) < total,
-        has_prev=page > 1
-    )
+    response = Response(encode_feed(post_fragments, total, page, size), media_type="application/json")
+    set_etag_headers(response, etag)
+    return response
 
 
 @router.post("/", response_model=PostWithAuthor, status_code=status.HTTP_201_CREATED)
@@ -114,6 +104,7 @@ async def create_post(
     )
     
     db.add(db_post)
+    CounterService(db).posts_changed(current_user.id, 1)
     db.commit()
     db.refresh(db_post)
     
@@ -148,65 +139,42 @@ async def get_posts(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get posts feed (following + recent posts)."""
     offset = (page - 1) * size
     
     # Get posts from users that current user follows + recent posts
-    following_ids = [f.following_id for f in current_user.following]
+    following_ids = follow_graph.get_following_ids(db, current_user.id)
     following_ids.append(current_user.id)  # Include current user's posts
     
-    posts = db.query(Post).options(joinedload(Post.author)).filter(
-        Post.author_id.in_(following_ids)
-    ).order_by(Post.created_at.desc()).offset(offset).limit(size).all()
+    criteria = [Post.author_id.in_(following_ids)]
+    posts = fetch_post_rows(db, criteria, offset, size)
     
     # Get total count
-    total = db.query(Post).filter(
-        Post.author_id.in_(following_ids)
-    ).count()
+    total = count_posts(db, criteria)
     
-    # Convert to response format
-    post_responses = []
-    for post in posts:
-        post_dict = {
-            'id': post.id,
-            'content': post.content,
-            'media_url': post.media_url,
-            'media_type': post.media_type,
-            'author_id': post.author_id,
-            'parent_id': post.parent_id,
-            'is_reply': post.is_reply,
-            'is_repost': post.is_repost,
-            'original_post_id': post.original_post_id,
-            'likes_count': post.likes_count,
-            'comments_count': post.comments_count,
-            'reposts_count': post.reposts_count,
-            'total_engagement': post.total_engagement,
-            'created_at': post.created_at,
-            'updated_at': post.updated_at,
-            'author': post.author
-        }
-        post_responses.append(PostWithAuthor(**post_dict))
+    post_fragments = encode_post_rows(posts, loaders.for_viewer(current_user.id), viewer_state=True)
     
-    return PostFeed(
-        posts=post_responses,
-        total=total,
-        page=page,
-        size=size,
-        has_next=(offset + size) < total,
-        has_prev=page > 1
-    )
+    return Response(encode_feed(post_fragments, total, page, size), media_type="application/json")
 
 
 @router.get("/{post_id}", response_model=PostWithAuthor)
 async def get_post(
     post_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get a specific post by ID."""
-    post = db.query(Post).options(joinedload(Post.author)).filter(Post.id == post_id).first()
+    version = VersionService(db).post_version(post_id)
+    etag = make_weak_etag("post", post_id, version)
+    if version is not None and etag_matches(request, etag):
+        return not_modified_response(etag)
+    
+    post = loaders.posts.get(post_id)
     
     if not post:
         raise HTTPException(
@@ -214,10 +182,9 @@ async def get_post(
             detail="Post not found"
         )
     
-    post_dict = post.__dict__.copy()
-    post_dict['author'] = post.author
-    
-    return PostWithAuthor(**post_dict)
+    response = Response(encode_post_rows([post], loaders)[0], media_type="application/json")
+    set_etag_headers(response, etag)
+    return response
 
 
 @router.delete("/{post_id}")
@@ -228,7 +195,9 @@ async def delete_post(
 ):
     """Delete a post by ID."""
     # Get the post
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post.id, Post.author_id, Post.is_repost, Post.original_post_id).filter(
+        Post.id == post_id
+    ).first()
     
     if not post:
         raise HTTPException(
@@ -243,9 +212,8 @@ async def delete_post(
             detail="You can only delete your own posts"
         )
     
-    # Delete the post (cascade will handle related data)
-    db.delete(post)
-    db.commit()
+    # One DELETE; the database cascades to likes, comments, reposts and notifications
+    DeletionService(db).delete_post(post)
     
     return {"message": "Post deleted successfully"}
 
@@ -253,12 +221,15 @@ async def delete_post(
 @router.get("/user/{user_id}", response_model=PostFeed)
 async def get_user_posts(
     user_id: int,
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get posts by a specific user (public endpoint)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    # The maintained posts_count is the feed's total
+    user = db.query(User.posts_count).filter(User.id == user_id, User.is_active == True).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -266,24 +237,16 @@ async def get_user_posts(
         )
     
     offset = (page - 1) * size
+    criteria = [Post.author_id == user_id]
     
-    posts = db.query(Post).options(joinedload(Post.author)).filter(
-        Post.author_id == user_id
-    ).order_by(Post.created_at.desc()).offset(offset).limit(size).all()
+    posts = fetch_post_rows(db, criteria, offset, size)
+    total = user.posts_count
+    etag = make_weak_etag("user_posts", user_id, page, size, VersionService.feed_page_version(posts, total, loaders))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
     
-    total = db.query(Post).filter(Post.author_id == user_id).count()
+    post_fragments = encode_post_rows(posts, loaders)
     
-    post_responses = []
-    for post in posts:
-        post_dict = post.__dict__.copy()
-        post_dict['author'] = post.author
-        post_responses.append(PostWithAuthor(**post_dict))
-    
-    return PostFeed(
-        posts=post_responses,
-        total=total,
-        page=page,
-        size=size,
-        has_next=(offset + size) < total,
-        has_prev=page > 1
-    )
+    response = Response(encode_feed(post_fragments, total, page, size), media_type="application/json")
+    set_etag_headers(response, etag)
+    return response
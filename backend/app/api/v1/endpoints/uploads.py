@@ -1,31 +1,35 @@
 """
 File upload endpoints for media and profile pictures.
 """
+import asyncio
 import os
+import re
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+import mimetypes
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 import aiofiles
 
+from app.core.config import settings
+from app.core.http_cache import etag_matches
 from app.db.database import get_db
 from app.models.user import User
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.services.upload_service import MEDIA_DIR, PROFILE_PICS_DIR, UploadService, upload_path
+from app.services.fragment_cache import post_fragment_cache
+from app.services.profile_service import profile_cache
 from app.api.v1.endpoints.auth import get_current_user
 
 router = APIRouter()
 
 # Configuration
-UPLOAD_DIR = "uploads"
-PROFILE_PICS_DIR = os.path.join(UPLOAD_DIR, "profile_pics")
-MEDIA_DIR = os.path.join(UPLOAD_DIR, "media")
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
 ALLOWED_VIDEO_TYPES = ["video/mp4", "video/webm", "video/quicktime"]
-
-# Create upload directories if they don't exist
-os.makedirs(PROFILE_PICS_DIR, exist_ok=True)
-os.makedirs(MEDIA_DIR, exist_ok=True)
+STREAM_CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
 
 
 def generate_unique_filename(original_filename: str) -> str:
@@ -42,6 +46,119 @@ def validate_file(file: UploadFile, allowed_types: List[str]) -> bool:
     return True
 
 
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range ``Range`` header into an inclusive (start, end) pair.
+
+    Returns None when the header is malformed (including a last byte before
+    the first) or asks for several ranges, in which case the full file is
+    served. Raises 416 for ranges starting past the end of the file.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    
+    start_str, end_str = match.groups()
+    if not start_str and not end_str:
+        return None
+    
+    if not start_str:
+        # Suffix range: the last N bytes
+        length = int(end_str)
+        start = max(file_size - length, 0)
+        end = file_size - 1
+    else:
+        start = int(start_str)
+        if end_str and int(end_str) < start:
+            return None  # Invalid, not unsatisfiable (RFC 7233 section 2.1)
+        end = int(end_str) if end_str else file_size - 1
+        end = min(end, file_size - 1)
+    
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+
+async def iter_file_range(file_path: str, start: int, end: int):
+    """Stream an inclusive byte range of a file in fixed-size chunks."""
+    remaining = end - start + 1
+    async with aiofiles.open(file_path, 'rb') as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_upload(request: Request, subdir: str, filename: str, not_found_detail: str) -> Response:
+    """Serve an uploaded file with caching, conditional GET and Range support.
+
+    Uploaded filenames are UUIDs and never rewritten, so responses carry a
+    strong ETag and ``Cache-Control: immutable``. When ``MEDIA_OFFLOAD_MODE``
+    is set the bytes are handed off to the front proxy instead.
+    """
+    # Reject anything that is not a plain filename (path traversal)
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    
+    file_path = upload_path(subdir, filename)
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    
+    file_size = stat_result.st_size
+    etag = f'"{stat_result.st_mtime_ns:x}-{file_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    
+    # Conditional GET
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    
+    # Let nginx/Apache send the bytes; the app only authorizes the request
+    offload_mode = settings.MEDIA_OFFLOAD_MODE.lower()
+    if offload_mode == "x-accel-redirect":
+        headers["X-Accel-Redirect"] = f"{settings.MEDIA_OFFLOAD_PREFIX.rstrip('/')}/{subdir}/{filename}"
+        return Response(headers=headers, media_type=media_type)
+    if offload_mode == "x-sendfile":
+        headers["X-Sendfile"] = os.path.abspath(file_path)
+        return Response(headers=headers, media_type=media_type)
+    
+    # Range requests (video seeking)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header:
+        byte_range = None
+        if if_range is None or if_range.strip() == etag:
+            byte_range = parse_range_header(range_header, file_size)
+        if byte_range is None:
+            # FileResponse would apply the Range header itself; a range ignored here gets the whole file
+            headers["Content-Length"] = str(file_size)
+            return StreamingResponse(iter_file_range(file_path, 0, file_size - 1), headers=headers, media_type=media_type)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file_range(file_path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            headers=headers,
+            media_type=media_type
+        )
+    
+    return FileResponse(file_path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+
 # Image processing removed due to Pillow compatibility issues
 # Files will be saved as-is without processing
 
@@ -81,6 +198,8 @@ async def upload_profile_picture(
         avatar_url = f"/api/v1/uploads/profile-pictures/{filename}"
         current_user.avatar_url = avatar_url
         db.commit()
+        post_fragment_cache.invalidate_author(current_user.id)
+        profile_cache.invalidate(current_user.id)
         
         return {
             "message": "Profile picture uploaded successfully",
@@ -145,28 +264,175 @@ async def upload_media(
         )
 
 
-@router.get("/profile-pictures/{filename}")
-async def get_profile_picture(filename: str):
-    """Serve profile picture files."""
-    file_path = os.path.join(PROFILE_PICS_DIR, filename)
-    if not os.path.exists(file_path):
+# Resumable upload endpoints: create session -> PUT chunks -> finalize
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable media upload."""
+    allowed_types = ALLOWED_IMAGE_TYPES + ALLOWED_VIDEO_TYPES
+    if session_data.content_type not in allowed_types:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Profile picture not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type. Only images and videos are allowed."
+        )
+    
+    if session_data.total_size > settings.MAX_RESUMABLE_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size is {settings.MAX_RESUMABLE_UPLOAD_SIZE // (1024 * 1024)}MB."
+        )
+    
+    media_type = "image" if session_data.content_type in ALLOWED_IMAGE_TYPES else "video"
+    upload_service = UploadService(db)
+    # Piggyback cleanup of abandoned sessions on new ones
+    upload_service.expire_stale_sessions()
+    
+    # Every pending session holds its full size on disk, so cap them per user
+    open_sessions, reserved_bytes = upload_service.open_sessions(current_user.id)
+    if open_sessions >= settings.UPLOAD_MAX_OPEN_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many unfinished uploads. Finish or abort one of your {open_sessions} upload sessions first."
+        )
+    if reserved_bytes + session_data.total_size > settings.UPLOAD_MAX_RESERVED_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Unfinished uploads exceed {settings.UPLOAD_MAX_RESERVED_BYTES // (1024 * 1024)}MB. Finish or abort one first."
+        )
+    
+    session = upload_service.create_session(
+        user_id=current_user.id,
+        original_filename=session_data.filename,
+        content_type=session_data.content_type,
+        media_type=media_type,
+        total_size=session_data.total_size
+    )
+    
+    # Allocating hundreds of MB can take a while; keep it off the event loop
+    try:
+        await asyncio.to_thread(UploadService.preallocate, session)
+    except OSError:
+        upload_service.abort(session)
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Not enough storage for this upload"
         )
-    return FileResponse(file_path)
+    return session
 
 
-@router.get("/media/{filename}")
-async def get_media(filename: str):
-    """Serve media files."""
-    file_path = os.path.join(MEDIA_DIR, filename)
-    if not os.path.exists(file_path):
+def get_upload_session_or_404(upload_service: UploadService, session_id: str, user_id: int):
+    """Get a pending upload session or raise 404."""
+    session = upload_service.get_session(session_id, user_id)
+    if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Media file not found"
+            detail="Upload session not found or expired"
+        )
+    return session
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get upload progress; clients resume from ``received_bytes``."""
+    return get_upload_session_or_404(UploadService(db), session_id, current_user.id)
+
+
+@router.put("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Write a raw chunk body at ``offset`` into the session's preallocated file."""
+    upload_service = UploadService(db)
+    session = get_upload_session_or_404(upload_service, session_id, current_user.id)
+    
+    # Chunks must be contiguous; re-sending already received bytes is fine
+    if offset > session.received_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Unexpected offset. Resume from {session.received_bytes}.",
+            headers={"Upload-Offset": str(session.received_bytes)}
+        )
+    
+    # Stream the body straight to disk instead of buffering it in memory
+    written = 0
+    async with aiofiles.open(upload_service.partial_path(session), 'r+b') as f:
+        await f.seek(offset)
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            written += len(chunk)
+            if written > settings.UPLOAD_CHUNK_MAX_SIZE or offset + written > session.total_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Chunk exceeds the chunk size limit or the declared upload size"
+                )
+            await f.write(chunk)
+    
+    return upload_service.record_chunk(session, offset + written)
+
+
+@router.post("/sessions/{session_id}/finalize")
+async def finalize_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Complete a resumable upload and publish the media file."""
+    upload_service = UploadService(db)
+    session = get_upload_session_or_404(upload_service, session_id, current_user.id)
+    
+    if not session.is_complete:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete. Received {session.received_bytes} of {session.total_size} bytes.",
+            headers={"Upload-Offset": str(session.received_bytes)}
         )
-    return FileResponse(file_path)
+    
+    media_url = upload_service.finalize(session)
+    
+    return {
+        "message": "Media uploaded successfully",
+        "media_url": media_url,
+        "media_type": session.media_type,
+        "filename": session.filename
+    }
+
+
+@router.delete("/sessions/{session_id}")
+async def abort_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Abort a resumable upload and discard received chunks."""
+    upload_service = UploadService(db)
+    session = get_upload_session_or_404(upload_service, session_id, current_user.id)
+    upload_service.abort(session)
+    
+    return {"message": "Upload session aborted"}
+
+
+@router.get("/profile-pictures/{filename}")
+async def get_profile_picture(filename: str, request: Request):
+    """Serve profile picture files."""
+    return serve_upload(request, "profile_pics", filename, "Profile picture not found")
+
+
+@router.get("/media/{filename}")
+async def get_media(filename: str, request: Request):
+    """Serve media files."""
+    return serve_upload(request, "media", filename, "Media file not found")
 
 
 @router.delete("/profile-picture")
@@ -193,6 +459,8 @@ async def delete_profile_picture(
         # Update user profile
         current_user.avatar_url = None
         db.commit()
+        post_fragment_cache.invalidate_author(current_user.id)
+        profile_cache.invalidate(current_user.id)
         
         return {"message": "Profile picture deleted successfully"}
         
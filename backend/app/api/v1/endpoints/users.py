@@ -1,15 +1,25 @@
 """
 User endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.http_cache import make_weak_etag, etag_matches, not_modified_response, set_etag_headers
 from app.db.database import get_db
-from app.schemas.user import UserResponse, UserUpdate, UserProfile
+from app.core.security import verify_password
+from app.schemas.user import (
+    UserResponse, UserPublic, UserUpdate, UserProfile, UserSuggestion, AccountDeletionRequest, AccountDeletionResponse
+)
 from app.models.user import User
-from app.models.interaction import Follow
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_optional_user_id
+from app.services.fragment_cache import post_fragment_cache
+from app.services.profile_service import ProfileService, profile_cache, profile_version
+from app.services.follow_graph import follow_graph
+from app.services.recommendations import recommender
+from app.services.interaction_service import InteractionService
+from app.services.account_deletion import AccountDeletionService
+from app.db.queries import fetch_user_card_rows_by_id
 
 router = APIRouter()
 
@@ -33,59 +43,72 @@ async def update_my_profile(
     
     db.commit()
     db.refresh(current_user)
+    post_fragment_cache.invalidate_author(current_user.id)
+    profile_cache.invalidate(current_user.id)
     
     return current_user
 
 
+@router.delete("/me", response_model=AccountDeletionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def delete_my_account(
+    deletion_request: AccountDeletionRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete current user's account.
+    
+    The account is deactivated at once; its posts, interactions and
+    notifications are purged in the background.
+    """
+    if not verify_password(deletion_request.password, current_user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect password"
+        )
+    
+    return AccountDeletionService(db).request(current_user)
+
+
+@router.get("/suggestions", response_model=List[UserSuggestion])
+async def get_follow_suggestions(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Suggest users to follow, ranked by mutual follows and engagement."""
+    following_ids = follow_graph.get_following_ids(db, current_user.id)
+    # Ask for a few extra in case some candidates were deactivated since the batch
+    suggestions = recommender.recommend(current_user.id, following_ids, limit + 5)
+    cards = fetch_user_card_rows_by_id(db, [user_id for user_id, _, _ in suggestions], active_only=True)
+    
+    return [
+        UserSuggestion(**cards[user_id]._asdict(), mutual_count=mutual_count, score=round(score, 3))
+        for user_id, score, mutual_count in suggestions if user_id in cards
+    ][:limit]
+
+
 @router.get("/{user_id}", response_model=UserProfile)
 async def get_user_profile(
     user_id: int,
+    request: Request,
+    response: Response,
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get user profile by ID (public endpoint)."""
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if not user:
+    """Get user profile by ID (public endpoint; follow flags need authentication)."""
+    profile = ProfileService(db).get_profile(user_id, viewer_id)
+    if profile is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if current user follows this user
-    is_following = db.query(Follow).filter(
-        Follow.follower_id == current_user.id,
-        Follow.following_id == user_id
-    ).first() is not None
+    etag = make_weak_etag("user", user_id, profile_version(profile))
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_etag_headers(response, etag)
     
-    # Check if this user follows current user
-    is_followed_by = db.query(Follow).filter(
-        Follow.follower_id == user_id,
-        Follow.following_id == current_user.id
-    ).first() is not None
-    
-    user_dict = {
-        'id': user.id,
-        'email': user.email,
-        'username': user.username,
-        'full_name': user.full_name,
-        'bio': user.bio,
-        'location': user.location,
-        'website': user.website,
-        'is_private': user.is_private,
-        'avatar_url': user.avatar_url,
-        'cover_url': user.cover_url,
-        'is_active': user.is_active,
-        'is_verified': user.is_verified,
-        'followers_count': db.query(Follow).filter(Follow.following_id == user_id).count(),
-        'following_count': db.query(Follow).filter(Follow.follower_id == user_id).count(),
-        'posts_count': user.posts_count,
-        'created_at': user.created_at,
-        'updated_at': user.updated_at,
-        'is_following': is_following,
-        'is_followed_by': is_followed_by
-    }
-    
-    return UserProfile(**user_dict)
+    return UserProfile(**profile)
 
 
 @router.post("/{user_id}/follow")
@@ -101,33 +124,19 @@ async def follow_user(
             detail="Cannot follow yourself"
         )
     
-    target_user = db.query(User).filter(User.id == user_id).first()
+    target_user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if already following
-    existing_follow = db.query(Follow).filter(
-        Follow.follower_id == current_user.id,
-        Follow.following_id == user_id
-    ).first()
-    
-    if existing_follow:
+    if InteractionService(db).follow(current_user, target_user) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Already following this user"
         )
     
-    # Create new follow relationship
-    new_follow = Follow(
-        follower_id=current_user.id,
-        following_id=user_id
-    )
-    db.add(new_follow)
-    db.commit()
-    
     return {"message": f"Successfully followed {target_user.username}"}
 
 
@@ -151,26 +160,16 @@ async def unfollow_user(
             detail="User not found"
         )
     
-    # Check if currently following
-    existing_follow = db.query(Follow).filter(
-        Follow.follower_id == current_user.id,
-        Follow.following_id == user_id
-    ).first()
-    
-    if not existing_follow:
+    if not InteractionService(db).unfollow(current_user.id, user_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not following this user"
         )
     
-    # Remove the follow relationship
-    db.delete(existing_follow)
-    db.commit()
-    
     return {"message": f"Successfully unfollowed {target_user.username}"}
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=List[UserPublic])
 async def search_users(
     q: Optional[str] = Query(None, description="Search query"),
     limit: int = Query(20, ge=1, le=100),
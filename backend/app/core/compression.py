@@ -0,0 +1,222 @@
+"""
+Negotiated response compression (zstd, brotli, gzip) as a pure ASGI middleware.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Server preference when the client rates several encodings equally
+SUPPORTED_ENCODINGS: List[str] = (
+    (["zstd"] if zstandard is not None else [])
+    + (["br"] if brotli is not None else [])
+    + ["gzip"]
+)
+
+# Content types that are already compressed
+INCOMPRESSIBLE_PREFIXES = (b"image/", b"video/", b"audio/", b"application/zip", b"application/gzip")
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+    
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+    
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def create_compressor(encoding: str, level: Optional[int] = None):
+    """Create a streaming compressor for a negotiated content encoding."""
+    if encoding == "zstd":
+        return _ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL if level is None else level)
+    if encoding == "br":
+        return _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY if level is None else level)
+    return _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL if level is None else level)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an ``Accept-Encoding`` header."""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold with the client's preferred encoding.
+    
+    Small bodies, already encoded responses, partial content, media types that
+    are compressed already and excluded paths (uploaded media) pass through.
+    """
+    
+    def __init__(self, app, minimum_size: Optional[int] = None, exclude_paths: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.exclude_paths = tuple(settings.COMPRESSION_EXCLUDE_PATHS if exclude_paths is None else exclude_paths)
+        # Browsers send a handful of distinct Accept-Encoding values; negotiate each once
+        self._negotiated: Dict[bytes, Optional[str]] = {}
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        
+        encoding = self._negotiated.get(accept_encoding, False)
+        if encoding is False:
+            encoding = negotiate_encoding(accept_encoding.decode("latin-1"))
+            if len(self._negotiated) < 256:
+                self._negotiated[accept_encoding] = encoding
+        
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state: decides on the first body chunk whether to compress."""
+    
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+    
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._is_compressible(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+        
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message: compress only if it is worth it
+                if len(body) < self.minimum_size:
+                    await self._send(self.start_message)
+                    await self._send(message)
+                    return
+                compressor = create_compressor(self.encoding)
+                body = compressor.compress(body) + compressor.finish()
+                self._set_encoding_headers(len(body))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            
+            # Streaming response: length is unknown, compress chunk by chunk
+            self.compressor = create_compressor(self.encoding)
+            self._set_encoding_headers(None)
+            await self._send(self.start_message)
+        
+        if more_body:
+            body = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            body = self.compressor.compress(body) + self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+    
+    @staticmethod
+    def _is_compressible(message) -> bool:
+        if message["status"] in (204, 206, 304):
+            return False
+        for name, value in message.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type" and value.startswith(INCOMPRESSIBLE_PREFIXES):
+                return False
+        return True
+    
+    def _set_encoding_headers(self, content_length: Optional[int]) -> None:
+        headers: List[Tuple[bytes, bytes]] = []
+        vary = b"Accept-Encoding"
+        for name, value in self.start_message.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value + b", Accept-Encoding"
+                continue
+            headers.append((name, value))
+        
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers.append((b"vary", vary))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        self.start_message["headers"] = headers
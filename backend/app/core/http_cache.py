@@ -0,0 +1,48 @@
+"""
+HTTP caching helpers for conditional GET (ETag / If-None-Match).
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+# Clients may store responses but must revalidate them on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def make_weak_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values a representation depends on."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check ``If-None-Match`` against an ETag using weak comparison."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque_tag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """Build an empty 304 response for a matching ETag."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    )
+
+
+def set_etag_headers(response: Response, etag: str) -> None:
+    """Attach validator headers to a full response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
@@ -0,0 +1,151 @@
+"""
+Structured JSON logging through a background queue.
+
+Handlers on the event loop thread only enqueue records: ``RequestQueueHandler``
+captures the request context (request id, user id, route), merges the message
+arguments and puts the record on a bounded queue. A ``QueueListener`` thread
+formats records, including tracebacks, and does the blocking stream I/O.
+When the queue is full, records are dropped and counted rather than blocking
+the event loop. INFO and lower records can be sampled.
+"""
+import atexit
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+from app.core.middleware import request_context_var, request_id_var, route_template
+
+# Attributes of every LogRecord; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request's id, user id and route to records.
+    
+    A ``request_id`` passed via ``extra`` wins, for code running outside the
+    request context (e.g. the global exception handler).
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        context = request_context_var.get()
+        if context is not None:
+            record.user_id = context.get("user_id")
+            scope = context.get("scope")
+            record.route = route_template(scope) if scope is not None and "route" in scope else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every WARNING and above, and a ``rate`` fraction of lower records."""
+    
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            record.sample_rate = self.rate
+            return True
+        return False
+
+
+class RequestQueueHandler(QueueHandler):
+    """Queue handler that defers formatting to the listener and never blocks."""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge arguments now (they may change later), but leave exc_info for the
+        # listener thread so tracebacks are formatted off the event loop.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the request context and ``extra`` fields."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, with the request id."""
+    
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+_listener: Optional[QueueListener] = None
+queue_handler: Optional[RequestQueueHandler] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_format: str = "json",
+    sample_rate: float = 1.0,
+    queue_size: int = 10000
+) -> None:
+    """Route the root logger through the background queue (idempotent)."""
+    global _listener, queue_handler
+    if _listener is not None:
+        return
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    
+    queue_handler = RequestQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+    queue_handler.addFilter(RequestContextFilter())
+    
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,328 @@
+"""
+Prometheus-style metrics: request latency histograms, in-flight requests and
+collected gauges/counters, exported in the text exposition format.
+
+Counters are plain per-worker Python numbers mutated only from the event loop
+thread, so recording a request takes no lock. With ``METRICS_MULTIPROC_DIR``
+set, every worker periodically writes a snapshot there and a scrape served by
+any worker merges the snapshots of all live workers.
+"""
+import bisect
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core import logging_config
+from app.core.config import settings
+from app.core.middleware import route_template
+
+logger = logging.getLogger(__name__)
+
+# Seconds; chosen around the API's latency budget
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A collector returns samples as (type, name, help, label names, {label values: value})
+Sample = Tuple[str, str, str, Tuple[str, ...], Dict[Tuple[str, ...], float]]
+Collector = Callable[[], Iterable[Sample]]
+
+
+class MetricsRegistry:
+    """Per-worker metrics: the request histogram plus collectors read at scrape time."""
+    
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # (method, route, status) -> [count per bucket..., count above last bucket, sum]
+        self.requests: Dict[Tuple[str, str, str], List[float]] = {}
+        self.in_flight = 0
+        self._collectors: List[Collector] = []
+    
+    def observe_request(self, method: str, route: str, status: int, duration: float) -> None:
+        """Record one finished request."""
+        key = (method, route, str(status))
+        series = self.requests.get(key)
+        if series is None:
+            series = self.requests[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, duration)] += 1
+        series[-1] += duration
+    
+    def register_collector(self, collector: Collector) -> None:
+        """Add a callable read on every scrape (pool stats, cache counters, ...)."""
+        self._collectors.append(collector)
+    
+    def snapshot(self) -> dict:
+        """JSON-serializable state of this worker."""
+        samples = []
+        for collector in self._collectors:
+            try:
+                for kind, name, help_text, label_names, values in collector():
+                    samples.append([kind, name, help_text, list(label_names), [
+                        [list(labels), value] for labels, value in values.items()
+                    ]])
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+        
+        return {
+            "pid": os.getpid(),
+            "buckets": list(self.buckets),
+            "requests": [[list(key), series] for key, series in self.requests.items()],
+            "in_flight": self.in_flight,
+            "samples": samples,
+        }
+
+
+registry = MetricsRegistry()
+
+
+class MultiprocessStore:
+    """Shares worker snapshots through files in a directory (one per pid)."""
+    
+    def __init__(self, directory: str, flush_interval: float):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._next_flush = 0.0
+        os.makedirs(directory, exist_ok=True)
+    
+    def maybe_flush(self, registry: MetricsRegistry) -> None:
+        """Write this worker's snapshot if the flush interval has passed."""
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self.flush_interval
+            self.flush(registry)
+    
+    def flush(self, registry: MetricsRegistry) -> None:
+        """Write this worker's snapshot atomically."""
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(registry.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot: %s", e)
+    
+    def load_snapshots(self) -> List[dict]:
+        """Read the snapshots of all live workers, removing those of dead ones."""
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                pid = int(filename[len("metrics-"):-len(".json")])
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                # Worker exited; its counters restart with its replacement
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            except (ValueError, PermissionError):
+                pass
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+multiprocess_store: Optional[MultiprocessStore] = None
+if settings.METRICS_MULTIPROC_DIR:
+    multiprocess_store = MultiprocessStore(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+
+def collect_snapshots() -> List[dict]:
+    """Snapshots to export: every live worker's, or just this one's."""
+    if multiprocess_store is None:
+        return [registry.snapshot()]
+    multiprocess_store.flush(registry)
+    return multiprocess_store.load_snapshots()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+def render_metrics(snapshots: List[dict]) -> str:
+    """Merge worker snapshots and render them in the Prometheus text format."""
+    lines = []
+    
+    # Request latency histogram, summed across workers
+    buckets = tuple(snapshots[0]["buckets"]) if snapshots else LATENCY_BUCKETS
+    requests: Dict[Tuple[str, ...], List[float]] = {}
+    in_flight = 0
+    for snapshot in snapshots:
+        in_flight += snapshot["in_flight"]
+        if tuple(snapshot["buckets"]) != buckets:
+            continue
+        for key, series in snapshot["requests"]:
+            merged = requests.get(tuple(key))
+            if merged is None:
+                requests[tuple(key)] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    merged[i] += value
+    
+    label_names = ("method", "route", "status")
+    lines.append("# HELP http_request_duration_seconds Request latency by route template and status.")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for key, series in sorted(requests.items()):
+        cumulative = 0
+        for bound, count in zip(buckets, series):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(label_names + ("le",), key + (bound,))} {cumulative}')
+        total = cumulative + series[len(buckets)]
+        lines.append(f'http_request_duration_seconds_bucket{_labels(label_names + ("le",), key + ("+Inf",))} {total}')
+        lines.append(f"http_request_duration_seconds_sum{_labels(label_names, key)} {series[-1]}")
+        lines.append(f"http_request_duration_seconds_count{_labels(label_names, key)} {total}")
+    
+    lines.append("# HELP http_requests_in_flight Requests being handled.")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    lines.append(f"http_requests_in_flight {in_flight}")
+    
+    # Collected samples: counters and gauges are summed across workers
+    families: Dict[str, list] = {}
+    for snapshot in snapshots:
+        for kind, name, help_text, names, values in snapshot["samples"]:
+            family = families.setdefault(name, [kind, help_text, tuple(names), {}])
+            for labels, value in values:
+                family[3][tuple(labels)] = family[3].get(tuple(labels), 0) + value
+    
+    # Derived: cache hit ratio from the summed hit and miss counters
+    hits = families.get("cache_hits_total")
+    misses = families.get("cache_misses_total")
+    if hits and misses:
+        ratios = {}
+        for labels, hit_count in hits[3].items():
+            lookups = hit_count + misses[3].get(labels, 0)
+            ratios[labels] = hit_count / lookups if lookups else 0.0
+        families["cache_hit_ratio"] = ["gauge", "Cache hit ratio since start.", hits[2], ratios]
+    
+    for name, (kind, help_text, names, values) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(values.items()):
+            lines.append(f"{name}{_labels(names, labels)} {value}")
+    
+    return "\n".join(lines) + "\n"
+
+
+def is_metrics_client_allowed(client_host: Optional[str], authorization: Optional[str]) -> bool:
+    """Allow scrapes with the configured token; without one, only local scrapes in debug.
+    
+    Behind a proxy every peer address is the proxy's (usually private), so
+    the address alone never grants access outside debug.
+    """
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}")
+    if not settings.DEBUG or client_host is None:
+        return False
+    try:
+        address = ipaddress.ip_address(client_host)
+    except ValueError:
+        return client_host in ("localhost", "testclient")
+    return address.is_private or address.is_loopback
+
+
+def pool_collector(engine) -> Collector:
+    """Collector for the connection pool of a SQLAlchemy engine."""
+    def collect():
+        pool = engine.pool
+        stats = {}
+        for stat in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, stat, None)
+            if callable(method):
+                stats[(stat,)] = method()
+        yield ("gauge", "db_pool_connections", "Connection pool state.", ("state",), stats)
+    
+    return collect
+
+
+def cache_collector(name: str, cache) -> Collector:
+    """Collector for a cache exposing ``hits`` and ``misses`` counters."""
+    def collect():
+        yield ("counter", "cache_hits_total", "Cache hits.", ("cache",), {(name,): cache.hits})
+        yield ("counter", "cache_misses_total", "Cache misses.", ("cache",), {(name,): cache.misses})
+    
+    return collect
+
+
+def query_collector(query_metrics) -> Collector:
+    """Collector for per-route SQL query totals."""
+    def collect():
+        routes = list(query_metrics.routes.items())
+        yield ("counter", "db_queries_total", "SQL statements executed, by route.", ("route",),
+               {(route,): totals[1] for route, totals in routes})
+        yield ("counter", "db_query_seconds_total", "Time spent executing SQL, by route.", ("route",),
+               {(route,): totals[2] for route, totals in routes})
+        yield ("counter", "db_n_plus_one_requests_total", "Requests flagged as possible N+1.", ("route",),
+               {(route,): totals[3] for route, totals in routes})
+    
+    return collect
+
+
+def log_collector() -> Collector:
+    """Collector for log records dropped because the log queue was full."""
+    def collect():
+        handler = logging_config.queue_handler
+        dropped = handler.dropped if handler is not None else 0
+        yield ("counter", "log_records_dropped_total", "Log records dropped on a full log queue.", (), {(): dropped})
+    
+    return collect
+
+
+def follow_graph_collector(index) -> Collector:
+    """Collector for the size of the in-memory follow-graph index."""
+    def collect():
+        stats = index.memory_stats()
+        yield ("gauge", "follow_graph_edges", "Edges in the follow-graph index.", (), {(): stats["edges"]})
+        yield ("gauge", "follow_graph_bytes", "Approximate memory of the follow-graph index.", (), {(): stats["bytes"]})
+        yield ("gauge", "follow_graph_bytes_per_edge", "Approximate index memory per edge.", (), {(): stats["bytes_per_edge"]})
+    
+    return collect
+
+
+class MetricsMiddleware:
+    """Record latency by route template and status, and the in-flight gauge."""
+    
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        registry = self.registry
+        start_time = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            registry.observe_request(
+                scope["method"], route_template(scope), status_code, time.perf_counter() - start_time
+            )
+            if multiprocess_store is not None:
+                multiprocess_store.maybe_flush(registry)
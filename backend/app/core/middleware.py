@@ -0,0 +1,145 @@
+"""
+Pure ASGI edge middleware: request ids, timing and CORS preflight.
+"""
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+# Request id of the request being handled, for logs and error reports
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Mutable context of the request being handled ({"scope", "user_id"}). A dict
+# rather than separate variables so values set from thread-pool dependencies
+# (e.g. the authenticated user) are seen by the rest of the request.
+request_context_var: ContextVar[Optional[dict]] = ContextVar("request_context", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+
+def set_request_user(user_id: int) -> None:
+    """Record the authenticated user of the current request for logs."""
+    context = request_context_var.get()
+    if context is not None:
+        context["user_id"] = user_id
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled a request, e.g. ``/api/v1/posts/{post_id}``.
+    
+    Bounded-cardinality label for metrics and logs; call after the app ran.
+    Routes of included routers may report their path without the router
+    prefix, so the prefix is recovered from the concrete request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "<unmatched>"
+    try:
+        rendered = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if rendered and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+class EdgeMiddleware:
+    """Outermost middleware handling per-request bookkeeping in one pass.
+    
+    - Tags every request with an id (``X-Request-ID`` is reused if the client
+      or proxy sent a sane one) exposed via ``scope["state"]`` and
+      ``request_id_var``, and echoes it on the response.
+    - Adds ``X-Process-Time`` without buffering the response body, and emits
+      one ``app.access`` log record per request when ``access_log`` is set.
+    - Answers CORS preflight requests directly from precomputed headers;
+      actual requests still get their CORS headers from ``CORSMiddleware``.
+    """
+    
+    def __init__(
+        self,
+        app,
+        allow_origins: Iterable[str] = (),
+        allow_methods: Iterable[str] = (),
+        allow_headers: Iterable[str] = (),
+        allow_credentials: bool = True,
+        max_age: int = 86400,
+        access_log: bool = False
+    ):
+        self.app = app
+        self.access_log = access_log
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.allow_all_origins = b"*" in self.allow_origins
+        self.preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-allow-headers", ", ".join(allow_headers).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"vary", b"Origin"),
+            (b"content-length", b"0"),
+        ]
+        if allow_credentials:
+            self.preflight_headers.append((b"access-control-allow-credentials", b"true"))
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        request_id = None
+        origin = None
+        is_preflight = False
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                if 0 < len(value) <= 128 and value.isascii():
+                    request_id = value.decode("ascii")
+            elif name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                is_preflight = True
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        context_token = request_context_var.set({"scope": scope, "user_id": None})
+        request_id_header = (b"x-request-id", request_id.encode("ascii"))
+        status_code = 500
+        
+        try:
+            if is_preflight and scope["method"] == "OPTIONS" and origin is not None:
+                if self.allow_all_origins or origin in self.allow_origins:
+                    status = 200
+                    headers = [(b"access-control-allow-origin", origin)] + self.preflight_headers
+                else:
+                    status = 400
+                    headers = [(b"content-length", b"0")]
+                headers.append(request_id_header)
+                headers.append((b"x-process-time", str(time.perf_counter() - start_time).encode("ascii")))
+                await send({"type": "http.response.start", "status": status, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                status_code = status
+                return
+            
+            async def send_with_headers(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    message["headers"] = list(message.get("headers", [])) + [
+                        request_id_header,
+                        (b"x-process-time", str(time.perf_counter() - start_time).encode("ascii")),
+                    ]
+                await send(message)
+            
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if self.access_log:
+                duration_ms = round((time.perf_counter() - start_time) * 1000, 3)
+                access_logger.info(
+                    "%s %s %d %.1fms", scope["method"], scope["path"], status_code, duration_ms,
+                    extra={"method": scope["method"], "path": scope["path"], "status": status_code, "duration_ms": duration_ms}
+                )
+            request_context_var.reset(context_token)
+            request_id_var.reset(token)
@@ -0,0 +1,22 @@
+"""
+Opaque cursors for keyset pagination.
+"""
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the ``(created_at, id)`` of a page's last row as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """Decode a cursor back to ``(created_at, id)``, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
@@ -0,0 +1,203 @@
+"""
+On-demand request profiling into a bounded on-disk ring.
+
+A request is profiled when it carries ``X-Profile`` (debug only by default)
+or falls in the sampled fraction of production traffic. Two modes:
+
+- ``sample`` (default): a background thread samples the event loop thread's
+  stack every few milliseconds and writes folded stacks (``.folded``), the
+  input format of flamegraph.pl, speedscope and inferno.
+- ``cprofile``: deterministic ``cProfile`` capture written as ``.pstats``
+  (snakeviz, ``gprof2dot``, ``flameprof``).
+
+Both observe the event loop thread, so requests interleaved with the
+profiled one show up too; sync work pushed to the thread pool does not.
+Only one request is profiled at a time per worker.
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.middleware import request_id_var, route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILE_EXTENSIONS = (".folded", ".pstats")
+
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class StackSampler:
+    """Samples one thread's stack on an interval and counts folded stacks."""
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+    
+    def folded(self) -> str:
+        """Collapsed stacks, one ``frame;frame;frame count`` line each."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Directory of profile files, keeping only the newest ``max_files``."""
+    
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+    
+    def path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None if there is no such profile."""
+        if name != os.path.basename(name) or not name.endswith(PROFILE_EXTENSIONS):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+    
+    def list(self) -> List[Dict]:
+        """Stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(PROFILE_EXTENSIONS):
+                stat = entry.stat()
+                profiles.append({"name": entry.name, "size": stat.st_size, "created_at": stat.st_mtime})
+        profiles.sort(key=lambda profile: profile["created_at"], reverse=True)
+        return profiles
+    
+    def save_text(self, name: str, content: str) -> None:
+        """Write a text profile and trim the ring."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(content)
+        self._trim()
+    
+    def save_pstats(self, name: str, profile: cProfile.Profile) -> None:
+        """Write a cProfile capture and trim the ring."""
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._trim()
+    
+    def _trim(self) -> None:
+        for profile in self.list()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, profile["name"]))
+            except OSError:
+                pass
+
+
+class ProfilerMiddleware:
+    """Profile requests asking for it (``X-Profile``) or sampled at ``sample_rate``.
+    
+    The profile name is returned in ``X-Profile-Id``.
+    """
+    
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        mode: str = "sample",
+        sample_rate: float = 0.0,
+        header_enabled: bool = False,
+        interval: float = 0.005
+    ):
+        self.app = app
+        self.store = store
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.header_enabled = header_enabled
+        self.interval = interval
+        self._active = False
+    
+    def _wants_profile(self, scope) -> bool:
+        if self.header_enabled:
+            for name, _ in scope["headers"]:
+                if name == b"x-profile":
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        self._active = True
+        extension = ".pstats" if self.mode == "cprofile" else ".folded"
+        names: List[str] = []
+        
+        def profile_name() -> str:
+            # Named once routing has happened, so the route template is known
+            if not names:
+                route = _UNSAFE_CHARS_RE.sub("_", route_template(scope)).strip("_")[:80]
+                names.append("{}-{}-{}-{}{}".format(
+                    time.strftime("%Y%m%dT%H%M%S"), request_id_var.get()[:32], scope["method"], route, extension
+                ))
+            return names[0]
+        
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_name().encode("latin-1"))
+                ]
+            await send(message)
+        
+        sampler = None
+        profile = None
+        try:
+            if self.mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+            else:
+                sampler = StackSampler(threading.get_ident(), self.interval)
+                sampler.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                if sampler is not None:
+                    sampler.stop()
+            
+            if profile is not None:
+                await asyncio.to_thread(self.store.save_pstats, profile_name(), profile)
+            else:
+                await asyncio.to_thread(self.store.save_text, profile_name(), sampler.folded())
+        except (OSError, ValueError) as e:
+            # ValueError: another profiler is already active in this process
+            logger.warning("Could not profile request: %s", e)
+        finally:
+            self._active = False
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
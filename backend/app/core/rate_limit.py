@@ -0,0 +1,254 @@
+"""
+Token bucket rate limiting as a pure ASGI middleware.
+"""
+import json
+import logging
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(NamedTuple):
+    """A token bucket: ``burst`` tokens refilled at ``limit`` per minute."""
+    name: str
+    limit: int
+    burst: int
+    
+    @property
+    def rate(self) -> float:
+        """Refill rate in tokens per second."""
+        return self.limit / 60.0
+
+
+# (allowed, remaining tokens, seconds until the bucket is full again)
+RateLimitResult = Tuple[bool, int, int]
+
+
+class InMemoryRateLimitStore:
+    """Per-process bucket store for single-worker deployments.
+    
+    Buckets live in a fixed number of dict shards. The middleware runs on the
+    event loop thread so no locking is needed; sharding keeps idle-bucket
+    eviction incremental (one shard per sweep) instead of a full scan.
+    """
+    
+    def __init__(self, shards: int = 64, sweep_every: int = 1024):
+        self._shards: List[Dict[str, list]] = [{} for _ in range(shards)]
+        self._sweep_every = sweep_every
+        self._hits = 0
+        self._next_shard = 0
+    
+    async def hit(self, key: str, policy: RateLimitPolicy) -> RateLimitResult:
+        now = time.monotonic()
+        shard = self._shards[hash(key) % len(self._shards)]
+        rate = policy.rate
+        
+        bucket = shard.get(key)
+        if bucket is None:
+            tokens = float(policy.burst)
+            # [tokens, last update, seconds to refill completely]
+            bucket = shard[key] = [tokens, now, policy.burst / rate]
+        else:
+            tokens = min(float(policy.burst), bucket[0] + (now - bucket[1]) * rate)
+        
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        bucket[0] = tokens
+        bucket[1] = now
+        
+        self._hits += 1
+        if self._hits % self._sweep_every == 0:
+            self._sweep(now)
+        
+        return allowed, int(tokens), math.ceil((policy.burst - tokens) / rate)
+    
+    def _sweep(self, now: float) -> None:
+        """Drop buckets in one shard that have refilled completely."""
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) % len(self._shards)
+        # A bucket idle for longer than its full refill time is equivalent to no bucket
+        for key in [k for k, (_, last, refill) in shard.items() if now - last > refill]:
+            del shard[key]
+
+
+# Refill, consume and persist atomically; Redis TIME avoids clock skew between workers
+TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore:
+    """Shared bucket store for multi-worker deployments using a Lua script."""
+    
+    def __init__(self, redis_url: str, prefix: str = "ratelimit:"):
+        from redis import asyncio as aioredis
+        
+        self._client = aioredis.from_url(redis_url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+        self._prefix = prefix
+    
+    async def hit(self, key: str, policy: RateLimitPolicy) -> RateLimitResult:
+        try:
+            allowed, tokens = await self._script(
+                keys=[self._prefix + key],
+                args=[policy.rate, policy.burst]
+            )
+        except Exception as e:
+            # Fail open: an unavailable Redis must not take the API down
+            logger.warning("Rate limit store unavailable: %s", e)
+            return True, policy.burst, 0
+        
+        tokens = float(tokens)
+        return bool(allowed), int(tokens), math.ceil((policy.burst - tokens) / policy.rate)
+
+
+def create_rate_limit_store():
+    """Create the store configured by ``RATE_LIMIT_BACKEND``."""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisRateLimitStore(settings.REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed, falling back to in-memory rate limiting")
+    return InMemoryRateLimitStore()
+
+
+class RateLimitMiddleware:
+    """Enforce per-route, per-identity token buckets and add ``X-RateLimit-*`` headers.
+    
+    Identity is the user id of a verified access token, so a client cannot
+    get a fresh bucket by inventing tokens, and the client IP otherwise
+    (including for invalid or expired tokens). Behind trusted proxies the IP
+    is the ``X-Forwarded-For`` entry the outermost of ``forwarded_hops``
+    proxies appended; entries left of it are whatever the client sent.
+    """
+    
+    def __init__(
+        self,
+        app,
+        store=None,
+        default_limit: Optional[int] = None,
+        burst: Optional[int] = None,
+        routes: Optional[Dict[str, int]] = None,
+        exempt_paths: Optional[List[str]] = None,
+        trust_forwarded: Optional[bool] = None,
+        forwarded_hops: Optional[int] = None
+    ):
+        self.app = app
+        self.store = store or create_rate_limit_store()
+        self.trust_forwarded = settings.RATE_LIMIT_TRUST_FORWARDED if trust_forwarded is None else trust_forwarded
+        self.forwarded_hops = max(1, settings.RATE_LIMIT_FORWARDED_HOPS if forwarded_hops is None else forwarded_hops)
+        self.exempt_paths = tuple(settings.RATE_LIMIT_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+        
+        default_limit = default_limit or settings.RATE_LIMIT_PER_MINUTE
+        burst = burst or settings.RATE_LIMIT_BURST
+        self.default_policy = RateLimitPolicy("default", default_limit, burst or default_limit)
+        
+        # Exact paths resolve with one dict lookup; "*" suffixed entries are prefixes
+        self.exact_policies: Dict[str, RateLimitPolicy] = {}
+        self.prefix_policies: List[Tuple[str, RateLimitPolicy]] = []
+        routes = settings.RATE_LIMIT_ROUTES if routes is None else routes
+        for path, limit in routes.items():
+            policy = RateLimitPolicy(path, limit, burst or limit)
+            if path.endswith("*"):
+                self.prefix_policies.append((path[:-1], policy))
+            else:
+                self.exact_policies[path] = policy
+        self.prefix_policies.sort(key=lambda item: len(item[0]), reverse=True)
+    
+    def _policy_for(self, path: str) -> RateLimitPolicy:
+        policy = self.exact_policies.get(path)
+        if policy is not None:
+            return policy
+        for prefix, prefix_policy in self.prefix_policies:
+            if path.startswith(prefix):
+                return prefix_policy
+        return self.default_policy
+    
+    def _identity(self, scope) -> str:
+        authorization = None
+        forwarded = []
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value
+            elif name == b"x-forwarded-for":
+                forwarded.append(value)
+        
+        if authorization is not None:
+            scheme, _, token = authorization.decode("latin-1").partition(" ")
+            user_id = verify_token(token.strip()) if scheme.lower() == "bearer" else None
+            if user_id is not None:
+                return "u:" + user_id
+        if forwarded and self.trust_forwarded:
+            # Repeated headers form one list, in order
+            hops = [hop.strip() for hop in b",".join(forwarded).split(b",") if hop.strip()]
+            if hops:
+                return "ip:" + hops[-min(self.forwarded_hops, len(hops))].decode("latin-1")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        
+        path = scope["path"]
+        if path.startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+        
+        policy = self._policy_for(path)
+        allowed, remaining, reset = await self.store.hit(
+            policy.name + "|" + self._identity(scope), policy
+        )
+        rate_headers = [
+            (b"x-ratelimit-limit", str(policy.limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(reset).encode()),
+        ]
+        
+        if not allowed:
+            retry_after = math.ceil(1.0 / policy.rate)
+            body = json.dumps({"detail": "Rate limit exceeded", "type": "rate_limited"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": rate_headers + [
+                    (b"retry-after", str(retry_after).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
@@ -1,8 +1,11 @@
 """
 Security utilities for authentication and authorization.
 """
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -55,26 +58,75 @@ def create_refresh_token(
     return encoded_jwt
 
 
-def verify_token(token: str, token_type: str = "access") -> Optional[str]:
-    """Verify JWT token and return subject."""
+def _decode_token(token: str, token_type: str) -> Optional[dict]:
+    """Verify a JWT and return its payload, or None if invalid, expired or of another type."""
     try:
         payload = jwt.decode(
             token, 
             settings.SECRET_KEY, 
             algorithms=[settings.ALGORITHM]
         )
+    except JWTError:
+        return None
+    
+    # Check token type
+    if payload.get("type") != token_type or payload.get("sub") is None:
+        return None
+    return payload
+
+
+class VerifiedTokenCache:
+    """LRU cache of verified access tokens: raw token -> (subject, expiry).
+    
+    The rate limiter and the auth dependencies both need the token's
+    subject, and a JWT decode costs far more than the rest of a request's
+    overhead. Only valid tokens are cached, and an entry is dropped once the
+    token expires, so a hit means exactly what a fresh decode would.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def verify(self, token: str) -> Optional[str]:
+        """Subject of a valid access token, or None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(token)
+                    return entry[0]
+                del self._entries[token]
         
-        # Check token type
-        if payload.get("type") != token_type:
-            return None
-            
-        subject: str = payload.get("sub")
-        if subject is None:
+        payload = _decode_token(token, "access")
+        if payload is None:
             return None
-            
+        
+        subject = str(payload["sub"])
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[token] = (subject, float(payload.get("exp", 0)))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
         return subject
-    except JWTError:
-        return None
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Global cache instance (per worker process)
+verified_tokens = VerifiedTokenCache(max_entries=settings.ACCESS_TOKEN_CACHE_SIZE)
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """Verify JWT token and return subject."""
+    if token_type == "access":
+        return verified_tokens.verify(token)
+    
+    payload = _decode_token(token, token_type)
+    return payload["sub"] if payload is not None else None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -1,10 +1,12 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.query_stats import instrument_engine
+from app.db.slow_query import SlowQueryLog, instrument_slow_queries
 
 # Create database engine
 engine = create_engine(
@@ -14,6 +16,27 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
+# SQLite only enforces foreign keys (and their ON DELETE rules) when asked
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Count and time queries per request
+if settings.QUERY_STATS_ENABLED:
+    instrument_engine(engine)
+
+# Log slow statements and keep totals per statement fingerprint
+if settings.SLOW_QUERY_ENABLED:
+    instrument_slow_queries(engine, SlowQueryLog(
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        explain_cooldown=settings.SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS,
+        max_fingerprints=settings.SLOW_QUERY_MAX_FINGERPRINTS
+    ))
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,27 @@
+"""
+Pytest plugin asserting per-endpoint SQL query budgets.
+
+Enable with ``pytest -p app.db.pytest_plugin`` (or ``pytest_plugins`` in a
+conftest), then::
+
+    def test_public_feed(client, query_budget):
+        with query_budget(3):
+            client.get("/api/v1/posts/public")
+"""
+import pytest
+
+from app.db.database import engine
+from app.db.query_stats import assert_max_queries
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager factory failing the test when a block exceeds its query budget.
+    
+    ``query_budget(max_queries, n_plus_one_threshold=5)`` also fails when any
+    statement repeats ``n_plus_one_threshold`` times; pass ``None`` to skip that.
+    """
+    def budget(max_queries: int, n_plus_one_threshold: int = 5):
+        return assert_max_queries(engine, max_queries, n_plus_one_threshold)
+    
+    return budget
@@ -0,0 +1,257 @@
+"""
+Read-side query functions returning column projections instead of ORM entities.
+
+Feed and notification reads only copy columns into JSON, so they select
+exactly those columns as named rows. This skips entity construction, the
+identity map and relationship state, and replaces per-object lazy loads of
+whole collections with the maintained counter columns.
+
+Author columns are labelled with an ``author_`` prefix; ``author_id``
+doubles as the embedded user's id.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import String, exists, func, literal, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.post import Post
+from app.models.user import User
+from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.notification import Notification
+
+
+POST_COLUMNS = (
+    Post.id,
+    Post.content,
+    Post.media_url,
+    Post.media_type,
+    Post.author_id,
+    Post.parent_id,
+    Post.is_reply,
+    Post.is_repost,
+    Post.original_post_id,
+    Post.created_at,
+    Post.updated_at,
+    Post.likes_count,
+    Post.comments_count,
+    Post.reposts_count,
+)
+
+# Author cards are public (no email) and carry no counters, so a card only
+# changes with the author's updated_at (see fragment and feed versions)
+AUTHOR_COLUMNS = (
+    User.username.label("author_username"),
+    User.full_name.label("author_full_name"),
+    User.bio.label("author_bio"),
+    User.location.label("author_location"),
+    User.website.label("author_website"),
+    User.is_private.label("author_is_private"),
+    User.avatar_url.label("author_avatar_url"),
+    User.cover_url.label("author_cover_url"),
+    User.is_active.label("author_is_active"),
+    User.is_verified.label("author_is_verified"),
+    User.created_at.label("author_created_at"),
+    User.updated_at.label("author_updated_at"),
+)
+
+COMMENT_COLUMNS = (
+    Comment.id,
+    Comment.content,
+    Comment.parent_id,
+    Comment.author_id,
+    Comment.post_id,
+    Comment.created_at,
+    Comment.updated_at,
+)
+
+NOTIFICATION_COLUMNS = (
+    Notification.id,
+    Notification.user_id,
+    Notification.actor_id,
+    Notification.type,
+    Notification.title,
+    Notification.message,
+    Notification.is_read,
+    Notification.is_archived,
+    Notification.post_id,
+    Notification.comment_id,
+    Notification.created_at,
+    Notification.updated_at,
+)
+
+USER_CARD_COLUMNS = (
+    User.id,
+    User.username,
+    User.full_name,
+    User.avatar_url,
+    User.is_verified,
+)
+
+# Public profile fields; the email is only shown to the user themselves (``/users/me``)
+PROFILE_COLUMNS = (
+    User.id,
+    User.username,
+    User.full_name,
+    User.bio,
+    User.location,
+    User.website,
+    User.is_private,
+    User.avatar_url,
+    User.cover_url,
+    User.is_active,
+    User.is_verified,
+    User.followers_count,
+    User.following_count,
+    User.posts_count,
+    User.created_at,
+    User.updated_at,
+)
+
+
+def _follow_flag_columns(viewer_id: int, user_id):
+    return (
+        exists().where(Follow.follower_id == viewer_id, Follow.following_id == user_id).label("is_following"),
+        exists().where(Follow.follower_id == user_id, Follow.following_id == viewer_id).label("is_followed_by"),
+    )
+
+
+def fetch_post_rows(db: Session, criteria: Iterable, offset: int, limit: int) -> List[Row]:
+    """Fetch one page of posts (newest first) joined with their authors; deactivated authors' are left out."""
+    return db.query(*POST_COLUMNS, *AUTHOR_COLUMNS).join(
+        User, Post.author_id == User.id
+    ).filter(*criteria, User.is_active == True).order_by(Post.created_at.desc()).offset(offset).limit(limit).all()
+
+
+def fetch_post_rows_by_id(db: Session, post_ids: Iterable[int]) -> Dict[int, Row]:
+    """Fetch posts of active authors joined with those authors, keyed by post id."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    rows = db.query(*POST_COLUMNS, *AUTHOR_COLUMNS).join(
+        User, Post.author_id == User.id
+    ).filter(Post.id.in_(post_ids), User.is_active == True).all()
+    return {row.id: row for row in rows}
+
+
+def count_posts(db: Session, criteria: Iterable) -> int:
+    """Count posts of active authors matching ``criteria`` without loading them."""
+    return db.query(func.count(Post.id)).join(
+        User, Post.author_id == User.id
+    ).filter(*criteria, User.is_active == True).scalar()
+
+
+def fetch_author_rows_by_id(db: Session, user_ids: Iterable[int]) -> Dict[int, Row]:
+    """Fetch the ``AuthorCard`` columns of users, keyed by user id."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    rows = db.query(User.id.label("author_id"), *AUTHOR_COLUMNS).filter(User.id.in_(user_ids)).all()
+    return {row.author_id: row for row in rows}
+
+
+def fetch_user_card_rows_by_id(db: Session, user_ids: Iterable[int], active_only: bool = False) -> Dict[int, Row]:
+    """Fetch small user cards (id, names, avatar, verified), keyed by user id."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    query = db.query(*USER_CARD_COLUMNS).filter(User.id.in_(user_ids))
+    if active_only:
+        query = query.filter(User.is_active == True)
+    return {row.id: row for row in query.all()}
+
+
+def fetch_liked_post_ids(db: Session, user_id: int, post_ids: Iterable[int]) -> Set[int]:
+    """Get which of ``post_ids`` a user has liked."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    return {
+        post_id for (post_id,) in
+        db.query(Like.post_id).filter(Like.user_id == user_id, Like.post_id.in_(post_ids)).all()
+    }
+
+
+def fetch_reposted_post_ids(db: Session, user_id: int, post_ids: Iterable[int]) -> Set[int]:
+    """Get which of ``post_ids`` a user has reposted."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    return {
+        post_id for (post_id,) in
+        db.query(Repost.post_id).filter(Repost.user_id == user_id, Repost.post_id.in_(post_ids)).all()
+    }
+
+
+def fetch_followed_ids(db: Session, user_id: int, user_ids: Iterable[int]) -> Set[int]:
+    """Get which of ``user_ids`` a user follows."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    return {
+        following_id for (following_id,) in
+        db.query(Follow.following_id).filter(Follow.follower_id == user_id, Follow.following_id.in_(user_ids)).all()
+    }
+
+
+def fetch_profile_row(db: Session, user_id: int, viewer_id: Optional[int] = None) -> Optional[Row]:
+    """Fetch a user's profile columns, plus the viewer's follow flags if ``viewer_id`` is given.
+    
+    Counters are columns and the flags are ``EXISTS`` probes of the unique
+    ``(follower_id, following_id)`` index, so this is a single statement.
+    """
+    columns = PROFILE_COLUMNS
+    if viewer_id is not None:
+        columns += _follow_flag_columns(viewer_id, User.id)
+    return db.query(*columns).filter(User.id == user_id).first()
+
+
+def fetch_follow_flags(db: Session, viewer_id: int, user_id: int) -> Tuple[bool, bool]:
+    """Get whether the viewer follows ``user_id`` and whether ``user_id`` follows the viewer."""
+    is_following, is_followed_by = db.query(*_follow_flag_columns(viewer_id, user_id)).one()
+    return bool(is_following), bool(is_followed_by)
+
+
+def fetch_follow_rows(
+    db: Session,
+    criteria: Iterable,
+    user_column,
+    before: Optional[Tuple[datetime, int]],
+    limit: int
+) -> List[Row]:
+    """Fetch one keyset page of follows (newest first) as ``(id, created_at, user_id)`` rows.
+    
+    ``user_column`` is the side of the follow to list and ``before`` the
+    ``(created_at, id)`` of the previous page's last row. With the
+    ``(user, created_at, id)`` indexes each page is an index range scan,
+    however many follows the user has.
+    """
+    query = db.query(Follow.id, Follow.created_at, user_column.label("user_id")).filter(*criteria)
+    if before is not None:
+        created_at, follow_id = before
+        if db.get_bind().dialect.name == "sqlite":
+            # Server-default timestamps are stored as text without fractional
+            # seconds; bind the same text so equal timestamps compare equal
+            created_at = literal(_sqlite_timestamp(created_at), String)
+        query = query.filter(tuple_(Follow.created_at, Follow.id) < tuple_(created_at, follow_id))
+    return query.order_by(Follow.created_at.desc(), Follow.id.desc()).limit(limit).all()
+
+
+def _sqlite_timestamp(value: datetime) -> str:
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{text}.{value.microsecond:06d}" if value.microsecond else text
+
+
+def fetch_comment_rows(db: Session, criteria: Iterable) -> List[Row]:
+    """Fetch comments matching ``criteria``, oldest first; deactivated authors' are left out."""
+    return db.query(*COMMENT_COLUMNS).join(
+        User, Comment.author_id == User.id
+    ).filter(*criteria, User.is_active == True).order_by(Comment.created_at.asc()).all()
+
+
+def fetch_notification_rows(db: Session, criteria: Iterable, offset: int, limit: int) -> List[Row]:
+    """Fetch one page of notifications (newest first)."""
+    return db.query(*NOTIFICATION_COLUMNS).filter(
+        *criteria
+    ).order_by(Notification.created_at.desc()).offset(offset).limit(limit).all()
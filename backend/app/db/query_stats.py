@@ -0,0 +1,207 @@
+"""
+Per-request SQL query accounting and N+1 detection.
+
+SQLAlchemy cursor events time every statement on the engine and add it to the
+``QueryStats`` of the request being handled (``query_stats_var``). Statement
+text is already parameterized, so the same text executed many times with
+different parameters inside one request is the signature of an N+1 loop.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.middleware import route_template
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Queries executed by one unit of work (a request, a job or a test block)."""
+    
+    __slots__ = ("count", "total_time", "statements", "scope")
+    
+    def __init__(self, scope: Optional[dict] = None):
+        # ASGI scope of the request, when tracking one
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+    
+    def record(self, statement: str, duration: float) -> None:
+        """Add one executed statement."""
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+    
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least ``threshold`` times, most repeated first."""
+        return [
+            (statement, count) for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+# Stats of the request being handled; None outside of tracked work
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class QueryMetrics:
+    """Per-route query totals for this worker, exported by the metrics endpoint."""
+    
+    def __init__(self):
+        # route -> [requests, queries, db seconds, requests flagged as N+1]
+        self.routes: Dict[str, List] = {}
+    
+    def record(self, route: str, stats: QueryStats, n_plus_one: bool) -> None:
+        """Add the stats of one finished request."""
+        totals = self.routes.get(route)
+        if totals is None:
+            totals = self.routes[route] = [0, 0, 0.0, 0]
+        totals[0] += 1
+        totals[1] += stats.count
+        totals[2] += stats.total_time
+        if n_plus_one:
+            totals[3] += 1
+    
+    def clear(self) -> None:
+        """Drop all totals."""
+        self.routes.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the query accounting listeners to an engine (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the queries run in the current context (and threads started from it)."""
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats_var.reset(token)
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[QueryStats]:
+    """Collect every query run on ``engine``, from any thread or context.
+    
+    Meant for tests and scripts, where the app may run in another thread
+    (``TestClient``) and the request context is not visible to the caller.
+    """
+    stats = QueryStats()
+    
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("capture_start_time", []).append(time.perf_counter())
+    
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, time.perf_counter() - conn.info["capture_start_time"].pop())
+    
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more queries than its budget allows."""
+
+
+@contextmanager
+def assert_max_queries(
+    engine: Engine,
+    max_queries: int,
+    n_plus_one_threshold: Optional[int] = None
+) -> Iterator[QueryStats]:
+    """Fail if the block runs more than ``max_queries`` (or repeats a statement too often)."""
+    with capture_queries(engine) as stats:
+        yield stats
+    
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries, got {stats.count}:\n" +
+            "\n".join(f"  {count}x {statement}" for statement, count in stats.statements.most_common())
+        )
+    if n_plus_one_threshold:
+        repeated = stats.repeated_statements(n_plus_one_threshold)
+        if repeated:
+            raise QueryBudgetExceeded(
+                "Possible N+1 queries:\n" +
+                "\n".join(f"  {count}x {statement}" for statement, count in repeated)
+            )
+
+
+class QueryStatsMiddleware:
+    """Track the queries of each request, flag N+1 patterns and report totals.
+    
+    Every request's count and DB time go to ``query_metrics`` by route
+    template. With ``expose_headers`` (debug) they are also returned as
+    ``X-DB-Queries`` / ``X-DB-Time``, plus ``X-DB-N-Plus-One`` when a statement
+    repeated at least ``n_plus_one_threshold`` times.
+    """
+    
+    def __init__(self, app, expose_headers: bool = False, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats(scope)
+        token = query_stats_var.set(stats)
+        repeated: List[Tuple[str, int]] = []
+        
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                repeated.extend(stats.repeated_statements(self.n_plus_one_threshold))
+                if self.expose_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode("ascii")))
+                    headers.append((b"x-db-time", f"{stats.total_time:.6f}".encode("ascii")))
+                    if repeated:
+                        headers.append((b"x-db-n-plus-one", str(repeated[0][1]).encode("ascii")))
+                    message["headers"] = headers
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats_var.reset(token)
+            route_path = route_template(scope)
+            if repeated:
+                statement, count = repeated[0]
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %d times: %s",
+                    scope["method"], route_path, count, " ".join(statement.split())[:300]
+                )
+            query_metrics.record(route_path, stats, bool(repeated))
@@ -0,0 +1,196 @@
+"""
+Slow-query log and per-statement totals.
+
+Cursor events time every statement. Statements are grouped by fingerprint
+(the SQL with literals and placeholder lists collapsed), and totals per
+fingerprint are kept so the top statements by total time can be listed.
+Statements slower than the threshold are logged with their fingerprint,
+parameter shape, route and request id; a sample of them can also capture
+``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL.
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.middleware import request_id_var, route_template
+from app.db.query_stats import query_stats_var
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")*\s*\)")
+_PLACEHOLDER_RE = re.compile(_PLACEHOLDER)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse literals, placeholders and ``IN`` lists so equivalent statements match."""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _PLACEHOLDER_LIST_RE.sub("(?)", normalized)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def parameters_shape(parameters: Any, executemany: bool = False, max_items: int = 10) -> str:
+    """Describe parameters by type only, never by value."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return f"{len(parameters)} x {parameters_shape(first, max_items=max_items)}"
+    if isinstance(parameters, dict):
+        items = [f"{key}: {type(value).__name__}" for key, value in list(parameters.items())[:max_items]]
+        more = len(parameters) - max_items
+        return "{" + ", ".join(items) + (f", +{more}" if more > 0 else "") + "}"
+    if isinstance(parameters, (list, tuple)):
+        items = [type(value).__name__ for value in parameters[:max_items]]
+        more = len(parameters) - max_items
+        return "(" + ", ".join(items) + (f", +{more}" if more > 0 else "") + ")"
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """Times statements, keeps totals per fingerprint and logs the slow ones."""
+    
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain_sample_rate: float = 0.0,
+        explain_cooldown: float = 300.0,
+        max_fingerprints: int = 1000
+    ):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_cooldown = explain_cooldown
+        self.max_fingerprints = max_fingerprints
+        # statement text -> (fingerprint, normalized); statements repeat, normalizing is not free
+        self._fingerprints: Dict[str, tuple] = {}
+        # fingerprint -> totals
+        self.statements: Dict[str, Dict[str, Any]] = {}
+    
+    def fingerprint(self, statement: str) -> tuple:
+        """Get the (fingerprint, normalized statement) of a statement."""
+        cached = self._fingerprints.get(statement)
+        if cached is None:
+            if len(self._fingerprints) >= self.max_fingerprints * 4:
+                self._fingerprints.clear()
+            normalized = normalize_statement(statement)
+            fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+            cached = self._fingerprints[statement] = (fingerprint, normalized)
+        return cached
+    
+    def observe(self, conn, cursor, statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+        """Account one executed statement, logging it if slow."""
+        fingerprint, normalized = self.fingerprint(statement)
+        totals = self.statements.get(fingerprint)
+        if totals is None:
+            if len(self.statements) >= self.max_fingerprints:
+                self._evict()
+            totals = self.statements[fingerprint] = {
+                "fingerprint": fingerprint,
+                "statement": normalized,
+                "calls": 0,
+                "total_time": 0.0,
+                "max_time": 0.0,
+                "slow_calls": 0,
+                "last_explain": None,
+                "last_explain_at": 0.0,
+            }
+        totals["calls"] += 1
+        totals["total_time"] += duration
+        if duration > totals["max_time"]:
+            totals["max_time"] = duration
+        
+        if duration < self.threshold:
+            return
+        totals["slow_calls"] += 1
+        
+        stats = query_stats_var.get()
+        route = route_template(stats.scope) if stats is not None and stats.scope is not None else "-"
+        logger.warning(
+            "Slow query %.1f ms [%s] route=%s request_id=%s params=%s: %s",
+            duration * 1000, fingerprint, route, request_id_var.get(),
+            parameters_shape(parameters, executemany), normalized[:500]
+        )
+        
+        if self._should_explain(conn, statement, executemany, totals):
+            plan = self._explain(conn, statement, parameters)
+            if plan is not None:
+                totals["last_explain"] = plan
+                logger.warning("EXPLAIN for slow query [%s]:\n%s", fingerprint, plan)
+    
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """Statement fingerprints with the highest total time."""
+        return sorted(self.statements.values(), key=lambda totals: totals["total_time"], reverse=True)[:n]
+    
+    def clear(self) -> None:
+        """Drop all totals."""
+        self.statements.clear()
+    
+    def _evict(self) -> None:
+        # Drop the cheapest tenth so one-off statements cannot push out the hot ones
+        keep = sorted(self.statements.items(), key=lambda item: item[1]["total_time"], reverse=True)
+        self.statements = dict(keep[:self.max_fingerprints - max(1, self.max_fingerprints // 10)])
+    
+    def _should_explain(self, conn, statement: str, executemany: bool, totals: Dict[str, Any]) -> bool:
+        if not self.explain_sample_rate or executemany:
+            return False
+        if conn.dialect.name != "postgresql" or not statement.lstrip()[:6].upper() == "SELECT":
+            return False
+        now = time.monotonic()
+        if totals["last_explain_at"] and now - totals["last_explain_at"] < self.explain_cooldown:
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        totals["last_explain_at"] = now
+        return True
+    
+    def _explain(self, conn, statement: str, parameters: Any) -> Optional[str]:
+        # A raw DBAPI cursor on the same connection: sees the same transaction
+        # state and does not re-enter the engine events. The savepoint keeps a
+        # failed EXPLAIN from aborting the request's transaction, and rolls
+        # back whatever running the statement again changed.
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute("SAVEPOINT slow_query_explain")
+                try:
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                    return "\n".join(row[0] for row in cursor.fetchall())
+                finally:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.warning("Could not capture EXPLAIN: %s", e)
+            return None
+
+
+slow_query_log: Optional[SlowQueryLog] = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["slow_query_start_time"].pop()
+    if slow_query_log is not None:
+        slow_query_log.observe(conn, cursor, statement, parameters, executemany, duration)
+
+
+def instrument_slow_queries(engine: Engine, log: SlowQueryLog) -> None:
+    """Attach the slow-query listeners to an engine and make ``log`` the active log."""
+    global slow_query_log
+    slow_query_log = log
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -4,16 +4,36 @@ Main FastAPI application.
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
 import time
 import logging
 
 from app.core.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.compression import CompressionMiddleware
+from app.core import metrics
+from app.core.middleware import EdgeMiddleware
+from app.core.profiler import ProfilerMiddleware, profile_store
+from app.core.rate_limit import RateLimitMiddleware
 from app.api.v1.api import api_router
-from app.db.database import create_tables
+from app.db.database import create_tables, SessionLocal, engine
+from app.db.query_stats import QueryStatsMiddleware, query_metrics
+from app.services.fragment_cache import post_fragment_cache
+from app.services.profile_service import profile_cache
+from app.services.upload_service import UploadService
+from app.services.follow_graph import follow_graph, refresh_follow_graph
+from app.services.recommendations import recommender, refresh_recommendations
+from app.services.like_counter import like_counter, flush_like_counters
+from app.services.account_deletion import purge_deleted_accounts
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (JSON records written by a background thread)
+setup_logging(
+    level=settings.LOG_LEVEL,
+    log_format=settings.LOG_FORMAT,
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE
+)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -26,29 +46,46 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
 )
 
+# Per-request query counts (innermost, so only endpoint work is counted)
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        expose_headers=settings.DEBUG if settings.QUERY_STATS_HEADERS is None else settings.QUERY_STATS_HEADERS,
+        n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD,
+    )
+
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 # Parse CORS origins from string to list
 cors_origins = settings.CORS_ORIGINS
 if isinstance(cors_origins, str):
     cors_origins = [origin.strip() for origin in cors_origins.split(",")]
 
+CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"]
+CORS_ALLOW_HEADERS = [
+    "Accept",
+    "Accept-Language",
+    "Content-Language",
+    "Content-Type",
+    "Authorization",
+    "X-Requested-With",
+    "X-Request-ID",
+    "X-Profile",
+    "Origin",
+    "Access-Control-Request-Method",
+    "Access-Control-Request-Headers",
+]
+
 # Add CORS middleware with explicit configuration
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=[
-        "Accept",
-        "Accept-Language",
-        "Content-Language",
-        "Content-Type",
-        "Authorization",
-        "X-Requested-With",
-        "Origin",
-        "Access-Control-Request-Method",
-        "Access-Control-Request-Headers",
-    ],
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
     expose_headers=["*"],
 )
 
@@ -60,15 +97,41 @@ if not settings.DEBUG:
     )
 
 
-# Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add process time header to responses."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Compress JSON responses (inside the edge middleware so timing includes it)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# On-demand profiling (X-Profile in debug, or a sampled fraction of requests)
+if settings.PROFILE_ENABLED:
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        mode=settings.PROFILE_MODE,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        header_enabled=settings.DEBUG if settings.PROFILE_HEADER_ENABLED is None else settings.PROFILE_HEADER_ENABLED,
+        interval=settings.PROFILE_INTERVAL_MS / 1000,
+    )
+
+# Latency histograms and in-flight requests (just inside the edge, so rejected requests count too)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.registry.register_collector(metrics.pool_collector(engine))
+    metrics.registry.register_collector(metrics.cache_collector("post_fragment", post_fragment_cache))
+    metrics.registry.register_collector(metrics.cache_collector("user_profile", profile_cache))
+    if settings.QUERY_STATS_ENABLED:
+        metrics.registry.register_collector(metrics.query_collector(query_metrics))
+    metrics.registry.register_collector(metrics.log_collector())
+    if settings.FOLLOW_GRAPH_ENABLED:
+        metrics.registry.register_collector(metrics.follow_graph_collector(follow_graph))
+
+# Request id, timing and CORS preflight (outermost, so it wraps everything above)
+app.add_middleware(
+    EdgeMiddleware,
+    allow_origins=cors_origins,
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
+    access_log=settings.LOG_ACCESS,
+)
 
 
 # Include API router
@@ -82,12 +145,56 @@ async def startup_event():
     # Create database tables
     create_tables()
     logger.info("Database tables created successfully")
+    # Drop resumable uploads abandoned while the app was down
+    db = SessionLocal()
+    try:
+        expired = UploadService(db).expire_stale_sessions()
+        if expired:
+            logger.info("Expired %d stale upload sessions", expired)
+    finally:
+        db.close()
+    # Build the follow-graph index in the background and keep it current
+    if settings.FOLLOW_GRAPH_ENABLED:
+        app.state.follow_graph_task = asyncio.create_task(refresh_follow_graph(
+            SessionLocal, settings.FOLLOW_GRAPH_SYNC_SECONDS, settings.FOLLOW_GRAPH_REBUILD_SECONDS
+        ))
+    # Batch "who to follow" suggestions (without numpy/scipy they are computed per request)
+    if settings.RECOMMENDATIONS_ENABLED and recommender.available():
+        app.state.recommendations_task = asyncio.create_task(refresh_recommendations(
+            SessionLocal, settings.RECOMMENDATIONS_REBUILD_SECONDS
+        ))
+    # Write-behind like counts: flush buffered deltas, reconcile from likes now and then
+    if like_counter.buffered:
+        app.state.like_counter_task = asyncio.create_task(flush_like_counters(
+            SessionLocal, settings.LIKE_COUNTER_FLUSH_MS / 1000, settings.LIKE_COUNTER_RECONCILE_SECONDS
+        ))
+    # Purge the data of deleted accounts in throttled batches, resuming unfinished ones
+    if settings.ACCOUNT_DELETION_WORKER_ENABLED:
+        app.state.account_deletion_task = asyncio.create_task(purge_deleted_accounts(
+            SessionLocal,
+            settings.ACCOUNT_DELETION_POLL_SECONDS,
+            settings.ACCOUNT_DELETION_BATCH_SIZE,
+            settings.ACCOUNT_DELETION_BATCH_PAUSE_MS / 1000,
+            settings.ACCOUNT_DELETION_LEASE_SECONDS,
+            settings.ACCOUNT_DELETION_RETRY_SECONDS
+        ))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Shutting down SocioConnect API...")
+    tasks = []
+    for task_name in (
+        "follow_graph_task", "recommendations_task", "like_counter_task", "account_deletion_task"
+    ):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+            tasks.append(task)
+    # Let the like counter write what it still buffers
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_logging()
 
 
 @app.get("/")
@@ -110,13 +217,20 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus metrics (internal)."""
+    if not settings.METRICS_ENABLED or not metrics.is_metrics_client_allowed(
+        request.client.host if request.client else None,
+        request.headers.get("authorization")
+    ):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return PlainTextResponse(metrics.render_metrics(metrics.collect_snapshots()), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/cors-debug")
 async def cors_debug():
     """Debug CORS configuration."""
-    cors_origins = settings.CORS_ORIGINS
-    if isinstance(cors_origins, str):
-        cors_origins = [origin.strip() for origin in cors_origins.split(",")]
-    
     return {
         "cors_origins_raw": settings.CORS_ORIGINS,
         "cors_origins_parsed": cors_origins,
@@ -126,34 +240,15 @@ async def cors_debug():
     }
 
 
-@app.options("/{path:path}")
-async def options_handler(path: str, request: Request):
-    """Handle CORS preflight requests explicitly."""
-    origin = request.headers.get("origin")
-    
-    # Check if origin is allowed
-    cors_origins = settings.CORS_ORIGINS
-    if isinstance(cors_origins, str):
-        cors_origins = [origin.strip() for origin in cors_origins.split(",")]
-    
-    if origin in cors_origins:
-        from fastapi.responses import Response
-        response = Response()
-        response.headers["Access-Control-Allow-Origin"] = origin
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
-        response.headers["Access-Control-Allow-Headers"] = "Accept, Accept-Language, Content-Language, Content-Type, Authorization, X-Requested-With, Origin, Access-Control-Request-Method, Access-Control-Request-Headers"
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Max-Age"] = "86400"
-        return response
-    
-    return Response(status_code=400)
-
-
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
-    logger.error(f"Global exception: {exc}", exc_info=True)
+    # The traceback is formatted by the log writer thread, not here
+    logger.error(
+        "Unhandled exception on %s %s", request.method, request.url.path,
+        exc_info=exc, extra={"request_id": request.scope.get("state", {}).get("request_id", "-")}
+    )
     return JSONResponse(
         status_code=500,
         content={
@@ -2,3 +2,6 @@
 from .user import User
 from .post import Post
 from .interaction import Like, Comment, Repost, Follow
+from .upload import UploadSession
+from .account_deletion import AccountDeletion
+from .site_counter import SiteCounter
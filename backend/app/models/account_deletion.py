@@ -0,0 +1,34 @@
+"""
+Account deletion model for tracking the background purge of a user's data.
+"""
+from sqlalchemy import Column, Integer, String, Text, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class AccountDeletionStatus:
+    """Account deletion states."""
+    PENDING = "pending"
+    COMPLETE = "complete"
+
+
+class AccountDeletion(Base):
+    """A requested account deletion and how far its purge has got."""
+    
+    __tablename__ = "account_deletions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)  # No foreign key: the record outlives the user
+    status = Column(String(20), nullable=False, default=AccountDeletionStatus.PENDING, index=True)
+    stage = Column(String(20), nullable=False)  # Purge stage being worked on (see DeletionService)
+    deleted_rows = Column(BigInteger, nullable=False, default=0)
+    batches = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Lease of the worker purging it
+    requested_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<AccountDeletion(id={self.id}, user_id={self.user_id}, status={self.status}, stage={self.stage})>"
@@ -1,9 +1,9 @@
 """
 Interaction models for likes, comments, reposts, and follows.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from app.db.database import Base
 
 
@@ -13,8 +13,8 @@ class Like(Base):
     __tablename__ = "likes"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -35,17 +35,17 @@ class Comment(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String(500), nullable=False)
-    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
-    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)  # For nested comments
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    parent_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)  # For nested comments
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     author = relationship("User", back_populates="comments")
     post = relationship("Post", back_populates="comments")
-    replies = relationship("Comment", backref="parent", remote_side=[id])
-    notifications = relationship("Notification", back_populates="comment", cascade="all, delete-orphan")
+    replies = relationship("Comment", backref=backref("parent", passive_deletes=True), remote_side=[id])
+    notifications = relationship("Notification", back_populates="comment", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Comment(id={self.id}, author_id={self.author_id}, post_id={self.post_id})>"
@@ -57,8 +57,8 @@ class Repost(Base):
     __tablename__ = "reposts"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -78,16 +78,21 @@ class Follow(Base):
     __tablename__ = "follows"
     
     id = Column(Integer, primary_key=True, index=True)
-    follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    following_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    following_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     follower = relationship("User", foreign_keys=[follower_id])
     following = relationship("User", foreign_keys=[following_id])
     
-    # Ensure one follow relationship per pair
-    __table_args__ = (UniqueConstraint('follower_id', 'following_id', name='unique_follow_relationship'),)
+    __table_args__ = (
+        # Ensure one follow relationship per pair
+        UniqueConstraint('follower_id', 'following_id', name='unique_follow_relationship'),
+        # Keyset pagination of followers / following, newest first
+        Index('ix_follows_following_created', 'following_id', 'created_at', 'id'),
+        Index('ix_follows_follower_created', 'follower_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f"<Follow(follower_id={self.follower_id}, following_id={self.following_id})>"
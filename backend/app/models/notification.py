@@ -24,8 +24,8 @@ class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Who receives the notification
-    actor_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Who performed the action
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # Who receives the notification
+    actor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)  # Who performed the action
     type = Column(Enum(NotificationType), nullable=False)
     title = Column(String(255), nullable=False)
     message = Column(Text, nullable=False)
@@ -33,8 +33,8 @@ class Notification(Base):
     is_archived = Column(Boolean, default=False)
     
     # Optional references to related entities
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=True)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=True)
+    comment_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
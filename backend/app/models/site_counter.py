@@ -0,0 +1,20 @@
+"""
+Site-wide maintained counters.
+"""
+from sqlalchemy import DDL, Column, String, BigInteger, event
+from app.db.database import Base
+
+
+class SiteCounter(Base):
+    """A named counter over the whole site, kept current by ``CounterService``."""
+    
+    __tablename__ = "site_counters"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+# create_all() makes the table for an empty database; the migration backfills existing ones
+event.listen(
+    SiteCounter.__table__, "after_create", DDL("INSERT INTO site_counters (name, value) VALUES ('posts', 0)")
+)
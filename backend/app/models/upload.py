@@ -0,0 +1,42 @@
+"""
+Upload session model for resumable chunked uploads.
+"""
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+
+class UploadSessionStatus:
+    """Upload session states."""
+    PENDING = "pending"
+    COMPLETE = "complete"
+
+
+class UploadSession(Base):
+    """Resumable upload session model."""
+    
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(36), primary_key=True)  # UUID, also used for the partial file name
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)  # Final unique filename in the media dir
+    content_type = Column(String(100), nullable=False)
+    media_type = Column(String(50), nullable=False)  # image or video
+    total_size = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default=UploadSessionStatus.PENDING)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User")
+    
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, user_id={self.user_id}, received={self.received_bytes}/{self.total_size})>"
+    
+    @property
+    def is_complete(self) -> bool:
+        """Check if all bytes have been received."""
+        return self.received_bytes >= self.total_size
@@ -25,44 +25,40 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     is_private = Column(Boolean, default=False)
+    # Maintained by CounterService in the same transaction as the follow/post change
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    posts_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
-    likes = relationship("Like", back_populates="user", cascade="all, delete-orphan")
-    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
-    reposts = relationship("Repost", back_populates="user", cascade="all, delete-orphan")
+    posts = relationship("Post", back_populates="author", cascade="all, delete-orphan", passive_deletes=True)
+    likes = relationship("Like", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan", passive_deletes=True)
+    reposts = relationship("Repost", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
     
     # Follow relationships
     following = relationship(
         "Follow", 
         foreign_keys="[Follow.follower_id]",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     followers = relationship(
         "Follow", 
         foreign_keys="[Follow.following_id]",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     # Notifications
-    notifications = relationship("Notification", foreign_keys="[Notification.user_id]", cascade="all, delete-orphan")
+    notifications = relationship(
+        "Notification",
+        foreign_keys="[Notification.user_id]",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>"
-    
-    @property
-    def followers_count(self) -> int:
-        """Get followers count."""
-        return len(self.followers)
-    
-    @property
-    def following_count(self) -> int:
-        """Get following count."""
-        return len(self.following)
-    
-    @property
-    def posts_count(self) -> int:
-        """Get posts count."""
-        return len(self.posts)
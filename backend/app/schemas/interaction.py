@@ -4,7 +4,7 @@ Interaction Pydantic schemas for likes, comments, reposts, and follows.
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, validator
-from app.schemas.user import UserResponse
+from app.schemas.user import AuthorCard, UserPublic
 from app.schemas.post import PostResponse
 
 
@@ -41,7 +41,7 @@ class CommentResponse(CommentBase):
 
 class CommentWithAuthor(CommentResponse):
     """Schema for comment with author information."""
-    author: UserResponse
+    author: AuthorCard
     replies: List["CommentWithAuthor"] = []
 
 
@@ -85,8 +85,25 @@ class FollowResponse(BaseModel):
 
 class FollowWithUser(FollowResponse):
     """Schema for follow with user information."""
-    follower: UserResponse
-    following: UserResponse
+    follower: UserPublic
+    following: UserPublic
+
+
+class FollowListUser(BaseModel):
+    """Schema for one user in a followers/following list."""
+    id: int
+    username: str
+    full_name: str
+    avatar_url: Optional[str] = None
+    is_verified: bool
+    followed_at: datetime
+    is_following: bool  # Whether the current user follows this user
+
+
+class FollowList(BaseModel):
+    """Schema for a page of followers/following."""
+    users: List[FollowListUser]
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` for the next page; None on the last page
 
 
 class UserFollowStats(BaseModel):
@@ -103,3 +120,51 @@ class InteractionStats(BaseModel):
     total_comments: int
     total_reposts: int
     total_follows: int
+
+
+INTERACTION_ACTIONS = ("like", "unlike", "repost", "unrepost")
+MAX_BATCH_OPERATIONS = 100
+
+
+class InteractionOperation(BaseModel):
+    """One operation of an interaction batch."""
+    action: str  # like, unlike, repost or unrepost
+    post_id: int
+    
+    @validator('action')
+    def validate_action(cls, v):
+        if v not in INTERACTION_ACTIONS:
+            raise ValueError(f'Action must be one of: {", ".join(INTERACTION_ACTIONS)}')
+        return v
+
+
+class InteractionBatch(BaseModel):
+    """Schema for a batch of like/repost operations, applied in order."""
+    operations: List[InteractionOperation]
+    
+    @validator('operations')
+    def validate_operations(cls, v):
+        if not v:
+            raise ValueError('At least one operation is required')
+        if len(v) > MAX_BATCH_OPERATIONS:
+            raise ValueError(f'At most {MAX_BATCH_OPERATIONS} operations per batch')
+        return v
+
+
+class InteractionResult(BaseModel):
+    """Outcome of one batch operation."""
+    action: str
+    post_id: int
+    found: bool  # False if the post of a like/repost does not exist (skipped)
+    changed: bool  # False if the like/repost was already in the requested state
+
+
+class InteractionBatchResponse(BaseModel):
+    """Schema for interaction batch response."""
+    results: List[InteractionResult]
+
+
+class InteractionState(BaseModel):
+    """Which of the requested posts the current user has liked or reposted."""
+    liked: List[int]
+    reposted: List[int]
@@ -4,7 +4,7 @@ Post Pydantic schemas for request/response validation.
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, validator, model_validator
-from app.schemas.user import UserResponse
+from app.schemas.user import AuthorCard
 
 
 class PostBase(BaseModel):
@@ -93,9 +93,10 @@ class PostResponse(BaseModel):
 
 class PostWithAuthor(PostResponse):
     """Schema for post with author information."""
-    author: UserResponse
+    author: AuthorCard
     is_liked: Optional[bool] = None
     is_reposted: Optional[bool] = None
+    original_post: Optional[dict] = None  # Reposted post with its author, for reposts
 
 
 class PostWithReplies(PostWithAuthor):
@@ -0,0 +1,216 @@
+"""
+Fast serializers building response payloads from trusted database rows.
+
+Rows read back from the database were validated when they were written, so
+feed responses skip Pydantic re-validation and are encoded with orjson. The
+output matches the ``PostWithAuthor`` / ``PostFeed`` / ``UserResponse`` /
+``AuthorCard`` / ``CommentWithAuthor`` / ``NotificationWithActor`` shapes, which remain the documented response models.
+
+Post serializers take the projection rows from ``app.db.queries``. Posts are
+encoded as a cached static fragment (content, media, author card) spliced
+with a small per-request dynamic part (counters, viewer flags).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy.engine import Row
+
+from app.models.user import User
+from app.services.fragment_cache import post_fragment_cache
+from app.services.like_counter import like_counter
+
+
+def serialize_user(user: User) -> Dict[str, Any]:
+    """Serialize a user entity as ``UserResponse``."""
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'full_name': user.full_name,
+        'bio': user.bio,
+        'location': user.location,
+        'website': user.website,
+        'is_private': user.is_private,
+        'avatar_url': user.avatar_url,
+        'cover_url': user.cover_url,
+        'is_active': user.is_active,
+        'is_verified': user.is_verified,
+        'followers_count': user.followers_count,
+        'following_count': user.following_count,
+        'posts_count': user.posts_count,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at
+    }
+
+
+def serialize_author(row: Row) -> Dict[str, Any]:
+    """Serialize the ``author_*`` columns of a post row as ``AuthorCard``."""
+    return {
+        'id': row.author_id,
+        'username': row.author_username,
+        'full_name': row.author_full_name,
+        'bio': row.author_bio,
+        'location': row.author_location,
+        'website': row.author_website,
+        'is_private': row.author_is_private,
+        'avatar_url': row.author_avatar_url,
+        'cover_url': row.author_cover_url,
+        'is_active': row.author_is_active,
+        'is_verified': row.author_is_verified,
+        'created_at': row.author_created_at,
+        'updated_at': row.author_updated_at
+    }
+
+
+def serialize_original_post(row: Row) -> Dict[str, Any]:
+    """Serialize the reposted post embedded in a repost."""
+    return {
+        'id': row.id,
+        'content': row.content,
+        'media_url': row.media_url,
+        'media_type': row.media_type,
+        'author_id': row.author_id,
+        'created_at': row.created_at,
+        'author': serialize_author(row)
+    }
+
+
+def post_static_fields(row: Row, original_row: Optional[Row] = None) -> Dict[str, Any]:
+    """Fields of ``PostWithAuthor`` that only change with the post or its authors."""
+    return {
+        'id': row.id,
+        'content': row.content,
+        'media_url': row.media_url,
+        'media_type': row.media_type,
+        'author_id': row.author_id,
+        'parent_id': row.parent_id,
+        'is_reply': row.is_reply,
+        'is_repost': row.is_repost,
+        'original_post_id': row.original_post_id,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+        'author': serialize_author(row),
+        'original_post': serialize_original_post(original_row) if original_row else None
+    }
+
+
+def post_dynamic_fields(
+    row: Row,
+    is_liked: Optional[bool] = None,
+    is_reposted: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Fields of ``PostWithAuthor`` that change with engagement or the viewer."""
+    # Likes not yet flushed by a write-behind like counter
+    likes_count = row.likes_count + like_counter.pending(row.id)
+    return {
+        'likes_count': likes_count,
+        'comments_count': row.comments_count,
+        'reposts_count': row.reposts_count,
+        'total_engagement': likes_count + row.comments_count + row.reposts_count,
+        'is_liked': is_liked,
+        'is_reposted': is_reposted
+    }
+
+
+def serialize_post(
+    row: Row,
+    is_liked: Optional[bool] = None,
+    is_reposted: Optional[bool] = None,
+    original_row: Optional[Row] = None
+) -> Dict[str, Any]:
+    """Serialize a post row as ``PostWithAuthor``."""
+    post_dict = post_static_fields(row, original_row)
+    post_dict.update(post_dynamic_fields(row, is_liked, is_reposted))
+    return post_dict
+
+
+def post_fragment_version(row: Row, original_row: Optional[Row] = None) -> Tuple:
+    """Version of everything a post's static fragment embeds."""
+    version = (row.updated_at, row.author_updated_at)
+    if original_row is not None:
+        version += (original_row.id, original_row.updated_at, original_row.author_updated_at)
+    return version
+
+
+def encode_post(
+    row: Row,
+    is_liked: Optional[bool] = None,
+    is_reposted: Optional[bool] = None,
+    original_row: Optional[Row] = None
+) -> bytes:
+    """Encode a post row as ``PostWithAuthor`` JSON, reusing its cached static fragment."""
+    version = post_fragment_version(row, original_row)
+    static = post_fragment_cache.get(row.id, version)
+    if static is None:
+        # Strip the braces so fragments can be spliced into one object
+        static = orjson.dumps(post_static_fields(row, original_row))[1:-1]
+        author_ids = (row.author_id, original_row.author_id) if original_row else (row.author_id,)
+        post_fragment_cache.set(row.id, author_ids, version, static)
+    
+    dynamic = orjson.dumps(post_dynamic_fields(row, is_liked, is_reposted))[1:-1]
+    return b"{" + static + b"," + dynamic + b"}"
+
+
+def serialize_feed(posts: List[Dict[str, Any]], total: int, page: int, size: int) -> Dict[str, Any]:
+    """Wrap serialized posts as a ``PostFeed`` page."""
+    offset = (page - 1) * size
+    return {
+        'posts': posts,
+        'total': total,
+        'page': page,
+        'size': size,
+        'has_next': (offset + size) < total,
+        'has_prev': page > 1
+    }
+
+
+def encode_feed(post_fragments: List[bytes], total: int, page: int, size: int) -> bytes:
+    """Encode a ``PostFeed`` page around already encoded posts."""
+    page_fields = serialize_feed([], total, page, size)
+    del page_fields['posts']
+    return b'{"posts":[' + b",".join(post_fragments) + b"]," + orjson.dumps(page_fields)[1:]
+
+
+def serialize_comment(row: Row, author_row: Row) -> Dict[str, Any]:
+    """Serialize a comment row and its author row as ``CommentWithAuthor``."""
+    return {
+        'id': row.id,
+        'content': row.content,
+        'parent_id': row.parent_id,
+        'author_id': row.author_id,
+        'post_id': row.post_id,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+        'author': serialize_author(author_row),
+        'replies': []
+    }
+
+
+def serialize_user_card(row: Row) -> Dict[str, Any]:
+    """Serialize a user card row (id, names, avatar, verified)."""
+    return {
+        'id': row.id,
+        'username': row.username,
+        'full_name': row.full_name,
+        'avatar_url': row.avatar_url,
+        'is_verified': row.is_verified
+    }
+
+
+def serialize_notification(row: Row, actor_row: Optional[Row] = None) -> Dict[str, Any]:
+    """Serialize a notification row and its actor card as ``NotificationWithActor``."""
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'actor_id': row.actor_id,
+        'type': row.type,
+        'title': row.title,
+        'message': row.message,
+        'is_read': row.is_read,
+        'is_archived': row.is_archived,
+        'post_id': row.post_id,
+        'comment_id': row.comment_id,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+        'actor': serialize_user_card(actor_row) if actor_row else None
+    }
@@ -0,0 +1,36 @@
+"""
+Upload Pydantic schemas for resumable uploads.
+"""
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str
+    content_type: str
+    total_size: int
+    
+    @validator('total_size')
+    def validate_total_size(cls, v):
+        if v <= 0:
+            raise ValueError('Upload size must be greater than zero')
+        return v
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for resumable upload state."""
+    id: str
+    filename: str
+    content_type: str
+    media_type: str
+    total_size: int
+    received_bytes: int
+    status: str
+    expires_at: datetime
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
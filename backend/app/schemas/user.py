@@ -78,12 +78,50 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
-class UserProfile(UserResponse):
-    """Schema for user profile with additional info."""
+class AuthorCard(BaseModel):
+    """Schema for the author card of posts and comments (no email, no counters)."""
+    id: int
+    username: str
+    full_name: str
+    bio: Optional[str] = None
+    location: Optional[str] = None
+    website: Optional[str] = None
+    is_private: bool = False
+    avatar_url: Optional[str] = None
+    cover_url: Optional[str] = None
+    is_active: bool
+    is_verified: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class UserPublic(AuthorCard):
+    """Schema for a user as other users see them (no email): search results, follow lists."""
+    followers_count: int
+    following_count: int
+    posts_count: int
+
+
+class UserProfile(UserPublic):
+    """Schema for a public user profile with the viewer's follow flags."""
     is_following: Optional[bool] = None  # Whether current user follows this user
     is_followed_by: Optional[bool] = None  # Whether this user follows current user
 
 
+class UserSuggestion(BaseModel):
+    """Schema for a "who to follow" suggestion."""
+    id: int
+    username: str
+    full_name: str
+    avatar_url: Optional[str] = None
+    is_verified: bool
+    mutual_count: int  # How many of the viewer's followings follow this user
+    score: float
+
+
 class UserLogin(BaseModel):
     """Schema for user login."""
     email: EmailStr
@@ -102,6 +140,23 @@ class UserPasswordChange(BaseModel):
         return v
 
 
+class AccountDeletionRequest(BaseModel):
+    """Schema for deleting the current user's account."""
+    password: str
+
+
+class AccountDeletionResponse(BaseModel):
+    """Schema for account deletion progress."""
+    status: str
+    stage: str
+    deleted_rows: int
+    requested_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     """Schema for token response."""
     access_token: str
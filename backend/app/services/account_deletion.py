@@ -0,0 +1,165 @@
+"""
+Account deletion: deactivate at once, purge the data in the background.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.account_deletion import AccountDeletion, AccountDeletionStatus
+from app.services.counter_service import CounterService
+from app.services.deletion_service import DeletionService, PURGE_STAGES
+from app.services.fragment_cache import post_fragment_cache
+from app.services.profile_service import profile_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AccountDeletionService:
+    """Delete accounts without one huge cascading transaction.
+    
+    ``request`` deactivates the user, so ``get_current_user``, login and
+    token refresh reject them from then on, and records an
+    ``AccountDeletion``. A background job then purges the data through
+    ``DeletionService`` one bounded batch at a time, pausing in between.
+    Each batch commits together with the job's progress, so after a crash
+    or restart the purge resumes at the stage it reached. A lease keeps two
+    workers from purging the same account.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def request(self, user: User) -> AccountDeletion:
+        """Deactivate ``user`` and queue the purge of their data (idempotent)."""
+        deletion = self.db.query(AccountDeletion).filter(
+            AccountDeletion.user_id == user.id,
+            AccountDeletion.status == AccountDeletionStatus.PENDING
+        ).first()
+        if deletion is None:
+            deletion = AccountDeletion(user_id=user.id, stage=PURGE_STAGES[0])
+            self.db.add(deletion)
+        
+        if user.is_active:
+            user.is_active = False
+            self.db.flush()
+            CounterService(self.db).user_deactivated(user.id)
+        self.db.commit()
+        self.db.refresh(deletion)
+        
+        profile_cache.invalidate(user.id)
+        post_fragment_cache.invalidate_author(user.id)
+        logger.info("Account deletion requested for user %d", user.id)
+        return deletion
+    
+    def claim(self, lease_seconds: float, user_id: Optional[int] = None) -> Optional[AccountDeletion]:
+        """Lease the oldest pending deletion (of ``user_id``, if given) no other worker holds, or return None."""
+        now = datetime.now(timezone.utc)
+        available = [
+            AccountDeletion.status == AccountDeletionStatus.PENDING,
+            or_(AccountDeletion.locked_until.is_(None), AccountDeletion.locked_until <= now),
+        ]
+        if user_id is not None:
+            available.append(AccountDeletion.user_id == user_id)
+        deletion_id = self.db.query(AccountDeletion.id).filter(*available).order_by(AccountDeletion.id).limit(1).scalar()
+        if deletion_id is None:
+            return None
+        
+        # Conditional on the lease still being free, in case another worker got there first
+        claimed = self.db.execute(
+            update(AccountDeletion).where(AccountDeletion.id == deletion_id, *available).values(
+                locked_until=now + timedelta(seconds=lease_seconds)
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        return self.db.get(AccountDeletion, deletion_id) if claimed else None
+    
+    def run_batch(self, deletion: AccountDeletion, batch_size: int, lease_seconds: float) -> bool:
+        """Purge the next batch of a claimed deletion; returns True once the account is gone."""
+        def record_progress(count: int) -> None:
+            now = datetime.now(timezone.utc)
+            deletion.deleted_rows += count
+            deletion.batches += 1
+            deletion.locked_until = now + timedelta(seconds=lease_seconds)
+            if count < batch_size:
+                stage = PURGE_STAGES.index(deletion.stage) + 1
+                if stage < len(PURGE_STAGES):
+                    deletion.stage = PURGE_STAGES[stage]
+                else:
+                    deletion.status = AccountDeletionStatus.COMPLETE
+                    deletion.completed_at = now
+                    deletion.locked_until = None
+        
+        DeletionService(self.db).purge_batch(deletion.user_id, deletion.stage, batch_size, record_progress)
+        if deletion.status != AccountDeletionStatus.COMPLETE:
+            return False
+        
+        logger.info(
+            "Deleted account of user %d: %d rows in %d batches",
+            deletion.user_id, deletion.deleted_rows, deletion.batches
+        )
+        return True
+    
+    def run(self, deletion: AccountDeletion, batch_size: int, pause_seconds: float, lease_seconds: float) -> None:
+        """Purge a claimed deletion to the end in this thread, pausing between batches."""
+        while not self.run_batch(deletion, batch_size, lease_seconds):
+            time.sleep(pause_seconds)
+    
+    def fail(self, deletion_id: int, error: Exception, retry_seconds: float) -> None:
+        """Record a failed batch and hold the deletion back for ``retry_seconds``."""
+        self.db.rollback()
+        self.db.query(AccountDeletion).filter(AccountDeletion.id == deletion_id).update({
+            AccountDeletion.failures: AccountDeletion.failures + 1,
+            AccountDeletion.last_error: repr(error)[:1000],
+            AccountDeletion.locked_until: datetime.now(timezone.utc) + timedelta(seconds=retry_seconds),
+        }, synchronize_session=False)
+        self.db.commit()
+
+
+async def purge_deleted_accounts(
+    session_factory: Callable[[], Session],
+    poll_interval: float,
+    batch_size: int,
+    pause: float,
+    lease_seconds: float,
+    retry_seconds: float
+) -> None:
+    """Work through pending account deletions, one throttled batch at a time."""
+    def claim() -> Optional[int]:
+        db = session_factory()
+        try:
+            deletion = AccountDeletionService(db).claim(lease_seconds)
+            return deletion.id if deletion is not None else None
+        finally:
+            db.close()
+    
+    def run_batch(deletion_id: int) -> bool:
+        db = session_factory()
+        service = AccountDeletionService(db)
+        try:
+            return service.run_batch(db.get(AccountDeletion, deletion_id), batch_size, lease_seconds)
+        except Exception as e:
+            service.fail(deletion_id, e, retry_seconds)
+            raise
+        finally:
+            db.close()
+    
+    while True:
+        try:
+            deletion_id = await asyncio.to_thread(claim)
+            if deletion_id is None:
+                await asyncio.sleep(poll_interval)
+                continue
+            
+            while not await asyncio.to_thread(run_batch, deletion_id):
+                await asyncio.sleep(pause)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Account deletion batch failed")
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,156 @@
+"""
+Maintained user counters (followers, following, posts), post counters (comments, reposts)
+and the site-wide count of public posts.
+"""
+import logging
+from typing import Dict, List
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Comment, Follow, Repost
+from app.models.site_counter import SiteCounter
+from app.services.profile_service import profile_cache
+
+logger = logging.getLogger(__name__)
+
+# ``site_counters`` row counting the posts of active users (the public feed's total)
+PUBLIC_POSTS = "posts"
+
+
+class CounterService:
+    """Keep the ``users`` counter columns in step with follows and posts, and
+    the posts' comment and repost counts with ``comments`` and ``reposts``.
+    
+    Adjustments are relative ``UPDATE ... SET n = n + delta`` statements in
+    the caller's transaction, so they commit or roll back with the row they
+    account for and concurrent changes are never lost. ``updated_at`` is left
+    alone: counters are not profile edits, and fragment and ETag versions key
+    on it, so the adjusted users' cached profiles are dropped instead.
+    ``recompute`` rebuilds every counter from the source tables. Likes are
+    counted by ``LikeCounter``.
+    
+    The public post count is one ``site_counters`` row, so the public feed
+    total is a primary key lookup. It is adjusted with the author's
+    ``posts_count`` while the author is active, and loses a user's posts
+    when they are deactivated.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def follow_changed(self, follower_id: int, following_id: int, delta: int) -> None:
+        """Account a follow (+1) or unfollow (-1)."""
+        self._adjust(follower_id, User.following_count, delta)
+        self._adjust(following_id, User.followers_count, delta)
+    
+    def posts_changed(self, author_id: int, delta: int) -> None:
+        """Account posts (including reposts) created (+n) or deleted (-n)."""
+        self._adjust(author_id, User.posts_count, delta)
+        self.public_posts_changed(delta, exists().where(User.id == author_id, User.is_active == True))
+    
+    def public_posts_changed(self, delta: int, *criteria) -> None:
+        """Adjust the public post count by ``delta`` (if ``criteria`` hold)."""
+        if delta:
+            self.db.execute(update(SiteCounter).where(SiteCounter.name == PUBLIC_POSTS, *criteria).values(
+                value=SiteCounter.value + delta
+            ).execution_options(synchronize_session=False))
+    
+    def user_deactivated(self, user_id: int) -> None:
+        """Take a user's posts out of the public post count, once their row is marked inactive."""
+        # Read in the statement: the deactivation holds the user row, so posts_count is final
+        self.db.execute(update(SiteCounter).where(SiteCounter.name == PUBLIC_POSTS).values(
+            value=SiteCounter.value - select(User.posts_count).where(User.id == user_id).scalar_subquery()
+        ).execution_options(synchronize_session=False))
+    
+    def public_posts(self) -> int:
+        """Number of posts by active users (including reposts)."""
+        return self.db.query(SiteCounter.value).filter(SiteCounter.name == PUBLIC_POSTS).scalar() or 0
+    
+    def comments_changed(self, post_id: int, delta: int) -> None:
+        """Account comments on a post added (+n) or deleted (-n)."""
+        self._adjust_post(post_id, Post.comments_count, delta)
+    
+    def reposts_changed(self, post_id: int, delta: int) -> None:
+        """Account a repost (+1) or un-repost (-1) of a post."""
+        self._adjust_post(post_id, Post.reposts_count, delta)
+    
+    def recount_comments(self, post_ids: List[int]) -> None:
+        """Recount the comments of ``post_ids``, after deletes that cascaded to replies."""
+        self.db.query(Post).filter(Post.id.in_(post_ids)).update({
+            Post.comments_count: select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery(),
+            Post.updated_at: Post.updated_at,
+        }, synchronize_session=False)
+    
+    def recompute(self, batch_size: int = 1000) -> int:
+        """Recompute every user's and post's counters, and the public post count, committing per batch.
+        
+        Returns the number of users updated.
+        """
+        updated = self._recompute_batches(User, {
+            User.followers_count: select(func.count(Follow.id)).where(
+                Follow.following_id == User.id
+            ).scalar_subquery(),
+            User.following_count: select(func.count(Follow.id)).where(
+                Follow.follower_id == User.id
+            ).scalar_subquery(),
+            User.posts_count: select(func.count(Post.id)).where(Post.author_id == User.id).scalar_subquery(),
+            User.updated_at: User.updated_at,
+        }, batch_size)
+        self._store_public_posts()
+        posts = self._recompute_batches(Post, {
+            Post.comments_count: select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery(),
+            Post.reposts_count: select(func.count(Repost.id)).where(Repost.post_id == Post.id).scalar_subquery(),
+            Post.updated_at: Post.updated_at,
+        }, batch_size)
+        
+        profile_cache.clear()
+        logger.info("Recomputed counters for %d users and %d posts", updated, posts)
+        return updated
+    
+    def _store_public_posts(self) -> int:
+        """Set the public post count from the users' ``posts_count`` and commit; returns it."""
+        value = self.db.query(func.coalesce(func.sum(User.posts_count), 0)).filter(User.is_active == True).scalar()
+        stored = self.db.query(SiteCounter).filter(SiteCounter.name == PUBLIC_POSTS).update(
+            {SiteCounter.value: value}, synchronize_session=False
+        )
+        if not stored:
+            self.db.add(SiteCounter(name=PUBLIC_POSTS, value=value))
+        self.db.commit()
+        return int(value)
+    
+    def _recompute_batches(self, model, values: Dict, batch_size: int) -> int:
+        last_id = 0
+        updated = 0
+        while True:
+            ids = [
+                row_id for (row_id,) in
+                self.db.query(model.id).filter(model.id > last_id).order_by(model.id).limit(batch_size)
+            ]
+            if not ids:
+                break
+            
+            self.db.query(model).filter(model.id.between(ids[0], ids[-1])).update(values, synchronize_session=False)
+            self.db.commit()
+            
+            last_id = ids[-1]
+            updated += len(ids)
+        return updated
+    
+    def _adjust_post(self, post_id: int, column, delta: int) -> None:
+        # Keep updated_at: the post's cached fragment does not embed its counters
+        self.db.query(Post).filter(Post.id == post_id).update(
+            {column: column + delta, Post.updated_at: Post.updated_at},
+            synchronize_session=False
+        )
+    
+    def _adjust(self, user_id: int, column, delta: int) -> None:
+        self.db.query(User).filter(User.id == user_id).update(
+            {column: column + delta, User.updated_at: User.updated_at},
+            synchronize_session=False
+        )
+        # Endpoints commit without awaiting in between, so no request in this
+        # worker can re-cache the old counters before the commit
+        profile_cache.invalidate(user_id)
@@ -0,0 +1,190 @@
+"""
+Post deletion and chunked removal of a user's data.
+"""
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.notification import Notification
+from app.services.counter_service import CounterService
+from app.services.follow_graph import follow_graph
+from app.services.fragment_cache import post_fragment_cache
+from app.services.like_counter import like_counter
+from app.services.profile_service import profile_cache
+from app.services.recommendations import recommender
+
+# Order in which a user's rows are purged: the rows other users' counters
+# depend on go first, the user row (which cascades to leftovers) last
+PURGE_STAGES = ("following", "followers", "likes", "reposts", "comments", "posts", "notifications", "user")
+
+
+class DeletionService:
+    """Delete posts and users through the database's ``ON DELETE`` rules.
+    
+    Likes, comments, reposts, repost entries and notifications reference
+    their post and user with ``ON DELETE CASCADE`` (replies with ``SET
+    NULL``), so a delete is one statement and no child row is loaded. The
+    counters those children feed are adjusted beforehand in the same
+    transaction. Removing a user would still cascade through everything
+    they ever wrote at once, so ``purge_batch`` deletes it stage by stage in
+    bounded, separately committed batches (driven by ``AccountDeletionService``).
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        # Index and cache updates to apply once the current batch commits
+        self._removed_follows: List[Tuple[int, int]] = []
+        self._stale_post_ids: List[int] = []
+    
+    def delete_post(self, post) -> None:
+        """Delete ``post`` (a ``Post`` or a row with ``id``, ``author_id``, ``is_repost`` and ``original_post_id``)."""
+        counters = CounterService(self.db)
+        counters.posts_changed(post.author_id, -1)
+        if post.is_repost:
+            # The repost entry is the visible half of a Repost row
+            removed = self.db.execute(delete(Repost).where(
+                Repost.user_id == post.author_id, Repost.post_id == post.original_post_id
+            ).execution_options(synchronize_session=False)).rowcount
+            if removed:
+                counters.reposts_changed(post.original_post_id, -removed)
+        
+        # Other users' repost entries go with the original
+        repost_ids = self._drop_repost_entries([post.id])
+        self.db.execute(delete(Post).where(Post.id == post.id).execution_options(synchronize_session=False))
+        self.db.commit()
+        
+        for post_id in [post.id, *repost_ids]:
+            post_fragment_cache.invalidate_post(post_id)
+    
+    def purge_batch(
+        self,
+        user_id: int,
+        stage: str,
+        batch_size: int,
+        record_progress: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """Delete up to ``batch_size`` of a user's rows for one stage and commit.
+        
+        ``record_progress`` is called with the number of rows deleted before
+        the commit, so progress is saved in the same transaction. Returns
+        that number; fewer than ``batch_size`` means the stage is done.
+        """
+        self._removed_follows, self._stale_post_ids = [], []
+        try:
+            count = getattr(self, f"_purge_{stage}")(user_id, batch_size)
+            if record_progress is not None:
+                record_progress(count)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        for follower_id, following_id in self._removed_follows:
+            follow_graph.remove_edge(follower_id, following_id)
+            recommender.mark_dirty(follower_id)
+        for post_id in self._stale_post_ids:
+            post_fragment_cache.invalidate_post(post_id)
+        if stage == "user":
+            post_fragment_cache.invalidate_author(user_id)
+        return count
+    
+    def _purge_following(self, user_id: int, batch_size: int) -> int:
+        following_ids = self._delete_batch(Follow, Follow.following_id, Follow.follower_id == user_id, batch_size)
+        self._adjust_counter(User.followers_count, dict.fromkeys(following_ids, 1))
+        self._removed_follows.extend((user_id, following_id) for following_id in following_ids)
+        return len(following_ids)
+    
+    def _purge_followers(self, user_id: int, batch_size: int) -> int:
+        follower_ids = self._delete_batch(Follow, Follow.follower_id, Follow.following_id == user_id, batch_size)
+        self._adjust_counter(User.following_count, dict.fromkeys(follower_ids, 1))
+        self._removed_follows.extend((follower_id, user_id) for follower_id in follower_ids)
+        return len(follower_ids)
+    
+    def _purge_likes(self, user_id: int, batch_size: int) -> int:
+        post_ids = self._delete_batch(Like, Like.post_id, Like.user_id == user_id, batch_size)
+        if post_ids:
+            like_counter.changed_many(self.db, post_ids, -1)
+        return len(post_ids)
+    
+    def _purge_reposts(self, user_id: int, batch_size: int) -> int:
+        # The repost entries themselves are the user's posts, purged later
+        post_ids = self._delete_batch(Repost, Repost.post_id, Repost.user_id == user_id, batch_size)
+        self._adjust_counter(Post.reposts_count, dict.fromkeys(post_ids, 1))
+        return len(post_ids)
+    
+    def _purge_comments(self, user_id: int, batch_size: int) -> int:
+        # Replies to them (possibly by others) and their notifications
+        # cascade, so the affected posts are recounted
+        post_ids = self._delete_batch(Comment, Comment.post_id, Comment.author_id == user_id, batch_size)
+        if post_ids:
+            CounterService(self.db).recount_comments(sorted(set(post_ids)))
+        return len(post_ids)
+    
+    def _purge_posts(self, user_id: int, batch_size: int) -> int:
+        post_ids = [
+            post_id for (post_id,) in
+            self.db.query(Post.id).filter(Post.author_id == user_id).order_by(Post.id).limit(batch_size)
+        ]
+        if not post_ids:
+            return 0
+        
+        repost_ids = self._drop_repost_entries(post_ids, exclude_author_id=user_id)
+        self.db.execute(delete(Post).where(Post.id.in_(post_ids)).execution_options(synchronize_session=False))
+        self._stale_post_ids.extend(post_ids + repost_ids)
+        return len(post_ids)
+    
+    def _purge_notifications(self, user_id: int, batch_size: int) -> int:
+        return len(self._delete_batch(
+            Notification, Notification.id,
+            or_(Notification.user_id == user_id, Notification.actor_id == user_id),
+            batch_size
+        ))
+    
+    def _purge_user(self, user_id: int, batch_size: int) -> int:
+        # Follows, likes and reposts that raced the deactivation past their
+        # stage would cascade without their counters, so account them first
+        for stage in ("following", "followers", "likes", "reposts", "comments"):
+            while getattr(self, f"_purge_{stage}")(user_id, batch_size) == batch_size:
+                pass
+        
+        # Cascades to anything left, such as upload sessions
+        count = self.db.execute(delete(User).where(User.id == user_id).execution_options(synchronize_session=False)).rowcount
+        profile_cache.invalidate(user_id)
+        return count
+    
+    def _drop_repost_entries(self, post_ids: List[int], exclude_author_id: Optional[int] = None) -> List[int]:
+        """Account the repost entries of ``post_ids`` that are about to cascade; returns their ids."""
+        criteria = [Post.original_post_id.in_(post_ids), Post.is_repost == True]
+        if exclude_author_id is not None:
+            criteria.append(Post.author_id != exclude_author_id)
+        
+        entries = self.db.query(Post.id, Post.author_id, User.is_active).join(
+            User, Post.author_id == User.id
+        ).filter(*criteria).all()
+        self._adjust_counter(User.posts_count, Counter(author_id for _, author_id, _ in entries))
+        CounterService(self.db).public_posts_changed(-sum(1 for _, _, is_active in entries if is_active))
+        return [post_id for post_id, _, _ in entries]
+    
+    def _delete_batch(self, model, returning, criterion, batch_size: int) -> List[int]:
+        """Delete up to ``batch_size`` rows matching ``criterion``; returns ``returning`` of each."""
+        batch = self.db.query(model.id).filter(criterion).order_by(model.id).limit(batch_size).scalar_subquery()
+        statement = delete(model).where(model.id.in_(batch)).returning(returning)
+        return self.db.execute(statement.execution_options(synchronize_session=False)).scalars().all()
+    
+    def _adjust_counter(self, column, decrements: Dict[int, int]) -> None:
+        """Subtract ``decrements`` (row id -> amount) from a ``User`` or ``Post`` counter ``column`` in one UPDATE."""
+        if not decrements:
+            return
+        
+        model = column.class_
+        self.db.execute(update(model).where(model.id.in_(sorted(decrements))).values({
+            column: column - case(decrements, value=model.id, else_=0),
+            model.updated_at: model.updated_at,
+        }).execution_options(synchronize_session=False))
+        if model is User:
+            profile_cache.invalidate(*decrements)
@@ -0,0 +1,258 @@
+"""
+In-memory follow-graph index.
+"""
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.interaction import Follow
+
+logger = logging.getLogger(__name__)
+
+# User ids are 32-bit Integer columns
+_TYPECODE = "i"
+_EMPTY = array(_TYPECODE)
+
+
+class FollowGraphIndex:
+    """Adjacency of the follow graph as sorted integer arrays, per worker.
+    
+    For every user it keeps the sorted ids they follow and the sorted ids
+    following them, so following-ids and counts are O(1) and relationship
+    checks are a binary search. Follow/unfollow endpoints update it in place;
+    follows made through other workers are picked up by ``sync`` (new rows by
+    id) and unfollows there by the periodic full ``rebuild``.
+    
+    Ids are handed out before commit, so on PostgreSQL a follow can become
+    visible after one with a higher id. ``sync`` therefore re-reads the last
+    ``sync_lookback`` ids below the highest it has seen; edges already in the
+    index are skipped.
+    
+    ``sync`` and ``rebuild`` read the database in a worker thread while
+    edges keep changing. Changes made during the read are journaled and
+    replayed after the read's rows are applied, so an unfollow that lands
+    after the read is not undone by it. Writes hold a lock.
+    """
+    
+    def __init__(self, sync_lookback: int = 1000):
+        self.sync_lookback = sync_lookback
+        self._following: Dict[int, array] = {}
+        self._followers: Dict[int, array] = {}
+        self.edge_count = 0
+        self.loaded = False
+        self.built_at = 0.0
+        self._max_follow_id = 0
+        self._lock = threading.Lock()
+        # Edge changes (added, follower_id, following_id) made while a read is in progress
+        self._journals: List[List[Tuple[bool, int, int]]] = []
+    
+    def get_following_ids(self, db: Session, user_id: int) -> List[int]:
+        """Ids ``user_id`` follows, from the index or (before it is built) the database."""
+        if self.loaded:
+            return list(self.following_ids(user_id))
+        return [following_id for (following_id,) in db.query(Follow.following_id).filter(Follow.follower_id == user_id)]
+    
+    def following_ids(self, user_id: int) -> array:
+        """Sorted ids of the users ``user_id`` follows (do not mutate)."""
+        return self._following.get(user_id, _EMPTY)
+    
+    def follower_ids(self, user_id: int) -> array:
+        """Sorted ids of the users following ``user_id`` (do not mutate)."""
+        return self._followers.get(user_id, _EMPTY)
+    
+    def following_count(self, user_id: int) -> int:
+        """Number of users ``user_id`` follows."""
+        return len(self._following.get(user_id, _EMPTY))
+    
+    def followers_count(self, user_id: int) -> int:
+        """Number of users following ``user_id``."""
+        return len(self._followers.get(user_id, _EMPTY))
+    
+    def is_following(self, follower_id: int, following_id: int) -> bool:
+        """Whether ``follower_id`` follows ``following_id``."""
+        return _contains(self._following.get(follower_id, _EMPTY), following_id)
+    
+    def is_followed_by(self, user_id: int, other_id: int) -> bool:
+        """Whether ``other_id`` follows ``user_id``."""
+        return self.is_following(other_id, user_id)
+    
+    def add_edge(self, follower_id: int, following_id: int) -> None:
+        """Record a follow (idempotent)."""
+        self._change(True, follower_id, following_id)
+    
+    def remove_edge(self, follower_id: int, following_id: int) -> None:
+        """Record an unfollow (idempotent)."""
+        self._change(False, follower_id, following_id)
+    
+    def rebuild(self, db: Session, batch_size: int = 50000) -> None:
+        """Replace the index with the contents of the ``follows`` table."""
+        start = time.perf_counter()
+        following: Dict[int, array] = {}
+        followers: Dict[int, array] = {}
+        max_follow_id = 0
+        edge_count = 0
+        
+        journal = self._start_journal()
+        try:
+            for follow_id, follower_id, following_id in self._read_follows(db, 0, batch_size):
+                following.setdefault(follower_id, array(_TYPECODE)).append(following_id)
+                followers.setdefault(following_id, array(_TYPECODE)).append(follower_id)
+                if follow_id > max_follow_id:
+                    max_follow_id = follow_id
+                edge_count += 1
+            
+            for adjacency in (following, followers):
+                for user_id, ids in adjacency.items():
+                    adjacency[user_id] = array(_TYPECODE, sorted(ids))
+            
+            with self._lock:
+                for added, follower_id, following_id in journal:
+                    edge_count += _apply(following, followers, added, follower_id, following_id)
+                # Swap in whole so readers never see a half-built index
+                self._following, self._followers = following, followers
+                self.edge_count = edge_count
+                self._max_follow_id = max_follow_id
+                self.loaded = True
+                self.built_at = time.monotonic()
+        finally:
+            self._stop_journal(journal)
+        
+        stats = self.memory_stats()
+        logger.info(
+            "Follow graph built: %d edges, %.1f MiB, %.1f bytes/edge in %.2fs",
+            stats["edges"], stats["bytes"] / 1048576, stats["bytes_per_edge"], time.perf_counter() - start
+        )
+    
+    def sync(self, db: Session) -> int:
+        """Add follows created since the last build or sync (e.g. by other workers); returns the number added."""
+        added_count = 0
+        journal = self._start_journal()
+        try:
+            rows = list(self._read_follows(db, max(self._max_follow_id - self.sync_lookback, 0)))
+            with self._lock:
+                for _, follower_id, following_id in rows:
+                    added_count += _apply(self._following, self._followers, True, follower_id, following_id)
+                self.edge_count += added_count
+                # Changes made since the read win over the rows it returned
+                for added, follower_id, following_id in journal:
+                    self.edge_count += _apply(self._following, self._followers, added, follower_id, following_id)
+                if rows:
+                    self._max_follow_id = max(self._max_follow_id, rows[-1][0])
+        finally:
+            self._stop_journal(journal)
+        return added_count
+    
+    def _read_follows(self, db: Session, after_id: int, batch_size: int = 50000) -> Iterable[Tuple[int, int, int]]:
+        """Stream ``(id, follower_id, following_id)`` of follows with ids above ``after_id``, in id order."""
+        return db.query(Follow.id, Follow.follower_id, Follow.following_id).filter(
+            Follow.id > after_id
+        ).order_by(Follow.id).execution_options(yield_per=batch_size)
+    
+    def _change(self, added: bool, follower_id: int, following_id: int) -> None:
+        with self._lock:
+            for journal in self._journals:
+                journal.append((added, follower_id, following_id))
+            self.edge_count += _apply(self._following, self._followers, added, follower_id, following_id)
+    
+    def _start_journal(self) -> List[Tuple[bool, int, int]]:
+        journal: List[Tuple[bool, int, int]] = []
+        with self._lock:
+            self._journals.append(journal)
+        return journal
+    
+    def _stop_journal(self, journal: List[Tuple[bool, int, int]]) -> None:
+        with self._lock:
+            self._journals.remove(journal)
+    
+    def memory_stats(self) -> Dict[str, float]:
+        """Approximate memory used by the index."""
+        array_bytes = sum(sys.getsizeof(ids) for ids in self._following.values())
+        array_bytes += sum(sys.getsizeof(ids) for ids in self._followers.values())
+        # Dict tables plus ~28 bytes per int key
+        dict_bytes = sys.getsizeof(self._following) + sys.getsizeof(self._followers)
+        dict_bytes += 28 * (len(self._following) + len(self._followers))
+        total = array_bytes + dict_bytes
+        return {
+            "edges": self.edge_count,
+            "lists": len(self._following) + len(self._followers),
+            "bytes": total,
+            "bytes_per_edge": total / self.edge_count if self.edge_count else 0.0,
+        }
+
+
+def _apply(
+    following: Dict[int, array],
+    followers: Dict[int, array],
+    added: bool,
+    follower_id: int,
+    following_id: int
+) -> int:
+    """Add or remove an edge in a pair of adjacency maps; returns the change in edge count."""
+    if added:
+        if _insort(following.setdefault(follower_id, array(_TYPECODE)), following_id):
+            _insort(followers.setdefault(following_id, array(_TYPECODE)), follower_id)
+            return 1
+    elif _remove(following.get(follower_id), following_id):
+        _remove(followers.get(following_id), follower_id)
+        return -1
+    return 0
+
+
+def _contains(ids: array, value: int) -> bool:
+    i = bisect.bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+def _insort(ids: array, value: int) -> bool:
+    i = bisect.bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return False
+    ids.insert(i, value)
+    return True
+
+
+def _remove(ids: Optional[array], value: int) -> bool:
+    if not ids:
+        return False
+    i = bisect.bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        del ids[i]
+        return True
+    return False
+
+
+follow_graph = FollowGraphIndex(settings.FOLLOW_GRAPH_SYNC_LOOKBACK)
+
+
+async def refresh_follow_graph(
+    session_factory: Callable[[], Session],
+    sync_interval: float,
+    rebuild_interval: float
+) -> None:
+    """Keep ``follow_graph`` current: sync new follows often, rebuild fully now and then."""
+    def run(method_name: str) -> None:
+        db = session_factory()
+        try:
+            getattr(follow_graph, method_name)(db)
+        finally:
+            db.close()
+    
+    while True:
+        try:
+            if not follow_graph.loaded or time.monotonic() - follow_graph.built_at >= rebuild_interval:
+                await asyncio.to_thread(run, "rebuild")
+            else:
+                await asyncio.to_thread(run, "sync")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Follow graph refresh failed")
+        await asyncio.sleep(sync_interval)
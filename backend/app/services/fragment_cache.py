@@ -0,0 +1,83 @@
+"""
+In-process cache of pre-encoded JSON fragments for posts.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+class PostFragmentCache:
+    """LRU cache of each post's encoded static JSON (content, media, author card).
+    
+    Entries are keyed by post id and checked against a version tuple built
+    from the ``updated_at`` columns the fragment depends on, so a profile or
+    post change made through another worker is never served stale. Explicit
+    invalidation frees memory early; the TTL is a backstop for changes no
+    version covers.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._posts_by_author: Dict[int, Set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, post_id: int, version: Hashable) -> Optional[bytes]:
+        """Get the fragment of a post if it is cached at this version."""
+        entry = self._entries.get(post_id)
+        if entry is None or entry[0] != version or entry[2] < time.monotonic():
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(post_id)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, post_id: int, author_ids: Tuple[int, ...], version: Hashable, fragment: bytes) -> None:
+        """Store the fragment of a post, evicting the least recently used entries.
+        
+        ``author_ids`` lists every user whose card is embedded (the author and,
+        for reposts, the original author).
+        """
+        self.invalidate_post(post_id)
+        self._entries[post_id] = (version, fragment, time.monotonic() + self.ttl_seconds, author_ids)
+        for author_id in author_ids:
+            self._posts_by_author.setdefault(author_id, set()).add(post_id)
+        
+        while len(self._entries) > self.max_entries:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            self._unindex(evicted_id, evicted[3])
+    
+    def invalidate_post(self, post_id: int) -> None:
+        """Drop a post's fragment (post deleted)."""
+        entry = self._entries.pop(post_id, None)
+        if entry is not None:
+            self._unindex(post_id, entry[3])
+    
+    def invalidate_author(self, author_id: int) -> None:
+        """Drop all fragments embedding an author's card (profile or avatar changed)."""
+        for post_id in list(self._posts_by_author.get(author_id, ())):
+            self.invalidate_post(post_id)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._posts_by_author.clear()
+    
+    def _unindex(self, post_id: int, author_ids: Tuple[int, ...]) -> None:
+        for author_id in author_ids:
+            post_ids = self._posts_by_author.get(author_id)
+            if post_ids is not None:
+                post_ids.discard(post_id)
+                if not post_ids:
+                    del self._posts_by_author[author_id]
+
+
+# Global cache instance (per worker process)
+post_fragment_cache = PostFragmentCache(
+    max_entries=settings.POST_FRAGMENT_CACHE_SIZE,
+    ttl_seconds=settings.POST_FRAGMENT_TTL_SECONDS
+)
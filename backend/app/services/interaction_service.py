@@ -0,0 +1,178 @@
+"""
+Idempotent like, repost and follow writes.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Like, Repost, Follow
+from app.services.counter_service import CounterService
+from app.services.follow_graph import follow_graph
+from app.services.fragment_cache import post_fragment_cache
+from app.services.like_counter import like_counter
+from app.services.notification_service import NotificationService
+from app.services.recommendations import recommender
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING ... RETURNING
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class InteractionService:
+    """Set or clear likes, reposts and follows, each in one statement.
+    
+    Adding is ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` and removing is
+    ``DELETE ... RETURNING`` on the pair's unique constraint, so concurrent
+    duplicates never raise and exactly one of them sees a row come back.
+    Only that request adjusts counters and adds the notification, in the
+    same transaction, so both stay consistent under double-taps. Methods
+    commit their change and return whether there was one.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.notifications = NotificationService(db, autocommit=False)
+    
+    def like(self, user: User, post) -> bool:
+        """Like ``post`` (a ``Post`` or a row with ``id`` and ``author_id``)."""
+        return self._commit_if(self._like(user, post))
+    
+    def unlike(self, user_id: int, post_id: int) -> bool:
+        """Remove a like."""
+        return self._commit_if(self._unlike(user_id, post_id))
+    
+    def repost(self, user: User, post) -> bool:
+        """Repost ``post``: a ``Repost`` row plus the repost entry in the author's posts."""
+        return self._commit_if(self._repost(user, post))
+    
+    def unrepost(self, user_id: int, post_id: int) -> bool:
+        """Remove a repost and its entry in the user's posts."""
+        repost_ids = self._unrepost(user_id, post_id)
+        if repost_ids is None:
+            return False
+        
+        self.db.commit()
+        for repost_id in repost_ids:
+            post_fragment_cache.invalidate_post(repost_id)
+        return True
+    
+    def apply_batch(self, user: User, operations: List[Tuple[str, int]], posts: Dict[int, Any]) -> List[bool]:
+        """Apply ``(action, post_id)`` operations in order, in one transaction.
+        
+        ``posts`` maps post ids to rows with ``id`` and ``author_id``; likes
+        and reposts of posts missing from it are skipped. Notifications are
+        inserted as one batch with the commit. Returns whether each
+        operation changed anything.
+        """
+        changed = []
+        removed_repost_ids = []
+        for action, post_id in operations:
+            post = posts.get(post_id)
+            if action == "like":
+                changed.append(post is not None and self._like(user, post))
+            elif action == "repost":
+                changed.append(post is not None and self._repost(user, post))
+            elif action == "unlike":
+                changed.append(self._unlike(user.id, post_id))
+            elif action == "unrepost":
+                repost_ids = self._unrepost(user.id, post_id)
+                changed.append(repost_ids is not None)
+                removed_repost_ids.extend(repost_ids or ())
+            else:
+                raise ValueError(f"Unknown interaction action: {action}")
+        
+        self.db.commit()
+        for repost_id in removed_repost_ids:
+            post_fragment_cache.invalidate_post(repost_id)
+        return changed
+    
+    def _like(self, user: User, post) -> bool:
+        if self._insert(Like, user_id=user.id, post_id=post.id) is None:
+            return False
+        
+        like_counter.changed(self.db, post.id, 1)
+        self.notifications.create_like_notification(post, user)
+        return True
+    
+    def _unlike(self, user_id: int, post_id: int) -> bool:
+        if not self._delete(Like, Like.user_id == user_id, Like.post_id == post_id):
+            return False
+        
+        like_counter.changed(self.db, post_id, -1)
+        return True
+    
+    def _repost(self, user: User, post) -> bool:
+        if self._insert(Repost, user_id=user.id, post_id=post.id) is None:
+            return False
+        
+        # Give reposts a default content
+        self.db.add(Post(author_id=user.id, content="Reposted", is_repost=True, original_post_id=post.id))
+        counters = CounterService(self.db)
+        counters.posts_changed(user.id, 1)
+        counters.reposts_changed(post.id, 1)
+        self.notifications.create_repost_notification(post, user)
+        return True
+    
+    def _unrepost(self, user_id: int, post_id: int) -> Optional[List[int]]:
+        """Remove a repost; returns the ids of the removed repost entries, or None if there was none."""
+        if not self._delete(Repost, Repost.user_id == user_id, Repost.post_id == post_id):
+            return None
+        
+        CounterService(self.db).reposts_changed(post_id, -1)
+        repost_ids = self.db.execute(
+            delete(Post).where(
+                Post.author_id == user_id,
+                Post.is_repost == True,
+                Post.original_post_id == post_id
+            ).returning(Post.id).execution_options(synchronize_session=False)
+        ).scalars().all()
+        if repost_ids:
+            CounterService(self.db).posts_changed(user_id, -len(repost_ids))
+        return repost_ids
+    
+    def follow(self, user: User, target: User) -> Optional[Row]:
+        """Follow ``target``; returns the new follow's ``(id, created_at)`` or None if already following."""
+        row = self._insert(Follow, Follow.created_at, follower_id=user.id, following_id=target.id)
+        if row is None:
+            return None
+        
+        CounterService(self.db).follow_changed(user.id, target.id, 1)
+        self.notifications.create_follow_notification(target, user)
+        self.db.commit()
+        follow_graph.add_edge(user.id, target.id)
+        recommender.mark_dirty(user.id)
+        return row
+    
+    def unfollow(self, follower_id: int, following_id: int) -> bool:
+        """Unfollow a user."""
+        if not self._delete(Follow, Follow.follower_id == follower_id, Follow.following_id == following_id):
+            return False
+        
+        CounterService(self.db).follow_changed(follower_id, following_id, -1)
+        self.db.commit()
+        follow_graph.remove_edge(follower_id, following_id)
+        recommender.mark_dirty(follower_id)
+        return True
+    
+    def _commit_if(self, changed: bool) -> bool:
+        if changed:
+            self.db.commit()
+        return changed
+    
+    def _insert(self, model, *returning, **values) -> Optional[Row]:
+        insert = _INSERTS[self.db.get_bind().dialect.name]
+        statement = insert(model).values(**values).on_conflict_do_nothing(
+            index_elements=list(values)
+        ).returning(model.id, *returning)
+        return self.db.execute(statement).first()
+    
+    def _delete(self, model, *criteria) -> bool:
+        statement = delete(model).where(*criteria).returning(model.id).execution_options(synchronize_session=False)
+        return self.db.execute(statement).first() is not None
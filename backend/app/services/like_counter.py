@@ -0,0 +1,363 @@
+"""
+Maintained ``posts.likes_count`` with an optional write-behind buffer.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.post import Post
+from app.models.interaction import Like
+
+logger = logging.getLogger(__name__)
+
+# Session.info key for deltas waiting for their transaction to commit
+_SESSION_DELTAS = "like_counter_deltas"
+
+
+class MemoryLikeBuffer:
+    """Per-worker like deltas waiting to be flushed.
+    
+    ``take`` moves pending deltas to a flushing set that stays visible to
+    reads until ``done``; if the flush fails they are retried with the next.
+    Other workers' deltas are invisible, so reconciling against this buffer
+    is only safe while no other worker is buffering likes (``WEB_CONCURRENCY``
+    of 1).
+    """
+    
+    shared = False
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._flushing: Dict[int, int] = {}
+    
+    def add(self, deltas: Dict[int, int]) -> None:
+        with self._lock:
+            for post_id, delta in deltas.items():
+                self._pending[post_id] = self._pending.get(post_id, 0) + delta
+    
+    def pending(self, post_id: int) -> int:
+        return self._pending.get(post_id, 0) + self._flushing.get(post_id, 0)
+    
+    def deltas(self) -> Dict[int, int]:
+        with self._lock:
+            merged = dict(self._flushing)
+            for post_id, delta in self._pending.items():
+                merged[post_id] = merged.get(post_id, 0) + delta
+            return merged
+    
+    def acquire(self) -> bool:
+        return self._flush_lock.acquire(blocking=False)
+    
+    def release(self) -> None:
+        self._flush_lock.release()
+    
+    def take(self) -> Dict[int, int]:
+        with self._lock:
+            for post_id, delta in self._pending.items():
+                self._flushing[post_id] = self._flushing.get(post_id, 0) + delta
+            self._pending = {}
+            return dict(self._flushing)
+    
+    def done(self) -> None:
+        with self._lock:
+            self._flushing = {}
+
+
+# Move the pending hash aside for flushing, unless a previous flush left one
+TAKE_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+class RedisLikeBuffer:
+    """Like deltas shared by all workers in Redis hashes (``HINCRBY``).
+    
+    A short lock lets one worker flush (or reconcile) at a time. Reads use a snapshot of
+    both hashes refreshed once per flush interval, so a worker does not call
+    Redis per post; merged counts may lag or lead by up to one interval.
+    """
+    
+    shared = True
+    
+    def __init__(self, redis_url: str, snapshot_seconds: float, prefix: str = "likes:"):
+        import redis
+        
+        self._client = redis.Redis.from_url(redis_url)
+        self._take_script = self._client.register_script(TAKE_LUA)
+        self._pending_key = prefix + "pending"
+        self._flushing_key = prefix + "flushing"
+        self._lock_key = prefix + "flush-lock"
+        self._snapshot_seconds = snapshot_seconds
+        self._snapshot: Dict[int, int] = {}
+        self._snapshot_at = 0.0
+    
+    def add(self, deltas: Dict[int, int]) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for post_id, delta in deltas.items():
+            pipeline.hincrby(self._pending_key, post_id, delta)
+        pipeline.execute()
+    
+    def pending(self, post_id: int) -> int:
+        if time.monotonic() - self._snapshot_at >= self._snapshot_seconds:
+            try:
+                self._snapshot = self.deltas()
+            except Exception as e:
+                logger.warning("Like counter buffer unavailable: %s", e)
+                self._snapshot = {}
+            self._snapshot_at = time.monotonic()
+        return self._snapshot.get(post_id, 0)
+    
+    def acquire(self) -> bool:
+        """Take the flush lock, or return False while another worker holds it."""
+        # The lock outlives a normal flush; if this worker dies it expires
+        return bool(self._client.set(self._lock_key, 1, nx=True, px=30000))
+    
+    def release(self) -> None:
+        self._client.delete(self._lock_key)
+    
+    def take(self) -> Dict[int, int]:
+        values = self._take_script(keys=[self._pending_key, self._flushing_key])
+        return {int(values[i]): int(values[i + 1]) for i in range(0, len(values), 2)}
+    
+    def done(self) -> None:
+        self._client.delete(self._flushing_key)
+    
+    def deltas(self) -> Dict[int, int]:
+        """All buffered deltas (pending and flushing), read now."""
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.hgetall(self._pending_key)
+        pipeline.hgetall(self._flushing_key)
+        merged: Dict[int, int] = {}
+        for values in pipeline.execute():
+            for post_id, delta in values.items():
+                merged[int(post_id)] = merged.get(int(post_id), 0) + int(delta)
+        return merged
+
+
+class LikeCounter:
+    """Keep ``posts.likes_count`` in step with the ``likes`` table.
+    
+    In ``direct`` mode each like or unlike updates the post row in its own
+    transaction, which serializes writers on a viral post's row lock. In the
+    write-behind modes (``memory``, ``redis``) deltas are buffered once their
+    transaction commits and ``flush`` applies them in one batched UPDATE;
+    reads add the pending delta. A crash can lose buffered deltas, so
+    ``reconcile`` periodically recounts posts from ``likes``. Buffers hold
+    a flush lock (``acquire``/``release``) around ``take``/``done``.
+    """
+    
+    def __init__(self, mode: str, buffer=None):
+        self.mode = mode
+        self.buffer = buffer
+    
+    @property
+    def buffered(self) -> bool:
+        return self.buffer is not None
+    
+    def changed(self, db: Session, post_id: int, delta: int) -> None:
+        """Account a like (+1) or unlike (-1) in the caller's transaction."""
+        if self.buffered:
+            deltas = db.info.setdefault(_SESSION_DELTAS, {})
+            deltas[post_id] = deltas.get(post_id, 0) + delta
+            return
+        
+        db.query(Post).filter(Post.id == post_id).update(
+            {Post.likes_count: Post.likes_count + delta, Post.updated_at: Post.updated_at},
+            synchronize_session=False
+        )
+    
+    def changed_many(self, db: Session, post_ids: List[int], delta: int) -> None:
+        """Account ``delta`` for each of ``post_ids`` (distinct) in one statement."""
+        if self.buffered:
+            deltas = db.info.setdefault(_SESSION_DELTAS, {})
+            for post_id in post_ids:
+                deltas[post_id] = deltas.get(post_id, 0) + delta
+            return
+        
+        db.query(Post).filter(Post.id.in_(post_ids)).update(
+            {Post.likes_count: Post.likes_count + delta, Post.updated_at: Post.updated_at},
+            synchronize_session=False
+        )
+    
+    def pending(self, post_id: int) -> int:
+        """Buffered delta not yet written to ``posts.likes_count``."""
+        return self.buffer.pending(post_id) if self.buffered else 0
+    
+    @property
+    def can_reconcile(self) -> bool:
+        """Whether ``reconcile`` sees every buffered delta (not per-worker ``memory`` mode with several workers)."""
+        return not self.buffered or self.buffer.shared or settings.WEB_CONCURRENCY <= 1
+    
+    def flush(self, db: Session) -> int:
+        """Write buffered deltas in one UPDATE; returns the number of posts updated."""
+        if not self.buffer.acquire():
+            return 0
+        
+        try:
+            deltas = {post_id: delta for post_id, delta in self.buffer.take().items() if delta}
+            if deltas:
+                db.query(Post).filter(Post.id.in_(sorted(deltas))).update({
+                    Post.likes_count: Post.likes_count + case(deltas, value=Post.id, else_=0),
+                    Post.updated_at: Post.updated_at,
+                }, synchronize_session=False)
+                db.commit()
+            self.buffer.done()
+        finally:
+            self.buffer.release()
+        return len(deltas)
+    
+    def reconcile(self, db: Session, batch_size: int = 5000) -> int:
+        """Recount ``likes_count`` from ``likes`` where it drifted, committing per batch.
+        
+        With a buffer, the stored count plus the buffered delta should match
+        the recount. Each batch is compared and corrected under the flush
+        lock, so no flush moves deltas into the rows meanwhile; posts whose
+        delta changed while the batch was read are checked next time. In
+        ``memory`` mode only this worker's deltas are visible, so run it
+        there only while no other worker is buffering likes.
+        """
+        recount = select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+        last_id = 0
+        corrected = 0
+        while True:
+            post_ids = [
+                post_id for (post_id,) in
+                db.query(Post.id).filter(Post.id > last_id).order_by(Post.id).limit(batch_size)
+            ]
+            if not post_ids:
+                break
+            
+            in_batch = Post.id.between(post_ids[0], post_ids[-1])
+            if self.buffered:
+                corrected += self._reconcile_buffered(db, in_batch, recount)
+            else:
+                corrected += db.query(Post).filter(in_batch, Post.likes_count != recount).update(
+                    {Post.likes_count: recount, Post.updated_at: Post.updated_at},
+                    synchronize_session=False
+                )
+                db.commit()
+            last_id = post_ids[-1]
+        
+        if corrected:
+            logger.info("Reconciled likes_count of %d posts", corrected)
+        return corrected
+    
+    def _reconcile_buffered(self, db: Session, in_batch, recount) -> int:
+        """Correct one batch by ``recount - (likes_count + buffered delta)``, under the flush lock."""
+        # A flush holds the lock only briefly
+        while not self.buffer.acquire():
+            time.sleep(0.05)
+        
+        try:
+            before = self.buffer.deltas()
+            buffered = {post_id: delta for post_id, delta in before.items() if delta}
+            stored = Post.likes_count + case(buffered, value=Post.id, else_=0) if buffered else Post.likes_count
+            drifted = db.query(Post.id, recount - stored).filter(in_batch, stored != recount).all()
+            
+            # Skip posts liked or unliked since ``before``: the recount may include them
+            after = self.buffer.deltas()
+            corrections = {
+                post_id: drift for post_id, drift in drifted
+                if after.get(post_id, 0) == before.get(post_id, 0)
+            }
+            if corrections:
+                db.query(Post).filter(Post.id.in_(sorted(corrections))).update({
+                    Post.likes_count: Post.likes_count + case(corrections, value=Post.id, else_=0),
+                    Post.updated_at: Post.updated_at,
+                }, synchronize_session=False)
+            db.commit()
+            return len(corrections)
+        finally:
+            self.buffer.release()
+
+
+def create_like_counter() -> LikeCounter:
+    """Create the counter configured by ``LIKE_COUNTER_MODE``."""
+    mode = settings.LIKE_COUNTER_MODE
+    if mode == "redis":
+        try:
+            return LikeCounter(mode, RedisLikeBuffer(settings.REDIS_URL, settings.LIKE_COUNTER_FLUSH_MS / 1000))
+        except ImportError:
+            logger.warning("redis package not installed, buffering like counts in memory")
+            mode = "memory"
+    if mode == "memory":
+        return LikeCounter(mode, MemoryLikeBuffer())
+    return LikeCounter("direct")
+
+
+like_counter = create_like_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_committed_deltas(session: Session) -> None:
+    deltas = session.info.pop(_SESSION_DELTAS, None)
+    if deltas:
+        try:
+            like_counter.buffer.add(deltas)
+        except Exception as e:
+            # Reconciliation recounts what is lost here
+            logger.warning("Could not buffer like counts: %s", e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_deltas(session: Session) -> None:
+    session.info.pop(_SESSION_DELTAS, None)
+
+
+async def flush_like_counters(
+    session_factory: Callable[[], Session],
+    flush_interval: float,
+    reconcile_interval: float
+) -> None:
+    """Flush buffered like counts every ``flush_interval`` and reconcile now and then.
+    
+    The first reconciliation runs at startup, so deltas lost when a worker
+    died are recounted right away rather than after an interval. It is
+    skipped in ``memory`` mode with several workers, where it cannot see the
+    deltas other workers have yet to flush.
+    """
+    def run(method_name: str) -> None:
+        db = session_factory()
+        try:
+            getattr(like_counter, method_name)(db)
+        finally:
+            db.close()
+    
+    if not like_counter.can_reconcile:
+        logger.warning(
+            "Like counts are buffered per worker with %d workers, so reconciliation is off and "
+            "deltas lost in a crash stay lost; use LIKE_COUNTER_MODE=redis", settings.WEB_CONCURRENCY
+        )
+    reconciled_at = None
+    try:
+        while True:
+            try:
+                if like_counter.can_reconcile and (
+                    reconciled_at is None or time.monotonic() - reconciled_at >= reconcile_interval
+                ):
+                    # Set first, so a failing recount is retried after an interval, not at once
+                    reconciled_at = time.monotonic()
+                    await asyncio.to_thread(run, "reconcile")
+                await asyncio.to_thread(run, "flush")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Like counter flush failed")
+            await asyncio.sleep(flush_interval)
+    finally:
+        # Write what is buffered before the worker exits
+        try:
+            run("flush")
+        except Exception:
+            logger.exception("Final like counter flush failed")
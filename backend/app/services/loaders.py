@@ -0,0 +1,95 @@
+"""
+Request-scoped batching loaders (DataLoader pattern).
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.db.queries import (
+    fetch_post_rows_by_id, fetch_author_rows_by_id, fetch_user_card_rows_by_id,
+    fetch_liked_post_ids, fetch_reposted_post_ids
+)
+
+
+class BatchLoader:
+    """Collect keys, then resolve them all with one batch query.
+    
+    Handlers ``queue`` every key they will need while assembling a response,
+    then ``get`` values; the first ``get`` after new keys were queued issues a
+    single batch call for all of them. Results are memoized for the rest of
+    the request, including misses.
+    """
+    
+    def __init__(self, batch_fn: Callable[[Set[Hashable]], Dict[Hashable, Any]]):
+        self._batch_fn = batch_fn
+        self._cache: Dict[Hashable, Any] = {}
+        self._pending: Set[Hashable] = set()
+    
+    def queue(self, keys: Iterable[Hashable]) -> None:
+        """Register keys to be loaded with the next batch."""
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._pending.add(key)
+    
+    def get(self, key: Hashable) -> Any:
+        """Get the value for a key, loading all queued keys first if needed."""
+        if key is None:
+            return None
+        if key not in self._cache:
+            self._pending.add(key)
+            self._flush()
+        return self._cache[key]
+    
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Seed a value that is already known."""
+        self._cache[key] = value
+        self._pending.discard(key)
+    
+    def _flush(self) -> None:
+        keys, self._pending = self._pending, set()
+        loaded = self._batch_fn(keys)
+        for key in keys:
+            self._cache[key] = loaded.get(key)
+
+
+class RequestLoaders:
+    """Batching loaders for one request: posts, users and the viewer's like/repost state."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.posts = BatchLoader(lambda ids: fetch_post_rows_by_id(db, ids))
+        self.authors = BatchLoader(lambda ids: fetch_author_rows_by_id(db, ids))
+        self.user_cards = BatchLoader(lambda ids: fetch_user_card_rows_by_id(db, ids))
+        self._viewer_id: Optional[int] = None
+        self.liked = BatchLoader(self._load_liked)
+        self.reposted = BatchLoader(self._load_reposted)
+    
+    def for_viewer(self, viewer_id: Optional[int]) -> "RequestLoaders":
+        """Set the user whose like/repost state ``liked`` and ``reposted`` report."""
+        self._viewer_id = viewer_id
+        return self
+    
+    def queue_viewer_state(self, post_ids: Iterable[int]) -> None:
+        """Queue like and repost state lookups for posts."""
+        post_ids = list(post_ids)
+        self.liked.queue(post_ids)
+        self.reposted.queue(post_ids)
+    
+    def _load_liked(self, post_ids: Set[int]) -> Dict[int, bool]:
+        if self._viewer_id is None:
+            return {}
+        liked = fetch_liked_post_ids(self.db, self._viewer_id, post_ids)
+        return {post_id: post_id in liked for post_id in post_ids}
+    
+    def _load_reposted(self, post_ids: Set[int]) -> Dict[int, bool]:
+        if self._viewer_id is None:
+            return {}
+        reposted = fetch_reposted_post_ids(self.db, self._viewer_id, post_ids)
+        return {post_id: post_id in reposted for post_id in post_ids}
+
+
+def get_loaders(db: Session = Depends(get_db)) -> RequestLoaders:
+    """Dependency providing the loaders of the current request."""
+    return RequestLoaders(db)
@@ -9,10 +9,15 @@ from app.models.interaction import Comment
 
 
 class NotificationService:
-    """Service for managing notifications."""
+    """Service for managing notifications.
     
-    def __init__(self, db: Session):
+    With ``autocommit=False`` created notifications are only added to the
+    session, to commit with the caller's transaction as one batch.
+    """
+    
+    def __init__(self, db: Session, autocommit: bool = True):
         self.db = db
+        self.autocommit = autocommit
     
     def create_notification(
         self,
@@ -40,8 +45,9 @@ class NotificationService:
         )
         
         self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
+        if self.autocommit:
+            self.db.commit()
+            self.db.refresh(notification)
         
         return notification
     
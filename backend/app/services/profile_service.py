@@ -0,0 +1,132 @@
+"""
+User profile reads with a per-worker cache of the viewer-independent fields.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.queries import fetch_follow_flags, fetch_profile_row
+from app.services.follow_graph import follow_graph
+
+
+class ProfileCache:
+    """LRU cache of users' profile fields (everything but the viewer's follow flags).
+    
+    Profile edits, avatar changes and counter updates invalidate the user's
+    entry in this worker; the TTL bounds how long a change made through
+    another worker can be served stale.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a user's cached profile fields (do not mutate)."""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, user_id: int, profile: Dict[str, Any]) -> None:
+        """Store a user's profile fields, evicting the least recently used entries."""
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, profile)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop the entries of users whose profile, avatar or counters changed."""
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Global cache instance (per worker process)
+profile_cache = ProfileCache(
+    max_entries=settings.USER_PROFILE_CACHE_SIZE,
+    ttl_seconds=settings.USER_PROFILE_TTL_SECONDS
+)
+
+
+def profile_version(profile: Dict[str, Any]) -> Tuple:
+    """Version of a profile response, for its ETag."""
+    return (
+        profile["updated_at"],
+        profile["followers_count"],
+        profile["following_count"],
+        profile["posts_count"],
+        profile["is_following"],
+        profile["is_followed_by"],
+    )
+
+
+class ProfileService:
+    """Assemble ``UserProfile`` data in at most one query.
+    
+    A cache miss reads the profile (and, without the follow graph, the
+    viewer's follow flags) in one statement. A hit needs no query when the
+    follow graph is loaded, otherwise one ``EXISTS`` probe for the flags.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_profile(self, user_id: int, viewer_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Get a user's profile fields and follow flags, or None if the user does not exist or is deactivated.
+        
+        The flags are None for anonymous viewers.
+        """
+        flags = None
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            # Fetch the flags in the same round trip unless the follow graph can answer them
+            with_flags = viewer_id is not None and not follow_graph.loaded
+            row = fetch_profile_row(self.db, user_id, viewer_id if with_flags else None)
+            if row is None:
+                return None
+            
+            profile = row._asdict()
+            if with_flags:
+                flags = (bool(profile.pop("is_following")), bool(profile.pop("is_followed_by")))
+            profile_cache.set(user_id, profile)
+        
+        if not profile["is_active"]:
+            return None
+        if viewer_id is None:
+            flags = (None, None)
+        elif flags is None:
+            flags = self._follow_flags(viewer_id, user_id)
+        
+        return {**profile, "is_following": flags[0], "is_followed_by": flags[1]}
+    
+    def is_active(self, user_id: int) -> bool:
+        """Whether a user exists and is active, from their cached profile when possible.
+        
+        A deactivation through another worker shows after at most the cache TTL.
+        """
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            row = fetch_profile_row(self.db, user_id)
+            if row is None:
+                return False
+            profile = row._asdict()
+            profile_cache.set(user_id, profile)
+        return profile["is_active"]
+    
+    def _follow_flags(self, viewer_id: int, user_id: int) -> Tuple[bool, bool]:
+        if follow_graph.loaded:
+            return follow_graph.is_following(viewer_id, user_id), follow_graph.is_followed_by(viewer_id, user_id)
+        return fetch_follow_flags(self.db, viewer_id, user_id)
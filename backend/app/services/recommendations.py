@@ -0,0 +1,352 @@
+"""
+"Who to follow" recommendations from friends-of-friends.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.post import Post
+from app.models.user import User
+from app.services.follow_graph import follow_graph
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # NumPy/SciPy are optional; fall back to on-demand mutual counts
+    np = None
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+# (candidate user id, score, mutual follow count), best first
+Suggestion = Tuple[int, float, int]
+
+
+class RecommendationBatch(NamedTuple):
+    """One build's arrays, published together so readers never mix two builds."""
+    
+    user_ids: Any  # sorted user ids; position = matrix row/column
+    top_ids: Any  # (n, K) candidate user ids, -1 when fewer than K
+    top_scores: Any  # (n, K)
+    top_mutuals: Any  # (n, K)
+    follows: Any  # CSR A
+    engagement: Any  # CSR L
+    overrides: Dict[int, List[Suggestion]]  # rows recomputed since, for dirty users
+    built_at: float
+
+
+class FollowRecommender:
+    """Top-K follow suggestions per user, computed in batch with sparse products.
+    
+    With ``A[u, v] = 1`` when u follows v and ``L[u, w]`` the (log-scaled)
+    likes, comments and reposts u gave to w's posts, candidate w scores
+        
+        mutual_weight * (A @ A)[u, w] + engagement_weight * (A @ L)[u, w]
+    
+    for u: how many people u follows also follow w, plus how much they engage
+    with w. Users u already follows (and u) are excluded. Rows are multiplied
+    in blocks so no n x n product is ever materialized, and only the top K of
+    each row are kept, in dense ``(n, K)`` arrays.
+    
+    Users whose follows changed since the batch are marked dirty and get
+    their row recomputed on their next request, from the live follow graph
+    and the batch matrices. A build is published as one
+    ``RecommendationBatch`` in a single assignment, and keeps the marks made
+    after it started reading, since its data may predate those changes.
+    """
+    
+    def __init__(
+        self,
+        top_k: int = 10,
+        mutual_weight: float = 1.0,
+        engagement_weight: float = 0.2,
+        block_size: int = 20000
+    ):
+        self.top_k = top_k
+        self.mutual_weight = mutual_weight
+        self.engagement_weight = engagement_weight
+        self.block_size = block_size
+        self.batch: Optional[RecommendationBatch] = None
+        # user id -> tick of their latest mark; builds keep marks newer than their start
+        self._dirty: Dict[int, int] = {}
+        self._ticks = itertools.count()
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self.batch is not None
+    
+    @property
+    def built_at(self) -> float:
+        return self.batch.built_at if self.batch is not None else 0.0
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether NumPy and SciPy are installed for batch computation."""
+        return np is not None
+    
+    def mark_dirty(self, user_id: int) -> None:
+        """Recompute a user's suggestions on their next request (their follows changed)."""
+        with self._lock:
+            self._dirty[user_id] = next(self._ticks)
+    
+    def recommend(self, user_id: int, following_ids: List[int], limit: int) -> List[Suggestion]:
+        """Best follow candidates for a user who currently follows ``following_ids``."""
+        batch = self.batch
+        if batch is None or np is None:
+            return self._recommend_from_graph(user_id, following_ids, limit)
+        
+        marked = self._dirty.get(user_id)
+        cached = batch.overrides.get(user_id) if marked is None else None
+        if cached is None:
+            row = self._row_of(batch, user_id)
+            if row is None or marked is not None:
+                cached = self._recommend_incremental(batch, user_id, following_ids)
+                batch.overrides[user_id] = cached
+                if marked is not None:
+                    with self._lock:
+                        # A newer mark means following_ids may already be stale
+                        if self._dirty.get(user_id) == marked:
+                            del self._dirty[user_id]
+            else:
+                ids, scores, mutuals = batch.top_ids[row], batch.top_scores[row], batch.top_mutuals[row]
+                cached = [
+                    (int(candidate), float(score), int(mutual))
+                    for candidate, score, mutual in zip(ids, scores, mutuals) if candidate >= 0
+                ]
+        
+        # Candidates followed since the batch (through another worker) are filtered at read time
+        following = set(following_ids)
+        return [suggestion for suggestion in cached if suggestion[0] not in following][:limit]
+    
+    def rebuild(self, db: Session) -> None:
+        """Recompute everyone's top-K from the database."""
+        start = time.perf_counter()
+        started = next(self._ticks)
+        user_ids = np.fromiter(
+            (user_id for (user_id,) in db.query(User.id).filter(User.is_active == True).order_by(User.id)),
+            dtype=np.int64
+        )
+        follows = self._load_follows(db, user_ids)
+        self.build(user_ids, follows, self._load_engagement(db, user_ids), started)
+        logger.info(
+            "Follow recommendations built for %d users (%d edges) in %.2fs, %.1f MiB",
+            len(user_ids), follows.nnz, time.perf_counter() - start, self.memory_bytes() / 1048576
+        )
+    
+    def build(self, user_ids, follows, engagement, started: Optional[int] = None) -> None:
+        """Compute everyone's top-K from sorted ``user_ids`` and the A and L matrices over them.
+        
+        ``started`` is the tick taken before the data was read (now, by
+        default); users marked dirty since stay dirty in the new batch.
+        """
+        if started is None:
+            started = next(self._ticks)
+        n = len(user_ids)
+        top_ids = np.full((n, self.top_k), -1, dtype=np.int32)
+        top_scores = np.zeros((n, self.top_k), dtype=np.float32)
+        top_mutuals = np.zeros((n, self.top_k), dtype=np.int32)
+        
+        # One product carries both channels: the real part is mutual_weight x
+        # mutual follows, the imaginary part the weighted engagement
+        combined = (
+            follows.astype(np.complex64) * np.complex64(self.mutual_weight)
+            + engagement.astype(np.complex64) * np.complex64(1j * self.engagement_weight)
+        )
+        for first in range(0, n, self.block_size):
+            block = follows[first:first + self.block_size]
+            self._top_k_block(block, combined, first, user_ids, top_ids, top_scores, top_mutuals)
+        
+        batch = RecommendationBatch(
+            user_ids, top_ids, top_scores, top_mutuals, follows, engagement, {}, time.monotonic()
+        )
+        with self._lock:
+            self._dirty = {user_id: tick for user_id, tick in self._dirty.items() if tick > started}
+            self.batch = batch
+    
+    def memory_bytes(self) -> int:
+        """Memory held by the batch arrays and matrices."""
+        batch = self.batch
+        if batch is None:
+            return 0
+        total = batch.user_ids.nbytes + batch.top_ids.nbytes + batch.top_scores.nbytes + batch.top_mutuals.nbytes
+        for matrix in (batch.follows, batch.engagement):
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        return total
+    
+    @staticmethod
+    def _row_of(batch: RecommendationBatch, user_id: int) -> Optional[int]:
+        row = int(np.searchsorted(batch.user_ids, user_id))
+        if row < len(batch.user_ids) and batch.user_ids[row] == user_id:
+            return row
+        return None
+    
+    @staticmethod
+    def _positions(batch: RecommendationBatch, ids) -> "np.ndarray":
+        """Matrix positions of user ids, dropping ids not in the batch."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(batch.user_ids) == 0:
+            return ids[:0]
+        positions = np.minimum(np.searchsorted(batch.user_ids, ids), len(batch.user_ids) - 1)
+        return positions[batch.user_ids[positions] == ids]
+    
+    def _load_follows(self, db: Session, user_ids) -> "sparse.csr_matrix":
+        followers = array("q")
+        followings = array("q")
+        for follower_id, following_id in db.query(Follow.follower_id, Follow.following_id).execution_options(
+            yield_per=100000
+        ):
+            followers.append(follower_id)
+            followings.append(following_id)
+        return build_adjacency(
+            user_ids, np.frombuffer(followers, dtype=np.int64), np.frombuffer(followings, dtype=np.int64)
+        )
+    
+    def _load_engagement(self, db: Session, user_ids) -> "sparse.csr_matrix":
+        users = array("q")
+        authors = array("q")
+        weights = array("d")
+        # (user, author) engagement counts, from likes, comments and reposts
+        for model, user_column in ((Like, Like.user_id), (Comment, Comment.author_id), (Repost, Repost.user_id)):
+            rows = db.query(user_column, Post.author_id, func.count(model.id)).join(
+                Post, model.post_id == Post.id
+            ).group_by(user_column, Post.author_id)
+            for user_id, author_id, count in rows:
+                if user_id != author_id:
+                    users.append(user_id)
+                    authors.append(author_id)
+                    weights.append(count)
+        matrix = build_adjacency(
+            user_ids, np.frombuffer(users, dtype=np.int64), np.frombuffer(authors, dtype=np.int64),
+            np.frombuffer(weights, dtype=np.float64)
+        )
+        matrix.data = np.log1p(matrix.data).astype(np.float32)
+        return matrix
+    
+    def _top_k_block(self, block, combined, first, user_ids, top_ids, top_scores, top_mutuals) -> None:
+        n_rows = block.shape[0]
+        products = block @ combined
+        # Zero out users already followed
+        products = products - products.multiply(block)
+        products.eliminate_zeros()
+        
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(products.indptr))
+        cols = products.indices
+        data = products.real.data + products.imag.data
+        keep = rows + first != cols
+        # Most candidates share a single follow; when a row has K better ones
+        # they cannot make its top K, so drop them before sorting
+        strong = data > self.mutual_weight
+        strong_counts = np.bincount(rows[strong & keep], minlength=n_rows)
+        keep &= strong | (strong_counts[rows] < self.top_k)
+        rows, cols, data, mutual = rows[keep], cols[keep], data[keep], products.data.real[keep]
+        
+        # Rank each row's entries by score and keep the first K. One argsort
+        # on row * span - score orders by row, then score descending, and is
+        # much faster than lexsort over the two keys.
+        span = float(data.max()) + 1.0 if len(data) else 1.0
+        order = np.argsort(rows * span - data.astype(np.float64))
+        rows, cols, data, mutual = rows[order], cols[order], data[order], mutual[order]
+        starts = np.searchsorted(rows, np.arange(n_rows))
+        ranks = np.arange(len(rows)) - starts[rows]
+        keep = ranks < self.top_k
+        rows, cols, data, mutual, ranks = rows[keep], cols[keep], data[keep], mutual[keep], ranks[keep]
+        
+        top_ids[first + rows, ranks] = user_ids[cols]
+        top_scores[first + rows, ranks] = data
+        if self.mutual_weight:
+            top_mutuals[first + rows, ranks] = np.rint(mutual / self.mutual_weight)
+    
+    def _recommend_incremental(
+        self, batch: RecommendationBatch, user_id: int, following_ids: List[int]
+    ) -> List[Suggestion]:
+        followed = list(following_ids)
+        positions = self._positions(batch, followed)
+        if len(positions) == 0:
+            # Nobody they follow was in the batch (e.g. all joined since)
+            return self._recommend_from_graph(user_id, followed, self.top_k)
+        
+        mutual_rows = batch.follows[positions]
+        engagement_rows = batch.engagement[positions]
+        cols = np.concatenate([mutual_rows.indices, engagement_rows.indices])
+        weights = np.concatenate([
+            np.full(len(mutual_rows.indices), self.mutual_weight, dtype=np.float32),
+            engagement_rows.data * self.engagement_weight
+        ])
+        candidates, inverse = np.unique(cols, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        mutuals = np.bincount(inverse[:len(mutual_rows.indices)], minlength=len(candidates))
+        
+        candidate_ids = batch.user_ids[candidates]
+        excluded = np.isin(candidate_ids, np.asarray(followed + [user_id], dtype=np.int64))
+        scores[excluded] = 0
+        best = np.argsort(-scores)[:self.top_k]
+        return [
+            (int(candidate_ids[i]), float(scores[i]), int(mutuals[i]))
+            for i in best if scores[i] > 0
+        ]
+    
+    def _recommend_from_graph(self, user_id: int, following_ids: List[int], limit: int) -> List[Suggestion]:
+        """Mutual-follow counts straight from the follow graph (no batch available)."""
+        mutuals: Counter = Counter()
+        for followed_id in following_ids:
+            mutuals.update(follow_graph.following_ids(followed_id))
+        excluded = set(following_ids)
+        excluded.add(user_id)
+        return [
+            (candidate, float(count) * self.mutual_weight, count)
+            for candidate, count in mutuals.most_common()
+            if candidate not in excluded
+        ][:limit]
+
+
+def build_adjacency(user_ids, sources, targets, weights=None) -> "sparse.csr_matrix":
+    """Square (n, n) CSR matrix over ``user_ids`` positions; unknown ids are dropped."""
+    n = len(user_ids)
+    if n == 0:
+        return sparse.csr_matrix((0, 0), dtype=np.float32)
+    rows = np.searchsorted(user_ids, sources)
+    cols = np.searchsorted(user_ids, targets)
+    rows[rows >= n] = 0
+    cols[cols >= n] = 0
+    known = (user_ids[rows] == sources) & (user_ids[cols] == targets)
+    data = np.ones(int(known.sum()), dtype=np.float32) if weights is None else weights[known]
+    matrix = sparse.coo_matrix((data, (rows[known], cols[known])), shape=(n, n)).tocsr()
+    matrix.sum_duplicates()
+    return matrix
+
+
+recommender = FollowRecommender(
+    top_k=settings.RECOMMENDATIONS_TOP_K,
+    mutual_weight=settings.RECOMMENDATIONS_MUTUAL_WEIGHT,
+    engagement_weight=settings.RECOMMENDATIONS_ENGAGEMENT_WEIGHT
+)
+
+
+async def refresh_recommendations(session_factory: Callable[[], Session], interval: float) -> None:
+    """Rebuild ``recommender`` in a worker thread every ``interval`` seconds."""
+    def run() -> None:
+        db = session_factory()
+        try:
+            recommender.rebuild(db)
+        finally:
+            db.close()
+    
+    while True:
+        try:
+            await asyncio.to_thread(run)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Follow recommendations rebuild failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,152 @@
+"""
+Upload service for resumable chunked uploads.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+from app.models.upload import UploadSession, UploadSessionStatus
+
+
+def upload_path(*parts: str) -> str:
+    """Path under ``UPLOAD_DIR``; uploads are written and served through this."""
+    return os.path.join(settings.UPLOAD_DIR, *parts)
+
+
+MEDIA_DIR = upload_path("media")
+PROFILE_PICS_DIR = upload_path("profile_pics")
+PARTIAL_DIR = upload_path("partial")
+
+for directory in (MEDIA_DIR, PROFILE_PICS_DIR, PARTIAL_DIR):
+    os.makedirs(directory, exist_ok=True)
+
+
+class UploadService:
+    """Service for managing resumable upload sessions."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def partial_path(session: UploadSession) -> str:
+        """Get the path of the preallocated file chunks are written into."""
+        return os.path.join(PARTIAL_DIR, session.id)
+    
+    def open_sessions(self, user_id: int) -> Tuple[int, int]:
+        """Count a user's pending sessions and the bytes they reserve.
+        
+        Locks the user's row until the next commit, so concurrent requests
+        of one user check their quota one after another.
+        """
+        self.db.query(User.id).filter(User.id == user_id).with_for_update().first()
+        count, reserved = self.db.query(
+            func.count(UploadSession.id), func.coalesce(func.sum(UploadSession.total_size), 0)
+        ).filter(
+            UploadSession.user_id == user_id,
+            UploadSession.status == UploadSessionStatus.PENDING,
+            UploadSession.expires_at > datetime.now(timezone.utc)
+        ).one()
+        return count, reserved
+    
+    def create_session(
+        self,
+        user_id: int,
+        original_filename: str,
+        content_type: str,
+        media_type: str,
+        total_size: int
+    ) -> UploadSession:
+        """Create an upload session; ``preallocate`` its file next."""
+        file_extension = os.path.splitext(original_filename)[1]
+        session = UploadSession(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            filename=f"{uuid.uuid4()}{file_extension}",
+            content_type=content_type,
+            media_type=media_type,
+            total_size=total_size,
+            received_bytes=0,
+            status=UploadSessionStatus.PENDING,
+            expires_at=self._next_expiry()
+        )
+        
+        self.db.add(session)
+        self.db.commit()
+        self.db.refresh(session)
+        
+        return session
+    
+    @classmethod
+    def preallocate(cls, session: UploadSession) -> None:
+        """Reserve the full size of a session's file up front so chunks never grow it.
+        
+        This blocks until the space is allocated; run it in a worker thread.
+        """
+        with open(cls.partial_path(session), 'wb') as f:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, session.total_size)
+            else:
+                f.truncate(session.total_size)
+    
+    def get_session(self, session_id: str, user_id: int) -> UploadSession:
+        """Get a pending upload session owned by a user."""
+        return self.db.query(UploadSession).filter(
+            UploadSession.id == session_id,
+            UploadSession.user_id == user_id,
+            UploadSession.status == UploadSessionStatus.PENDING,
+            UploadSession.expires_at > datetime.now(timezone.utc)
+        ).first()
+    
+    def record_chunk(self, session: UploadSession, end_offset: int) -> UploadSession:
+        """Record that bytes up to end_offset are on disk and extend the expiry."""
+        session.received_bytes = max(session.received_bytes, end_offset)
+        session.expires_at = self._next_expiry()
+        self.db.commit()
+        self.db.refresh(session)
+        
+        return session
+    
+    def finalize(self, session: UploadSession) -> str:
+        """Move a fully received upload into the media directory."""
+        final_path = os.path.join(MEDIA_DIR, session.filename)
+        os.replace(self.partial_path(session), final_path)
+        
+        session.status = UploadSessionStatus.COMPLETE
+        self.db.commit()
+        
+        return f"/api/v1/uploads/media/{session.filename}"
+    
+    def abort(self, session: UploadSession) -> None:
+        """Delete an upload session and its partial file."""
+        self._remove_partial(session)
+        self.db.delete(session)
+        self.db.commit()
+    
+    def expire_stale_sessions(self) -> int:
+        """Remove pending sessions past their expiry together with their files."""
+        stale_sessions = self.db.query(UploadSession).filter(
+            UploadSession.status == UploadSessionStatus.PENDING,
+            UploadSession.expires_at <= datetime.now(timezone.utc)
+        ).all()
+        
+        for session in stale_sessions:
+            self._remove_partial(session)
+            self.db.delete(session)
+        
+        if stale_sessions:
+            self.db.commit()
+        return len(stale_sessions)
+    
+    def _remove_partial(self, session: UploadSession) -> None:
+        try:
+            os.remove(self.partial_path(session))
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def _next_expiry() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
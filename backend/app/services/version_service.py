@@ -0,0 +1,68 @@
+"""
+Version service for cheap change detection behind conditional GETs.
+"""
+from typing import List, Optional, Tuple
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+from app.models.post import Post
+from app.models.user import User
+from app.schemas.serializers import post_fragment_version
+from app.services.like_counter import like_counter
+from app.services.loaders import RequestLoaders
+
+OriginalPost = aliased(Post)
+OriginalAuthor = aliased(User)
+
+
+class VersionService:
+    """Compute version tuples of resources without serializing them.
+    
+    A version covers the post and the post it reposts (``updated_at`` of
+    both and of their authors, whether the original is still shown) and the
+    post's maintained counters. Author cards carry no counters, so nothing
+    else they show changes without their ``updated_at``.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def post_version(self, post_id: int) -> Optional[Tuple]:
+        """Get the version of a single post, or None if it does not exist."""
+        row = self._post_rows().filter(Post.id == post_id, User.is_active == True).first()
+        
+        return tuple(row) + (like_counter.pending(post_id),) if row else None
+    
+    @staticmethod
+    def feed_page_version(rows: List[Row], total: int, loaders: RequestLoaders) -> Tuple:
+        """Get the version of a page from its ``fetch_post_rows`` rows and the feed's ``total``.
+        
+        Polls read the page once: the reposted originals are loaded through
+        ``loaders.posts``, where encoding the page finds them again.
+        """
+        loaders.posts.queue(row.original_post_id for row in rows if row.is_repost)
+        return (total, tuple(
+            (
+                row.id,
+                post_fragment_version(row, loaders.posts.get(row.original_post_id) if row.is_repost else None),
+                row.likes_count + like_counter.pending(row.id),
+                row.comments_count,
+                row.reposts_count,
+            )
+            for row in rows
+        ))
+    
+    def _post_rows(self):
+        return self.db.query(
+            Post.id,
+            Post.updated_at,
+            User.updated_at,
+            Post.likes_count,
+            Post.comments_count,
+            Post.reposts_count,
+            Post.original_post_id,
+            OriginalPost.updated_at,
+            OriginalAuthor.updated_at,
+            OriginalAuthor.is_active
+        ).join(User, Post.author_id == User.id).outerjoin(
+            OriginalPost, Post.original_post_id == OriginalPost.id
+        ).outerjoin(OriginalAuthor, OriginalPost.author_id == OriginalAuthor.id)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes on the wire and CPU cost of compressing feed responses.
+
+Builds synthetic 100-item ``PostFeed`` and notification list payloads shaped
+like the real responses (every post embeds its full author) and compresses
+them with each available encoding at the configured level.
+
+Usage: python benchmarks/bench_compression.py [iterations]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.compression import SUPPORTED_ENCODINGS, create_compressor
+
+
+def make_user(user_id: int) -> dict:
+    return {
+        "email": f"user{user_id}@example.com",
+        "username": f"user_{user_id}",
+        "full_name": f"User Number {user_id}",
+        "bio": "Software developer passionate about technology and innovation.",
+        "location": "San Francisco, CA",
+        "website": f"https://user{user_id}.dev",
+        "is_private": False,
+        "id": user_id,
+        "avatar_url": f"/api/v1/uploads/profile-pictures/{user_id:08d}-6f1c-4c1e-9d1a-3b7e0c2f9a41.jpg",
+        "cover_url": None,
+        "is_active": True,
+        "is_verified": user_id % 3 == 0,
+        "followers_count": 1200 + user_id,
+        "following_count": 340 + user_id,
+        "posts_count": 87 + user_id,
+        "created_at": "2025-06-01T12:00:00+00:00",
+        "updated_at": None,
+    }
+
+
+def make_feed(items: int = 100) -> dict:
+    now = datetime(2025, 9, 5, 13, 40)
+    posts = []
+    for i in range(items):
+        author_id = i % 20 + 1
+        posts.append({
+            "content": f"Post {i}: shipping a new feature today, feedback welcome! #buildinpublic",
+            "media_url": f"/api/v1/uploads/media/{i:08d}-2b4c-4f0e-8a55-9f1d2c3b4a5e.jpg" if i % 4 == 0 else None,
+            "media_type": "image" if i % 4 == 0 else None,
+            "id": 10000 - i,
+            "author_id": author_id,
+            "parent_id": None,
+            "is_reply": False,
+            "is_repost": False,
+            "original_post_id": None,
+            "likes_count": i * 7 % 150,
+            "comments_count": i * 3 % 40,
+            "reposts_count": i % 12,
+            "total_engagement": i * 7 % 150 + i * 3 % 40 + i % 12,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": None,
+            "author": make_user(author_id),
+            "is_liked": i % 5 == 0,
+            "is_reposted": False,
+        })
+    return {"posts": posts, "total": 5000, "page": 1, "size": items, "has_next": True, "has_prev": False}
+
+
+def make_notifications(items: int = 100) -> list:
+    now = datetime(2025, 9, 5, 13, 40)
+    return [
+        {
+            "type": "like",
+            "title": "New Like",
+            "message": f"User Number {i % 20 + 1} liked your post",
+            "post_id": 10000 - i,
+            "comment_id": None,
+            "id": 50000 - i,
+            "user_id": 1,
+            "actor_id": i % 20 + 1,
+            "is_read": i > 10,
+            "is_archived": False,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": None,
+            "actor": {
+                "id": i % 20 + 1,
+                "username": f"user_{i % 20 + 1}",
+                "full_name": f"User Number {i % 20 + 1}",
+                "avatar_url": None,
+                "is_verified": False,
+            },
+        }
+        for i in range(items)
+    ]
+
+
+def measure(name: str, payload: bytes, iterations: int) -> None:
+    print(f"\n{name}: {len(payload):,} bytes uncompressed")
+    for encoding in SUPPORTED_ENCODINGS:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            compressor = create_compressor(encoding)
+            compressed = compressor.compress(payload) + compressor.finish()
+        per_request = (time.perf_counter() - start) / iterations * 1e6
+        ratio = len(compressed) / len(payload) * 100
+        print(f"  {encoding:>5}: {len(compressed):8,} bytes ({ratio:5.1f}%)  {per_request:8.1f} us CPU/request")
+
+
+def main(iterations: int):
+    measure("PostFeed, 100 posts", json.dumps(make_feed()).encode(), iterations)
+    measure("Notifications, 100 items", json.dumps(make_notifications()).encode(), iterations)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
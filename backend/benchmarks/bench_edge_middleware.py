@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-request overhead of the edge middleware.
+
+Compares the previous ``@app.middleware("http")`` timing decorator
+(BaseHTTPMiddleware) with the pure ASGI EdgeMiddleware by driving a trivial
+Starlette app directly through the ASGI interface, so no server or network
+time is included. Also reports the cost of the metrics middleware on top.
+
+Usage: python benchmarks/bench_edge_middleware.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.metrics import MetricsMiddleware
+from app.core.middleware import EdgeMiddleware
+
+
+async def endpoint(request):
+    return PlainTextResponse("ok")
+
+
+async def add_process_time_header(request, call_next):
+    """The timing middleware as it was before EdgeMiddleware."""
+    start_time = time.time()
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = str(time.time() - start_time)
+    return response
+
+
+def build_apps():
+    routes = [Route("/ping", endpoint)]
+    return {
+        "no middleware": Starlette(routes=routes),
+        "BaseHTTPMiddleware": Starlette(
+            routes=routes,
+            middleware=[Middleware(BaseHTTPMiddleware, dispatch=add_process_time_header)]
+        ),
+        "EdgeMiddleware": Starlette(
+            routes=routes,
+            middleware=[Middleware(EdgeMiddleware, allow_origins=["http://localhost:3000"])]
+        ),
+        "Edge + Metrics": Starlette(
+            routes=routes,
+            middleware=[
+                Middleware(EdgeMiddleware, allow_origins=["http://localhost:3000"]),
+                Middleware(MetricsMiddleware),
+            ]
+        ),
+    }
+
+
+async def drive(app, requests: int) -> float:
+    """Return seconds spent serving ``requests`` GET /ping calls."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        pass
+    
+    def make_scope():
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+            "query_string": b"", "root_path": "", "server": ("testserver", 80),
+            "client": ("127.0.0.1", 50000), "headers": [(b"host", b"testserver")],
+        }
+    
+    # Warm up (builds the middleware stack)
+    for _ in range(200):
+        await app(make_scope(), receive, send)
+    
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(), receive, send)
+    return time.perf_counter() - start
+
+
+async def main(requests: int):
+    results = {name: await drive(app, requests) for name, app in build_apps().items()}
+    baseline = results["no middleware"]
+    print(f"{requests} requests per variant")
+    for name, elapsed in results.items():
+        per_request = elapsed / requests * 1e6
+        overhead = (elapsed - baseline) / requests * 1e6
+        print(f"{name:>20}: {per_request:8.2f} us/request  (+{overhead:.2f} us middleware overhead)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency and query count of one user profile read.
+
+"before" reproduces the previous handler: the full ``User`` entity, two
+follow checks, counts of followers and following and a lazy load of every
+post. The other paths go through ``ProfileService``: a cache miss (one
+aggregated statement), a cache hit (one ``EXISTS`` probe for the viewer's
+flags) and a hit with the follow graph loaded (no query). Absolute numbers
+are lower on SQLite than on PostgreSQL; the ratio is what matters.
+
+Usage: DATABASE_URL=sqlite:///bench.db python benchmarks/bench_profile.py [iterations]
+"""
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DEBUG", "false")
+
+from sqlalchemy import event, func
+
+from app.db.database import Base, SessionLocal, engine
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Follow
+from app.services.counter_service import CounterService
+from app.services.follow_graph import follow_graph
+from app.services.profile_service import ProfileService, profile_cache
+
+USERS = 2000
+POSTS = 20000
+FOLLOWING = 50
+
+queries = 0
+
+
+def count_query(*args):
+    global queries
+    queries += 1
+
+
+def seed(db):
+    random.seed(42)
+    db.add_all([
+        User(id=i, email=f"u{i}@example.com", username=f"user_{i}", full_name=f"User {i}", hashed_password="x")
+        for i in range(1, USERS + 1)
+    ])
+    db.add_all([
+        Post(id=i, content=f"Post {i}", author_id=random.randint(1, USERS))
+        for i in range(1, POSTS + 1)
+    ])
+    db.add_all([
+        Follow(follower_id=a, following_id=b)
+        for a in range(1, USERS + 1) for b in random.sample(range(1, USERS + 1), FOLLOWING) if a != b
+    ])
+    db.commit()
+    CounterService(db).recompute()
+
+
+def before(db, user_id: int, viewer_id: int):
+    user = db.query(User).filter(User.id == user_id).first()
+    is_following = db.query(Follow).filter(
+        Follow.follower_id == viewer_id, Follow.following_id == user_id
+    ).first() is not None
+    is_followed_by = db.query(Follow).filter(
+        Follow.follower_id == user_id, Follow.following_id == viewer_id
+    ).first() is not None
+    followers = db.query(func.count(Follow.id)).filter(Follow.following_id == user_id).scalar()
+    following = db.query(func.count(Follow.id)).filter(Follow.follower_id == user_id).scalar()
+    posts = len(user.posts)
+    return {
+        'id': user.id, 'username': user.username, 'bio': user.bio, 'avatar_url': user.avatar_url,
+        'followers_count': followers, 'following_count': following, 'posts_count': posts,
+        'is_following': is_following, 'is_followed_by': is_followed_by,
+    }
+
+
+def cache_miss(db, user_id: int, viewer_id: int):
+    profile_cache.invalidate(user_id)
+    return ProfileService(db).get_profile(user_id, viewer_id)
+
+
+def cache_hit(db, user_id: int, viewer_id: int):
+    return ProfileService(db).get_profile(user_id, viewer_id)
+
+
+def measure(fn, iterations: int):
+    """Return (p50 µs, p99 µs, queries per read) over random profile/viewer pairs."""
+    global queries
+    rng = random.Random(7)
+    timings = []
+    queries = 0
+    db = SessionLocal()
+    for _ in range(iterations):
+        user_id, viewer_id = rng.randint(1, USERS), rng.randint(1, USERS)
+        start = time.perf_counter()
+        fn(db, user_id, viewer_id)
+        timings.append(time.perf_counter() - start)
+        db.expunge_all()
+    db.close()
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6, queries / iterations
+
+
+def main(iterations: int = 2000):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.query(User).count() == 0:
+        seed(db)
+    db.close()
+    
+    event.listen(engine, "before_cursor_execute", count_query)
+    
+    # Warm the cache for every user
+    db = SessionLocal()
+    for user_id in range(1, USERS + 1):
+        ProfileService(db).get_profile(user_id)
+    db.close()
+    
+    results = [
+        ("before", measure(before, iterations)),
+        ("cache miss", measure(cache_miss, iterations)),
+        ("cache hit", measure(cache_hit, iterations)),
+    ]
+    db = SessionLocal()
+    follow_graph.rebuild(db)
+    db.close()
+    results.append(("hit + graph", measure(cache_hit, iterations)))
+    
+    print(f"Profile read ({USERS:,} users, {POSTS:,} posts, ~{FOLLOWING} follows each)")
+    for label, (p50, p99, per_read) in results:
+        print(f"  {label:>11}: p50 {p50:8.1f} µs  p99 {p99:8.1f} µs  {per_read:.1f} queries")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency and memory of one 100-item feed / notification page.
+
+"orm" reproduces the previous read path: full ``Post`` / ``Notification``
+entities with joined authors, counters from ``len()`` over lazy-loaded
+relationships, and per-row dict building. "rows" is the projection path in
+``app.db.queries``. Both run against a seeded SQLite database, so absolute
+numbers are lower than on PostgreSQL; the ratio is what matters.
+
+Usage: DATABASE_URL=sqlite:///bench.db python benchmarks/bench_read_path.py
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DEBUG", "false")
+
+from sqlalchemy.orm import joinedload
+
+from app.db.database import Base, SessionLocal, engine
+from app.db.queries import fetch_post_rows, fetch_notification_rows
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Like, Comment, Repost, Follow
+from app.models.notification import Notification, NotificationType
+from app.schemas.serializers import serialize_post, serialize_notification
+from app.services.loaders import RequestLoaders
+
+USERS = 200
+POSTS = 5000
+PAGE = 100
+
+
+def seed(db):
+    random.seed(42)
+    db.add_all([
+        User(id=i, email=f"u{i}@example.com", username=f"user_{i}", full_name=f"User {i}", hashed_password="x")
+        for i in range(1, USERS + 1)
+    ])
+    db.add_all([
+        Post(id=i, content=f"Post {i}", author_id=random.randint(1, USERS))
+        for i in range(1, POSTS + 1)
+    ])
+    db.add_all([
+        Follow(follower_id=a, following_id=b)
+        for a in range(1, USERS + 1) for b in random.sample(range(1, USERS + 1), 20) if a != b
+    ])
+    db.add_all([
+        Like(user_id=u, post_id=p)
+        for p in range(POSTS - 500, POSTS + 1) for u in random.sample(range(1, USERS + 1), 10)
+    ])
+    db.add_all([
+        Comment(content="Nice!", author_id=random.randint(1, USERS), post_id=p)
+        for p in range(POSTS - 500, POSTS + 1)
+    ])
+    db.add_all([
+        Notification(user_id=1, actor_id=random.randint(2, USERS), type=NotificationType.LIKE,
+                     title="New Like", message="Someone liked your post", post_id=random.randint(1, POSTS))
+        for _ in range(500)
+    ])
+    db.commit()
+
+
+def orm_posts(db):
+    posts = db.query(Post).options(joinedload(Post.author)).order_by(Post.created_at.desc()).limit(PAGE).all()
+    return [
+        {
+            'id': post.id, 'content': post.content, 'author_id': post.author_id,
+            'likes_count': post.likes_count, 'comments_count': post.comments_count,
+            'reposts_count': post.reposts_count, 'created_at': post.created_at,
+            'author': {
+                'id': post.author.id, 'username': post.author.username,
+                'followers_count': post.author.followers_count,
+                'following_count': post.author.following_count,
+                'posts_count': post.author.posts_count,
+            },
+        }
+        for post in posts
+    ]
+
+
+def row_posts(db):
+    return [serialize_post(row) for row in fetch_post_rows(db, [], 0, PAGE)]
+
+
+def orm_notifications(db):
+    notifications = db.query(Notification).filter(Notification.user_id == 1).options(
+        joinedload(Notification.actor)
+    ).order_by(Notification.created_at.desc()).limit(PAGE).all()
+    return [
+        {
+            'id': n.id, 'type': n.type, 'title': n.title, 'message': n.message,
+            'created_at': n.created_at,
+            'actor': {'id': n.actor.id, 'username': n.actor.username} if n.actor else None,
+        }
+        for n in notifications
+    ]
+
+
+def row_notifications(db):
+    rows = fetch_notification_rows(db, [Notification.user_id == 1], 0, PAGE)
+    loaders = RequestLoaders(db)
+    loaders.user_cards.queue(row.actor_id for row in rows)
+    return [serialize_notification(row, loaders.user_cards.get(row.actor_id)) for row in rows]
+
+
+def measure(fn, iterations: int):
+    """Return (ms per page, peak KiB allocated) using a fresh session per page."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        db = SessionLocal()
+        fn(db)
+        db.close()
+    elapsed_ms = (time.perf_counter() - start) / iterations * 1e3
+    
+    db = SessionLocal()
+    tracemalloc.start()
+    fn(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    return elapsed_ms, peak / 1024
+
+
+def main(iterations: int = 20):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if db.query(User).count() == 0:
+        seed(db)
+    db.close()
+    
+    for label, orm_fn, row_fn in (
+        ("posts page", orm_posts, row_posts),
+        ("notifications page", orm_notifications, row_notifications),
+    ):
+        orm_ms, orm_kib = measure(orm_fn, iterations)
+        row_ms, row_kib = measure(row_fn, iterations)
+        print(f"{label} ({PAGE} items)")
+        print(f"   orm: {orm_ms:8.2f} ms  peak {orm_kib:9.1f} KiB")
+        print(f"  rows: {row_ms:8.2f} ms  peak {row_kib:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialize time for one 100-post feed page.
+
+"validated" reproduces the previous path: a ``PostWithAuthor(**post_dict)``
+per post, a ``PostFeed`` around them, then FastAPI's ``response_model``
+validation and JSON encoding. "fast" is the current path: plain dicts from
+``app.schemas.serializers`` encoded by orjson. Rows are in-memory stand-ins
+for ORM objects so no database time is included.
+
+Usage: python benchmarks/bench_serialization.py [iterations]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.post import PostWithAuthor, PostFeed
+from app.schemas.serializers import serialize_post, serialize_feed
+
+
+def make_rows(count: int = 100):
+    now = datetime(2025, 9, 5, 13, 40, tzinfo=timezone.utc)
+    authors = [
+        SimpleNamespace(
+            id=i, email=f"user{i}@example.com", username=f"user_{i}", full_name=f"User {i}",
+            bio="Software developer passionate about technology.", location="Austin, TX",
+            website=f"https://user{i}.dev", is_private=False, avatar_url=None, cover_url=None,
+            is_active=True, is_verified=False, followers_count=100 + i, following_count=50 + i,
+            posts_count=20 + i, created_at=now, updated_at=None
+        )
+        for i in range(1, 21)
+    ]
+    return [
+        SimpleNamespace(
+            id=1000 - i, content=f"Post number {i} with some text to make it realistic #python",
+            media_url=None, media_type=None, author_id=authors[i % 20].id, parent_id=None,
+            is_reply=False, is_repost=False, original_post_id=None, likes_count=i % 50,
+            comments_count=i % 7, reposts_count=i % 3, total_engagement=i % 50 + i % 7 + i % 3,
+            created_at=now - timedelta(minutes=i), updated_at=None, author=authors[i % 20]
+        )
+        for i in range(count)
+    ]
+
+
+def as_projection_row(post):
+    """Flatten a post and its author the way ``app.db.queries`` labels columns."""
+    fields = {k: v for k, v in vars(post).items() if k != "author"}
+    fields.update({f"author_{k}": v for k, v in vars(post.author).items() if k != "id"})
+    return SimpleNamespace(**fields)
+
+
+def validated_path(posts) -> bytes:
+    post_responses = []
+    for post in posts:
+        post_dict = {
+            'id': post.id, 'content': post.content, 'media_url': post.media_url,
+            'media_type': post.media_type, 'author_id': post.author_id, 'parent_id': post.parent_id,
+            'is_reply': post.is_reply, 'is_repost': post.is_repost,
+            'original_post_id': post.original_post_id, 'likes_count': post.likes_count,
+            'comments_count': post.comments_count, 'reposts_count': post.reposts_count,
+            'total_engagement': post.total_engagement, 'created_at': post.created_at,
+            'updated_at': post.updated_at, 'author': post.author
+        }
+        post_responses.append(PostWithAuthor(**post_dict))
+    feed = PostFeed(posts=post_responses, total=5000, page=1, size=len(posts), has_next=True, has_prev=False)
+    # What FastAPI does with response_model=PostFeed before JSONResponse renders it
+    validated = PostFeed.model_validate(feed.model_dump())
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+
+def fast_path(rows) -> bytes:
+    return orjson.dumps(serialize_feed([serialize_post(row) for row in rows], 5000, 1, len(rows)))
+
+
+def bench(fn, posts, iterations: int) -> float:
+    fn(posts)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(posts)
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main(iterations: int):
+    posts = make_rows()
+    validated_ms = bench(validated_path, posts, iterations)
+    fast_ms = bench(fast_path, [as_projection_row(post) for post in posts], iterations)
+    print(f"Serialize one 100-post feed page ({iterations} iterations)")
+    print(f"  validated: {validated_ms:7.3f} ms/page")
+    print(f"       fast: {fast_ms:7.3f} ms/page  ({validated_ms / fast_ms:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Stress test: concurrent like / repost / follow writes stay consistent.
+
+Worker threads (one session each) hammer a handful of hot pairs with random
+set/clear calls through ``InteractionService``, the way double-taps and
+retries do. Afterwards it checks that no call raised, that stored counters
+match a recount of ``follows``, ``posts``, ``likes`` and ``reposts`` (plus any buffered
+like deltas with ``LIKE_COUNTER_MODE`` set), that every repost has exactly
+one repost entry, and that exactly one notification exists per change the
+service reported. Use PostgreSQL for real row-level concurrency; SQLite
+serializes writers but still interleaves the transactions.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/stress_interactions.py [threads] [ops]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///stress.db")
+os.environ.setdefault("DEBUG", "false")
+
+from sqlalchemy import func
+
+from app.db.database import Base, SessionLocal, engine
+from app.models.user import User
+from app.models.post import Post
+from app.models.interaction import Like, Repost, Follow
+from app.models.notification import Notification, NotificationType
+from app.models.site_counter import SiteCounter
+from app.services.counter_service import PUBLIC_POSTS, CounterService
+from app.services.interaction_service import InteractionService
+from app.services.like_counter import like_counter
+
+USERS = 6
+POSTS = 3
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+OPS = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    # Every post is by user 1, so likes and reposts by the others notify
+    db.add_all([
+        User(id=i, email=f"u{i}@example.com", username=f"user_{i}", full_name=f"User {i}", hashed_password="x",
+             posts_count=POSTS if i == 1 else 0)
+        for i in range(1, USERS + 1)
+    ])
+    db.add_all([Post(id=i, content=f"Post {i}", author_id=1) for i in range(1, POSTS + 1)])
+    db.query(SiteCounter).filter(SiteCounter.name == PUBLIC_POSTS).update({SiteCounter.value: POSTS})
+    db.commit()
+    db.close()
+
+
+def worker(seed_value: int, created: Counter, errors: list, lock: threading.Lock):
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    local = Counter()
+    try:
+        users = {user.id: user for user in db.query(User)}
+        posts = {post.id: post for post in db.query(Post).filter(Post.id <= POSTS)}
+        for _ in range(OPS):
+            interactions = InteractionService(db)
+            user = users[rng.randint(2, USERS)]
+            post = posts[rng.randint(1, POSTS)]
+            action = rng.choice(("like", "unlike", "repost", "unrepost", "follow", "unfollow"))
+            try:
+                if action == "like":
+                    local[NotificationType.LIKE] += interactions.like(user, post)
+                elif action == "unlike":
+                    interactions.unlike(user.id, post.id)
+                elif action == "repost":
+                    local[NotificationType.REPOST] += interactions.repost(user, post)
+                elif action == "unrepost":
+                    interactions.unrepost(user.id, post.id)
+                elif action == "follow":
+                    target = users[rng.choice([i for i in users if i != user.id])]
+                    local[NotificationType.FOLLOW] += interactions.follow(user, target) is not None
+                else:
+                    interactions.unfollow(user.id, rng.choice([i for i in users if i != user.id]))
+            except Exception as exc:
+                db.rollback()
+                errors.append(f"{action}: {exc!r}")
+    finally:
+        db.close()
+        with lock:
+            created.update(local)
+
+
+def check(created: Counter) -> list:
+    db = SessionLocal()
+    problems = []
+    for user in db.query(User):
+        expected = (
+            db.query(func.count(Follow.id)).filter(Follow.following_id == user.id).scalar(),
+            db.query(func.count(Follow.id)).filter(Follow.follower_id == user.id).scalar(),
+            db.query(func.count(Post.id)).filter(Post.author_id == user.id).scalar(),
+        )
+        stored = (user.followers_count, user.following_count, user.posts_count)
+        if stored != expected:
+            problems.append(f"user {user.id}: counters {stored} != recount {expected}")
+    
+    for post in db.query(Post).filter(Post.id <= POSTS):
+        likes = db.query(func.count(Like.id)).filter(Like.post_id == post.id).scalar()
+        stored = post.likes_count + like_counter.pending(post.id)
+        if stored != likes:
+            problems.append(f"post {post.id}: likes_count {stored} != recount {likes}")
+        reposts = db.query(func.count(Repost.id)).filter(Repost.post_id == post.id).scalar()
+        if post.reposts_count != reposts:
+            problems.append(f"post {post.id}: reposts_count {post.reposts_count} != recount {reposts}")
+    
+    reposts = db.query(func.count(Repost.id)).scalar()
+    repost_posts = db.query(func.count(Post.id)).filter(Post.is_repost == True).scalar()
+    if reposts != repost_posts:
+        problems.append(f"{reposts} reposts but {repost_posts} repost entries")
+    public_posts = db.query(func.count(Post.id)).scalar()
+    if CounterService(db).public_posts() != public_posts:
+        problems.append(f"public post count {CounterService(db).public_posts()} != recount {public_posts}")
+    
+    for type in (NotificationType.LIKE, NotificationType.REPOST, NotificationType.FOLLOW):
+        stored = db.query(func.count(Notification.id)).filter(Notification.type == type).scalar()
+        if stored != created[type]:
+            problems.append(f"{type.value}: {stored} notifications for {created[type]} changes")
+    
+    likes = db.query(func.count(Like.id)).scalar()
+    follows = db.query(func.count(Follow.id)).scalar()
+    print(f"Final state: {likes} likes, {reposts} reposts, {follows} follows")
+    db.close()
+    return problems
+
+
+def main():
+    seed()
+    created: Counter = Counter()
+    errors: list = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=worker, args=(i, created, errors, lock)) for i in range(THREADS)]
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    print(f"{THREADS} threads x {OPS} ops in {elapsed:.1f}s; changes: "
+          + ", ".join(f"{type.value}={count}" for type, count in sorted(created.items(), key=lambda item: item[0].value)))
+    problems = [f"error: {error}" for error in errors] + check(created)
+    for problem in problems:
+        print(problem)
+    print("FAILED" if problems else "OK: counters and notifications consistent")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
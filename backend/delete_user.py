@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Delete a user and everything they created, in batches.
+
+Runs the same job as a self-service account deletion (DELETE /api/v1/users/me)
+in the foreground: the user is deactivated, then follows, likes, reposts,
+comments, posts and notifications are removed a batch at a time, each batch
+committed together with the job's progress. Re-run it to resume after an
+interruption:
+    python delete_user.py <user_id> [batch_size] [pause_ms]
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.user import User
+from app.services.account_deletion import AccountDeletionService
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    
+    user_id = int(sys.argv[1])
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else settings.ACCOUNT_DELETION_BATCH_SIZE
+    pause_ms = float(sys.argv[3]) if len(sys.argv) > 3 else settings.ACCOUNT_DELETION_BATCH_PAUSE_MS
+    db = SessionLocal()
+    try:
+        service = AccountDeletionService(db)
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            service.request(user)
+        
+        deletion = service.claim(settings.ACCOUNT_DELETION_LEASE_SECONDS, user_id=user_id)
+        if deletion is None:
+            print(f"No pending deletion for user {user_id} (unknown, finished, or held by a worker)")
+            sys.exit(1)
+        
+        print(f"Deleting user {user_id}, starting at stage '{deletion.stage}'")
+        service.run(deletion, batch_size, pause_ms / 1000, settings.ACCOUNT_DELETION_LEASE_SECONDS)
+        print(f"Deleted user {user_id}: {deletion.deleted_rows} rows in {deletion.batches} batches")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
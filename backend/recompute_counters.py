@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Recompute the maintained user counters (followers, following, posts)
+and post counters (likes, comments, reposts) from the source tables.
+
+Run after bulk imports or restores, or if counters ever drift:
+    python recompute_counters.py [batch_size]
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.database import SessionLocal
+from app.services.counter_service import CounterService
+from app.services.like_counter import like_counter
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    db = SessionLocal()
+    try:
+        updated = CounterService(db).recompute(batch_size=batch_size)
+        print(f"Recomputed user and post counters ({updated} users)")
+        corrected = like_counter.reconcile(db, batch_size=batch_size)
+        print(f"Corrected likes_count of {corrected} posts")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
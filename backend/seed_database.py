@@ -19,6 +19,8 @@ from app.models.post import Post
 from app.models.interaction import Like, Comment, Repost, Follow
 from app.models.notification import Notification
 from app.core.config import settings
+from app.services.counter_service import CounterService
+from app.services.like_counter import like_counter
 
 def create_sample_users(db: Session):
     """Create sample users"""
@@ -323,6 +325,10 @@ def main():
         create_sample_interactions(db, users, posts)
         print("✅ Created likes, comments, reposts, and follows")
         
+        # Sample rows were inserted directly, so bring the counters up to date
+        CounterService(db).recompute()
+        like_counter.reconcile(db)
+        
         print("🎉 Database seeding completed successfully!")
         print("\n📋 Sample users created:")
         for user in users:
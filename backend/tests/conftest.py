@@ -0,0 +1,87 @@
+"""
+Shared fixtures: an app on a throwaway SQLite database (and upload dir), reset per test.
+"""
+import os
+import tempfile
+from typing import Dict, NamedTuple
+
+# Configure before the app (and its settings) are imported
+_db_dir = tempfile.mkdtemp(prefix="socioconnect-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_db_dir, "uploads")
+os.environ["DEBUG"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["FOLLOW_GRAPH_ENABLED"] = "false"
+os.environ["RECOMMENDATIONS_ENABLED"] = "false"
+os.environ["ACCOUNT_DELETION_WORKER_ENABLED"] = "false"
+os.environ["LOG_FORMAT"] = "text"
+os.environ["LOG_ACCESS"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.security import create_access_token, get_password_hash, verified_tokens
+from app.db.database import Base, SessionLocal, engine
+from app.models.user import User
+from app.services.fragment_cache import post_fragment_cache
+from app.services.follow_graph import follow_graph
+from app.services.profile_service import profile_cache
+
+pytest_plugins = ["app.db.pytest_plugin"]
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app, base_url="http://localhost") as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clean_database(client):
+    """Start every test with empty tables and caches."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    post_fragment_cache.clear()
+    profile_cache.clear()
+    verified_tokens.clear()
+    follow_graph.__init__()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+PASSWORD = "password123"
+_password_hash = None
+
+
+class TestUser(NamedTuple):
+    id: int
+    headers: Dict[str, str]
+
+
+@pytest.fixture
+def make_user(db):
+    """Create an active user by name; returns their id and auth headers.
+    
+    Users are inserted directly (the password is hashed once per session),
+    registration itself is covered by the auth endpoints.
+    """
+    def create(name: str) -> TestUser:
+        global _password_hash
+        if _password_hash is None:
+            _password_hash = get_password_hash(PASSWORD)
+        
+        user = User(email=f"{name}@example.com", username=name, full_name=name.title(), hashed_password=_password_hash)
+        db.add(user)
+        db.commit()
+        return TestUser(user.id, {"Authorization": "Bearer " + create_access_token(user.id)})
+    
+    return create
@@ -0,0 +1,131 @@
+"""
+Post deletion and account deletion cascades.
+"""
+from app.core.config import settings
+from app.models.account_deletion import AccountDeletion, AccountDeletionStatus
+from app.models.interaction import Comment, Follow, Like, Repost
+from app.models.post import Post
+from app.models.user import User
+from app.services.account_deletion import AccountDeletionService
+from app.services.interaction_service import InteractionService
+from tests.conftest import PASSWORD
+from tests.test_interactions import INTERACTIONS, create_post
+
+
+def purge(db, user_id, batch_size=2, until_stage=None):
+    """Run a pending account deletion as the background job would, to the end or up to ``until_stage``."""
+    # No lease, so a later call picks the deletion up again
+    service = AccountDeletionService(db)
+    deletion = service.claim(0, user_id=user_id)
+    while deletion.stage != until_stage and not service.run_batch(deletion, batch_size, 0):
+        pass
+    return deletion
+
+
+def delete_account(client, user):
+    response = client.request("DELETE", "/api/v1/users/me", json={"password": PASSWORD}, headers=user.headers)
+    assert response.status_code == 202
+
+
+def test_delete_post_cascades(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers)
+    client.post(f"{INTERACTIONS}/posts/{post_id}/comments", json={"content": "Nice"}, headers=bob.headers)
+    
+    assert client.delete(f"/api/v1/posts/{post_id}", headers=bob.headers).status_code == 403
+    assert client.delete(f"/api/v1/posts/{post_id}", headers=alice.headers).status_code == 200
+    
+    assert db.query(Post).count() == 0  # Bob's repost entry went with the original
+    for model in (Like, Repost, Comment):
+        assert db.query(model).count() == 0
+    assert (db.get(User, alice.id).posts_count, db.get(User, bob.id).posts_count) == (0, 0)
+
+
+def test_delete_account(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    own_posts = [create_post(client, alice) for _ in range(3)]
+    bob_post = create_post(client, bob)
+    client.put(f"{INTERACTIONS}/users/{bob.id}/follow", headers=alice.headers)
+    client.put(f"{INTERACTIONS}/users/{alice.id}/follow", headers=bob.headers)
+    client.put(f"{INTERACTIONS}/posts/{bob_post}/like", headers=alice.headers)
+    client.put(f"{INTERACTIONS}/posts/{own_posts[0]}/repost", headers=bob.headers)
+    
+    response = client.request("DELETE", "/api/v1/users/me", json={"password": "wrong"}, headers=alice.headers)
+    assert response.status_code == 400
+    response = client.request("DELETE", "/api/v1/users/me", json={"password": PASSWORD}, headers=alice.headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == AccountDeletionStatus.PENDING
+    
+    # Deactivated at once
+    assert client.get("/api/v1/users/me", headers=alice.headers).json()["detail"] == "Inactive user"
+    
+    deletion = purge(db, alice.id)
+    assert deletion.status == AccountDeletionStatus.COMPLETE
+    assert db.get(User, alice.id) is None
+    assert db.query(Follow).count() == 0
+    
+    bob_row = db.get(User, bob.id)
+    assert (bob_row.followers_count, bob_row.following_count, bob_row.posts_count) == (0, 0, 1)
+    assert db.get(Post, bob_post).likes_count == 0
+    assert db.query(AccountDeletion).count() == 1
+
+
+def test_deactivated_user_is_hidden(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers)
+    delete_account(client, alice)
+    
+    assert client.get(f"/api/v1/users/{alice.id}").status_code == 404
+    assert client.get(f"/api/v1/posts/user/{alice.id}").status_code == 404
+    assert client.get(f"/api/v1/posts/{post_id}", headers=bob.headers).status_code == 404
+    assert client.get(f"{INTERACTIONS}/users/{alice.id}/followers", headers=bob.headers).status_code == 404
+    
+    # Bob's repost entry stays, without the original
+    feed = client.get("/api/v1/posts/public").json()
+    assert feed["total"] == 1
+    assert feed["posts"][0]["original_post"] is None
+    
+    assert client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers).status_code == 404
+    assert client.put(f"{INTERACTIONS}/users/{alice.id}/follow", headers=bob.headers).status_code == 404
+    assert client.post(f"/api/v1/users/{alice.id}/follow", headers=bob.headers).status_code == 404
+    response = client.post(f"{INTERACTIONS}/batch", headers=bob.headers, json={"operations": [
+        {"action": "like", "post_id": post_id}
+    ]})
+    assert response.json()["results"][0]["found"] is False
+
+
+def test_deactivated_users_comments_are_hidden(client, db, make_user):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    post_id = create_post(client, alice)
+    comments = f"{INTERACTIONS}/posts/{post_id}/comments"
+    for user in (bob, carol):
+        assert client.post(comments, headers=user.headers, json={"content": "Hi"}).status_code == 201
+    
+    delete_account(client, carol)
+    listed = client.get(comments, headers=alice.headers).json()
+    assert [comment["author"]["username"] for comment in listed] == ["bob"]
+    
+    # Alice's post goes with her, for comments as for every other interaction
+    delete_account(client, alice)
+    assert client.get(comments, headers=bob.headers).status_code == 404
+    response = client.post(comments, headers=bob.headers, json={"content": "Hi"})
+    assert response.status_code == 404
+    assert db.query(Comment).filter(Comment.post_id == post_id).count() == 2
+
+
+def test_follow_racing_the_purge_keeps_counters(client, db, make_user):
+    alice, carol = make_user("alice"), make_user("carol")
+    delete_account(client, alice)
+    purge(db, alice.id, until_stage="likes")
+    
+    # Carol's follow passed the active check just before the deactivation
+    InteractionService(db).follow(db.get(User, carol.id), db.get(User, alice.id))
+    assert db.get(User, carol.id).following_count == 1
+    
+    purge(db, alice.id)
+    db.expire_all()
+    assert db.get(User, alice.id) is None
+    assert db.get(User, carol.id).following_count == 0
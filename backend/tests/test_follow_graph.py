@@ -0,0 +1,85 @@
+"""
+The in-memory follow graph under edge changes racing its database reads.
+"""
+from app.models.interaction import Follow
+from app.services.follow_graph import FollowGraphIndex
+
+
+class InterleavedGraph(FollowGraphIndex):
+    """Runs ``after_read`` once, between reading the database and applying the rows."""
+    
+    after_read = None
+    
+    def _read_follows(self, db, after_id, batch_size=50000):
+        rows = list(super()._read_follows(db, after_id, batch_size))
+        if self.after_read is not None:
+            after_read, self.after_read = self.after_read, None
+            after_read()
+        return rows
+
+
+def follow(db, follower_id, following_id, follow_id=None):
+    db.add(Follow(id=follow_id, follower_id=follower_id, following_id=following_id))
+    db.commit()
+
+
+def test_sync_keeps_unfollows_made_during_the_read(db, make_user):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    graph = InterleavedGraph()
+    graph.rebuild(db)
+    
+    follow(db, alice.id, bob.id)
+    follow(db, alice.id, carol.id)
+    # The unfollow reaches this worker after sync read the follow
+    graph.after_read = lambda: graph.remove_edge(alice.id, bob.id)
+    assert graph.sync(db) == 2
+    
+    assert not graph.is_following(alice.id, bob.id)
+    assert list(graph.following_ids(alice.id)) == [carol.id]
+    assert list(graph.follower_ids(bob.id)) == []
+    assert graph.edge_count == 1
+
+
+def test_rebuild_keeps_changes_made_during_the_read(db, make_user):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    follow(db, alice.id, bob.id)
+    graph = InterleavedGraph()
+    graph.rebuild(db)
+    
+    def change_edges():
+        graph.remove_edge(alice.id, bob.id)
+        graph.add_edge(carol.id, alice.id)
+    
+    graph.after_read = change_edges
+    graph.rebuild(db)
+    
+    assert not graph.is_following(alice.id, bob.id)
+    assert graph.is_followed_by(alice.id, carol.id)
+    assert graph.edge_count == 1
+
+
+def test_edges_are_idempotent():
+    graph = FollowGraphIndex()
+    for _ in range(2):
+        graph.add_edge(1, 2)
+    assert (list(graph.following_ids(1)), list(graph.follower_ids(2)), graph.edge_count) == ([2], [1], 1)
+    
+    for _ in range(2):
+        graph.remove_edge(1, 2)
+    assert graph.edge_count == 0
+
+
+def test_sync_picks_up_ids_committed_out_of_order(db, make_user):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    graph = FollowGraphIndex()
+    graph.rebuild(db)
+    
+    follow(db, alice.id, bob.id, follow_id=10)
+    assert graph.sync(db) == 1
+    # A transaction that took id 5 before id 10 commits only now
+    follow(db, carol.id, bob.id, follow_id=5)
+    assert graph.sync(db) == 1
+    
+    assert list(graph.follower_ids(bob.id)) == sorted([alice.id, carol.id])
+    assert graph.edge_count == 2
+    assert graph.sync(db) == 0
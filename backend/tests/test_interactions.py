@@ -0,0 +1,100 @@
+"""
+Likes, reposts and follows: idempotency, counters and the batch API.
+"""
+from app.models.post import Post
+from app.models.user import User
+
+INTERACTIONS = "/api/v1/interactions"
+
+
+def create_post(client, user, content="Hello"):
+    return client.post("/api/v1/posts/", json={"content": content}, headers=user.headers).json()["id"]
+
+
+def test_like_and_repost_are_idempotent(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    
+    for _ in range(2):
+        assert client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers).json()["liked"] is True
+        assert client.put(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers).json()["reposted"] is True
+    post = db.get(Post, post_id)
+    assert (post.likes_count, post.reposts_count) == (1, 1)
+    assert db.get(User, bob.id).posts_count == 1  # The repost entry
+    
+    for _ in range(2):
+        client.delete(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+        client.delete(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers)
+    db.expire_all()
+    post = db.get(Post, post_id)
+    assert (post.likes_count, post.reposts_count) == (0, 0)
+    assert db.get(User, bob.id).posts_count == 0
+
+
+def test_like_missing_post(client, make_user):
+    alice = make_user("alice")
+    assert client.put(f"{INTERACTIONS}/posts/999/like", headers=alice.headers).status_code == 404
+
+
+def test_batch_and_state(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    first, second = create_post(client, alice), create_post(client, alice)
+    
+    response = client.post(f"{INTERACTIONS}/batch", headers=bob.headers, json={"operations": [
+        {"action": "like", "post_id": first},
+        {"action": "like", "post_id": first},
+        {"action": "repost", "post_id": second},
+        {"action": "like", "post_id": 999},
+    ]})
+    assert response.status_code == 200
+    assert [(result["found"], result["changed"]) for result in response.json()["results"]] == [
+        (True, True), (True, False), (True, True), (False, False)
+    ]
+    assert db.get(Post, first).likes_count == 1
+    
+    state = client.get(f"{INTERACTIONS}/state", params={"post_ids": f"{first},{second}"}, headers=bob.headers)
+    assert state.json() == {"liked": [first], "reposted": [second]}
+
+
+def test_batch_rejects_unknown_actions(client, make_user):
+    alice = make_user("alice")
+    response = client.post(f"{INTERACTIONS}/batch", headers=alice.headers, json={"operations": [
+        {"action": "bookmark", "post_id": 1}
+    ]})
+    assert response.status_code == 422
+
+
+def test_follow_counters(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    
+    for _ in range(2):
+        assert client.put(f"{INTERACTIONS}/users/{bob.id}/follow", headers=alice.headers).status_code == 200
+    assert (db.get(User, alice.id).following_count, db.get(User, bob.id).followers_count) == (1, 1)
+    
+    client.delete(f"{INTERACTIONS}/users/{bob.id}/follow", headers=alice.headers)
+    db.expire_all()
+    assert (db.get(User, alice.id).following_count, db.get(User, bob.id).followers_count) == (0, 0)
+    
+    assert client.put(f"{INTERACTIONS}/users/{alice.id}/follow", headers=alice.headers).status_code == 400
+
+
+def test_follower_list_pages(client, make_user):
+    alice = make_user("alice")
+    followers = [make_user(f"fan{i}") for i in range(5)]
+    for follower in followers:
+        client.put(f"{INTERACTIONS}/users/{alice.id}/follow", headers=follower.headers)
+    
+    seen, cursor = [], None
+    while True:
+        params = {"size": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"{INTERACTIONS}/users/{alice.id}/followers", params=params, headers=alice.headers).json()
+        seen.extend(user["id"] for user in page["users"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    # Newest first, each follower once
+    assert seen == [follower.id for follower in reversed(followers)]
+    
+    response = client.get(f"{INTERACTIONS}/users/{alice.id}/followers", params={"cursor": "bogus"}, headers=alice.headers)
+    assert response.status_code == 400
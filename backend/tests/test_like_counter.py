@@ -0,0 +1,116 @@
+"""
+Write-behind like counts: flushing and reconciliation across workers.
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.interaction import Like
+from app.models.post import Post
+from app.services.like_counter import LikeCounter, MemoryLikeBuffer, flush_like_counters, like_counter
+from tests.test_interactions import INTERACTIONS, create_post
+
+
+class SharedLikeBuffer(MemoryLikeBuffer):
+    """One in-process buffer standing in for the Redis buffer all workers share.
+    
+    ``on_read`` runs once, at the first read of the deltas, to interleave
+    another worker's request with a reconciliation.
+    """
+    
+    shared = True
+    on_read = None
+    
+    def deltas(self):
+        deltas = super().deltas()
+        if self.on_read is not None:
+            on_read, self.on_read = self.on_read, None
+            on_read()
+        return deltas
+
+
+@pytest.fixture
+def shared_buffer(monkeypatch):
+    buffer = SharedLikeBuffer()
+    monkeypatch.setattr(like_counter, "mode", "redis")
+    monkeypatch.setattr(like_counter, "buffer", buffer)
+    return buffer
+
+
+def likes_count(db, post_id):
+    db.expire_all()
+    return db.get(Post, post_id).likes_count
+
+
+def test_reconcile_keeps_buffered_likes(client, db, make_user, shared_buffer):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    
+    # Worker B likes, worker A reconciles, B flushes
+    client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+    assert like_counter.reconcile(db) == 0
+    like_counter.flush(db)
+    
+    assert db.query(Like).count() == 1
+    assert likes_count(db, post_id) == 1
+
+
+def test_reconcile_skips_likes_made_while_reading(client, db, make_user, shared_buffer):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    
+    # B's like commits after A read the buffer, before A recounts
+    shared_buffer.on_read = lambda: client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+    like_counter.reconcile(db)
+    like_counter.flush(db)
+    
+    assert likes_count(db, post_id) == 1
+
+
+def test_reconcile_corrects_drift(client, db, make_user, shared_buffer):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    post_id = create_post(client, alice)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+    like_counter.flush(db)
+    
+    # A lost delta, with another one still buffered
+    db.query(Post).filter(Post.id == post_id).update({Post.likes_count: 5})
+    db.commit()
+    client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=carol.headers)
+    
+    assert like_counter.reconcile(db) == 1
+    like_counter.flush(db)
+    assert likes_count(db, post_id) == 2
+
+
+def test_per_worker_buffer_is_reconciled_only_with_one_worker(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    assert LikeCounter("memory", MemoryLikeBuffer()).can_reconcile
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    assert not LikeCounter("memory", MemoryLikeBuffer()).can_reconcile
+    assert LikeCounter("redis", SharedLikeBuffer()).can_reconcile
+    assert LikeCounter("direct").can_reconcile
+
+
+def test_lost_deltas_are_recounted_at_startup(client, db, make_user, monkeypatch):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/like", headers=bob.headers)
+    
+    # The worker that buffered the like died before flushing it
+    monkeypatch.setattr(like_counter, "mode", "memory")
+    monkeypatch.setattr(like_counter, "buffer", MemoryLikeBuffer())
+    db.query(Post).filter(Post.id == post_id).update({Post.likes_count: 0})
+    db.commit()
+    
+    async def run_briefly():
+        task = asyncio.create_task(flush_like_counters(SessionLocal, 0.01, reconcile_interval=600))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(run_briefly())
+    assert likes_count(db, post_id) == 1
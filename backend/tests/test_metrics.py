@@ -0,0 +1,19 @@
+"""
+Access to the Prometheus endpoint.
+"""
+from app.core.config import settings
+
+
+def test_metrics_need_a_token_outside_debug(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+    
+    monkeypatch.setattr(settings, "DEBUG", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
@@ -0,0 +1,45 @@
+"""
+Public user profiles.
+"""
+from tests.conftest import PASSWORD
+
+
+def test_profile_hides_email(client, make_user):
+    alice = make_user("alice")
+    
+    for headers in ({}, alice.headers):
+        profile = client.get(f"/api/v1/users/{alice.id}", headers=headers).json()
+        assert profile["username"] == "alice"
+        assert "email" not in profile
+    assert client.get("/api/v1/users/me", headers=alice.headers).json()["email"] == "alice@example.com"
+
+
+def test_profile_rejects_deactivated_viewer(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    assert client.get(f"/api/v1/users/{bob.id}", headers=alice.headers).status_code == 200
+    
+    client.request("DELETE", "/api/v1/users/me", json={"password": PASSWORD}, headers=alice.headers)
+    response = client.get(f"/api/v1/users/{bob.id}", headers=alice.headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_author_cards_hide_email(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = client.post("/api/v1/posts/", json={"content": "Hello"}, headers=alice.headers).json()["id"]
+    client.post(f"/api/v1/interactions/posts/{post_id}/comments", json={"content": "Hi"}, headers=bob.headers)
+    client.post(f"/api/v1/interactions/posts/{post_id}/repost", headers=bob.headers)
+    
+    for path, headers in (
+        ("/api/v1/posts/public", {}),
+        ("/api/v1/posts/", alice.headers),
+        (f"/api/v1/posts/user/{alice.id}", {}),
+        (f"/api/v1/posts/user/{bob.id}", {}),
+        (f"/api/v1/posts/{post_id}", alice.headers),
+        (f"/api/v1/interactions/posts/{post_id}/comments", alice.headers),
+        ("/api/v1/users/?q=b", {}),
+    ):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, path
+        assert "bob" in response.text or "alice" in response.text, path
+        assert "email" not in response.text and "@example.com" not in response.text, path
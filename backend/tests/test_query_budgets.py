@@ -0,0 +1,87 @@
+"""
+Query budgets of the feed, profile and follower-list endpoints.
+
+Each endpoint is checked on a small and a larger dataset, so a query per
+row (an N+1) fails even when it stays under the budget for a few rows.
+"""
+import pytest
+
+
+@pytest.fixture
+def network(client, make_user):
+    """Alice following authors who post, like, repost and comment."""
+    def build(authors: int):
+        alice = make_user("alice")
+        users = [make_user(f"author{i}") for i in range(authors)]
+        for user in users:
+            client.put(f"/api/v1/interactions/users/{user.id}/follow", headers=alice.headers)
+            client.put(f"/api/v1/interactions/users/{alice.id}/follow", headers=user.headers)
+            post = client.post("/api/v1/posts/", json={"content": f"Hello from {user.id}"}, headers=user.headers).json()
+            client.put(f"/api/v1/interactions/posts/{post['id']}/like", headers=alice.headers)
+            client.put(f"/api/v1/interactions/posts/{post['id']}/repost", headers=users[0].headers)
+            client.post(f"/api/v1/interactions/posts/{post['id']}/comments", json={"content": "Nice"}, headers=alice.headers)
+        return alice, users
+    
+    return build
+
+
+@pytest.mark.parametrize("authors", [2, 12])
+def test_public_feed(client, network, query_budget, authors):
+    alice, _ = network(authors)
+    
+    # Page, reposted originals and the maintained total
+    with query_budget(3):
+        response = client.get("/api/v1/posts/public", params={"size": 20})
+    assert response.status_code == 200
+    assert len(response.json()["posts"]) > authors
+    
+    with query_budget(3):
+        assert client.get("/api/v1/posts/public", params={"size": 20}, headers=alice.headers).status_code == 200
+
+
+@pytest.mark.parametrize("authors", [2, 12])
+def test_home_feed(client, network, query_budget, authors):
+    alice, _ = network(authors)
+    
+    with query_budget(7):
+        response = client.get("/api/v1/posts/", params={"size": 20}, headers=alice.headers)
+    assert response.status_code == 200
+    assert all(post["is_liked"] for post in response.json()["posts"] if not post["is_repost"])
+
+
+@pytest.mark.parametrize("authors", [2, 12])
+def test_user_posts(client, network, query_budget, authors):
+    alice, users = network(authors)
+    
+    # The author (with their posts_count), the page and the reposted originals
+    with query_budget(3):
+        response = client.get(f"/api/v1/posts/user/{users[0].id}", params={"size": 20}, headers=alice.headers)
+    assert response.status_code == 200
+    assert len(response.json()["posts"]) == authors + 1
+
+
+@pytest.mark.parametrize("authors", [2, 12])
+def test_profile(client, network, query_budget, authors):
+    alice, users = network(authors)
+    
+    with query_budget(1):
+        response = client.get(f"/api/v1/users/{alice.id}")
+    assert response.status_code == 200
+    assert response.json()["followers_count"] == authors
+    
+    # The viewer's active check, then the follow flags with the profile cached
+    with query_budget(2):
+        response = client.get(f"/api/v1/users/{alice.id}", headers=users[0].headers)
+    assert response.json()["is_followed_by"] is True
+
+
+@pytest.mark.parametrize("authors", [2, 12])
+def test_followers(client, network, query_budget, authors):
+    alice, users = network(authors)
+    
+    with query_budget(5):
+        response = client.get(
+            f"/api/v1/interactions/users/{alice.id}/followers", params={"size": 50}, headers=users[0].headers
+        )
+    assert response.status_code == 200
+    assert len(response.json()["users"]) == authors
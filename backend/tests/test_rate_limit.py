@@ -0,0 +1,55 @@
+"""
+Rate-limit identities and the verified access token cache.
+"""
+from datetime import timedelta
+
+from app.core import security
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.security import VerifiedTokenCache, create_access_token, create_refresh_token
+
+
+def identity(headers, forwarded_hops=1):
+    middleware = RateLimitMiddleware(
+        app=None, store=object(), routes={}, exempt_paths=[], trust_forwarded=True, forwarded_hops=forwarded_hops
+    )
+    return middleware._identity({"headers": headers, "client": ("10.0.0.1", 50000)})
+
+
+def test_forwarded_for_uses_the_entry_the_proxy_added():
+    assert identity([(b"x-forwarded-for", b"203.0.113.7")]) == "ip:203.0.113.7"
+    # The client controls everything left of what the proxy appended
+    assert identity([(b"x-forwarded-for", b"1.1.1.1, 203.0.113.7")]) == "ip:203.0.113.7"
+    assert identity([(b"x-forwarded-for", b"2.2.2.2, 203.0.113.7")]) == "ip:203.0.113.7"
+    assert identity([(b"x-forwarded-for", b"1.1.1.1"), (b"x-forwarded-for", b"203.0.113.7")]) == "ip:203.0.113.7"
+    assert identity([(b"x-forwarded-for", b"1.1.1.1, 203.0.113.7, 10.0.0.2")], forwarded_hops=2) == "ip:203.0.113.7"
+    assert identity([]) == "ip:10.0.0.1"
+
+
+def test_identity_is_the_verified_user():
+    token = create_access_token(subject=42)
+    assert identity([(b"authorization", b"Bearer " + token.encode())]) == "u:42"
+    assert identity([(b"authorization", b"Bearer forged"), (b"x-forwarded-for", b"203.0.113.7")]) == "ip:203.0.113.7"
+
+
+def test_verified_tokens_are_decoded_once(monkeypatch):
+    decodes = []
+    decode = security._decode_token
+    monkeypatch.setattr(security, "_decode_token", lambda *args: decodes.append(args) or decode(*args))
+    cache = VerifiedTokenCache(max_entries=1)
+    
+    token = create_access_token(subject=7)
+    assert cache.verify(token) == "7"
+    assert cache.verify(token) == "7"
+    assert len(decodes) == 1
+    
+    # Invalid, expired and refresh tokens are never cached
+    assert cache.verify("forged") is None
+    assert cache.verify(create_access_token(subject=7, expires_delta=timedelta(seconds=-1))) is None
+    assert cache.verify(create_refresh_token(subject=7)) is None
+    assert cache.verify(token) == "7"
+    assert len(decodes) == 4
+    
+    # Bounded: a second token evicts the first
+    assert cache.verify(create_access_token(subject=8)) == "8"
+    assert cache.verify(token) == "7"
+    assert len(decodes) == 6
@@ -0,0 +1,77 @@
+"""
+Follow recommendations across batch rebuilds.
+"""
+import pytest
+
+from app.models.interaction import Follow
+from app.services.recommendations import FollowRecommender
+
+pytest.importorskip("scipy")
+
+
+class InterleavedRecommender(FollowRecommender):
+    """Runs ``after_read`` once, after the follows were read for a rebuild."""
+    
+    after_read = None
+    
+    def _load_follows(self, db, user_ids):
+        follows = super()._load_follows(db, user_ids)
+        if self.after_read is not None:
+            after_read, self.after_read = self.after_read, None
+            after_read()
+        return follows
+
+
+def follow(db, follower_id, following_id):
+    db.add(Follow(follower_id=follower_id, following_id=following_id))
+    db.commit()
+
+
+def suggested_ids(recommender, user_id, following_ids):
+    return [candidate for candidate, _, _ in recommender.recommend(user_id, following_ids, 10)]
+
+
+def test_rebuild_keeps_users_marked_during_the_read(db, make_user):
+    alice, bob, carol, dave = (make_user(name) for name in ("alice", "bob", "carol", "dave"))
+    follow(db, alice.id, bob.id)
+    follow(db, bob.id, carol.id)
+    follow(db, bob.id, dave.id)
+    recommender = InterleavedRecommender()
+    recommender.mark_dirty(carol.id)
+    
+    # Alice swaps bob for carol after the rebuild read her follows
+    def swap_follow():
+        db.query(Follow).filter(Follow.follower_id == alice.id).delete()
+        follow(db, alice.id, carol.id)
+        recommender.mark_dirty(alice.id)
+    
+    recommender.after_read = swap_follow
+    recommender.rebuild(db)
+    
+    batch = recommender.batch
+    assert list(batch.user_ids) == [alice.id, bob.id, carol.id, dave.id]
+    assert batch.top_ids.shape == (4, recommender.top_k)
+    # Carol's mark predates the rebuild, alice's does not
+    assert suggested_ids(recommender, carol.id, []) == []
+    assert suggested_ids(recommender, alice.id, [carol.id]) == []
+    assert alice.id in batch.overrides
+    
+    recommender.rebuild(db)
+    assert recommender.batch is not batch
+    assert suggested_ids(recommender, alice.id, [carol.id]) == []
+    assert suggested_ids(recommender, bob.id, [carol.id, dave.id]) == []
+
+
+def test_mark_after_recompute_is_not_lost(db, make_user):
+    alice, bob, carol = (make_user(name) for name in ("alice", "bob", "carol"))
+    follow(db, alice.id, bob.id)
+    follow(db, bob.id, carol.id)
+    recommender = FollowRecommender()
+    recommender.rebuild(db)
+    assert suggested_ids(recommender, alice.id, [bob.id]) == [carol.id]
+    
+    recommender.mark_dirty(alice.id)
+    assert suggested_ids(recommender, alice.id, [bob.id]) == [carol.id]
+    recommender.mark_dirty(alice.id)
+    # Recomputed from the follows passed in, not the cached row
+    assert suggested_ids(recommender, alice.id, []) == []
@@ -0,0 +1,51 @@
+"""
+EXPLAIN capture for slow queries.
+"""
+from types import SimpleNamespace
+
+from app.db.slow_query import SlowQueryLog
+
+
+class RecordingCursor:
+    """DBAPI cursor stand-in that records statements and fails the EXPLAIN."""
+    
+    def __init__(self, executed, fail):
+        self.executed = executed
+        self.fail = fail
+    
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+        if statement.startswith("EXPLAIN") and self.fail:
+            raise RuntimeError("canceling statement due to statement timeout")
+    
+    def fetchall(self):
+        return [("Seq Scan on posts",)]
+    
+    def close(self):
+        pass
+
+
+def explain(fail):
+    executed = []
+    dbapi_connection = SimpleNamespace(cursor=lambda: RecordingCursor(executed, fail))
+    plan = SlowQueryLog(threshold_ms=0)._explain(
+        SimpleNamespace(connection=dbapi_connection), "SELECT * FROM posts", ()
+    )
+    return plan, executed
+
+
+def test_explain_runs_inside_a_savepoint():
+    plan, executed = explain(fail=False)
+    assert plan == "Seq Scan on posts"
+    assert executed == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM posts",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+        "RELEASE SAVEPOINT slow_query_explain",
+    ]
+
+
+def test_failed_explain_rolls_back_to_the_savepoint():
+    plan, executed = explain(fail=True)
+    assert plan is None
+    assert executed[-2:] == ["ROLLBACK TO SAVEPOINT slow_query_explain", "RELEASE SAVEPOINT slow_query_explain"]
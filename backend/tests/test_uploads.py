@@ -0,0 +1,91 @@
+"""
+Resumable upload sessions and their per-user limits.
+"""
+import os
+
+from app.core.config import settings
+from app.services.upload_service import PARTIAL_DIR
+
+SESSIONS = "/api/v1/uploads/sessions"
+
+
+def start_upload(client, user, total_size=1024):
+    return client.post(SESSIONS, headers=user.headers, json={
+        "filename": "clip.mp4", "content_type": "video/mp4", "total_size": total_size
+    })
+
+
+def test_chunks_fill_the_preallocated_file(client, make_user):
+    alice = make_user("alice")
+    session = start_upload(client, alice, total_size=6).json()
+    assert os.path.getsize(os.path.join(PARTIAL_DIR, session["id"])) == 6
+    
+    response = client.put(f"{SESSIONS}/{session['id']}", params={"offset": 0}, content=b"abc", headers=alice.headers)
+    assert response.json()["received_bytes"] == 3
+    response = client.put(f"{SESSIONS}/{session['id']}", params={"offset": 5}, content=b"def", headers=alice.headers)
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "3"
+
+
+def test_open_sessions_are_capped(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    sessions = [start_upload(client, alice).json() for _ in range(settings.UPLOAD_MAX_OPEN_SESSIONS)]
+    assert start_upload(client, alice).status_code == 429
+    assert start_upload(client, bob).status_code == 201
+    
+    # Aborting one frees its slot and its file
+    assert client.delete(f"{SESSIONS}/{sessions[0]['id']}", headers=alice.headers).status_code == 200
+    assert not os.path.exists(os.path.join(PARTIAL_DIR, sessions[0]["id"]))
+    assert start_upload(client, alice).status_code == 201
+
+
+def test_reserved_bytes_are_capped(client, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_RESERVED_BYTES", 4096)
+    alice = make_user("alice")
+    
+    assert start_upload(client, alice, total_size=3000).status_code == 201
+    assert start_upload(client, alice, total_size=2000).status_code == 429
+    assert start_upload(client, alice, total_size=1000).status_code == 201
+
+
+def upload_media(client, user, content=b"0123456789"):
+    session = start_upload(client, user, total_size=len(content)).json()
+    client.put(f"{SESSIONS}/{session['id']}", params={"offset": 0}, content=content, headers=user.headers)
+    response = client.post(f"{SESSIONS}/{session['id']}/finalize", headers=user.headers)
+    assert response.status_code == 200
+    return response.json()["media_url"]
+
+
+def test_finalized_upload_is_served(client, make_user):
+    media_url = upload_media(client, make_user("alice"))
+    
+    response = client.get(media_url)
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    
+    response = client.get(media_url, headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 2-5/10"
+    assert response.content == b"2345"
+
+
+
+def test_media_range_and_conditional_requests(client, make_user):
+    media_url = upload_media(client, make_user("alice"))
+    
+    # A last byte before the first makes the header invalid, so it is ignored
+    response = client.get(media_url, headers={"Range": "bytes=5-2"})
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    response = client.get(media_url, headers={"Range": "bytes=0-1, 4-5"})
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    response = client.get(media_url, headers={"Range": "bytes=10-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */10"
+    
+    etag = client.get(media_url).headers["ETag"]
+    for if_none_match in (etag, f"W/{etag}", f'"other", W/{etag}'):
+        response = client.get(media_url, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+    assert client.get(media_url, headers={"If-None-Match": '"other"'}).status_code == 200
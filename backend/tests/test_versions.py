@@ -0,0 +1,90 @@
+"""
+ETags of posts and feed pages change with everything their bodies show.
+"""
+from app.models.post import Post
+from app.services.counter_service import CounterService
+from tests.test_deletion import delete_account, purge
+from tests.test_interactions import INTERACTIONS, create_post
+
+
+def etag(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_repost_etag_follows_the_original(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    client.put(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers)
+    feed = f"/api/v1/posts/user/{bob.id}"
+    
+    before = etag(client, feed)
+    assert client.get(feed, headers={"If-None-Match": before}).status_code == 304
+    
+    # The original's author renames themselves: the embedded original changes
+    client.put("/api/v1/users/me", json={"full_name": "Alice Renamed"}, headers=alice.headers)
+    after = etag(client, feed)
+    assert after != before
+    assert client.get(feed).json()["posts"][0]["original_post"]["author"]["full_name"] == "Alice Renamed"
+
+
+def test_etag_follows_comments_and_reposts(client, db, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post_id = create_post(client, alice)
+    feed = "/api/v1/posts/public"
+    
+    versions = [etag(client, feed)]
+    client.post(f"{INTERACTIONS}/posts/{post_id}/comments", json={"content": "Nice"}, headers=bob.headers)
+    versions.append(etag(client, feed))
+    client.put(f"{INTERACTIONS}/posts/{post_id}/repost", headers=bob.headers)
+    versions.append(etag(client, feed))
+    assert len(set(versions)) == 3
+    
+    post = db.get(Post, post_id)
+    assert (post.comments_count, post.reposts_count) == (1, 1)
+    assert client.get(feed).json()["total"] == 2
+
+
+def listed(client, url):
+    """Return the page total after checking it against the listed rows."""
+    body = client.get(url, params={"size": 100}).json()
+    assert body["total"] == len(body["posts"])
+    return body["total"]
+
+
+def test_public_total_is_maintained(client, db, make_user):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    feed = "/api/v1/posts/public"
+    alice_post = create_post(client, alice)
+    bob_post = create_post(client, bob)
+    create_post(client, bob)
+    client.put(f"{INTERACTIONS}/posts/{bob_post}/repost", headers=alice.headers)
+    client.put(f"{INTERACTIONS}/posts/{bob_post}/repost", headers=carol.headers)
+    client.put(f"{INTERACTIONS}/posts/{alice_post}/repost", headers=carol.headers)
+    assert listed(client, feed) == 6
+    
+    # Bob's posts leave the feed with him; reposts of them go when purged
+    delete_account(client, bob)
+    assert listed(client, feed) == 4
+    purge(db, bob.id)
+    assert listed(client, feed) == 2
+    client.delete(f"/api/v1/posts/{alice_post}", headers=alice.headers)
+    total = listed(client, feed)
+    
+    CounterService(db).recompute()
+    assert listed(client, feed) == total
+
+
+def test_feed_author_cards_carry_no_counters(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    create_post(client, alice)
+    feed = "/api/v1/posts/public"
+    before = etag(client, feed)
+    
+    # Following alice changes her counters, which the feed does not show
+    client.put(f"{INTERACTIONS}/users/{alice.id}/follow", headers=bob.headers)
+    assert client.get(feed, headers={"If-None-Match": before}).status_code == 304
+    author = client.get(feed).json()["posts"][0]["author"]
+    assert author["username"] == "alice"
+    assert not {"followers_count", "following_count", "posts_count"} & set(author)
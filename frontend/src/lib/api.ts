@@ -12,7 +12,7 @@ export interface ApiResponse<T> {
 
 export interface User {
   id: number;
-  email: string;
+  email?: string;  // Only on the current user (/users/me), not on public profiles
   username: string;
   full_name: string;
   bio?: string;
@@ -28,6 +28,9 @@ export interface User {
   posts_count?: number;
 }
 
+// Author of a post or comment: no email and no counters (see the profile for those)
+export type AuthorCard = Omit<User, 'email' | 'followers_count' | 'following_count' | 'posts_count'>;
+
 export interface Notification {
   id: number;
   user_id: number;
@@ -71,7 +74,7 @@ export interface Post {
   likes_count: number;
   comments_count: number;
   reposts_count: number;
-  author: User;
+  author: AuthorCard;
   is_liked?: boolean;
   is_reposted?: boolean;
   original_post?: Post;
@@ -91,7 +94,7 @@ export interface Comment {
   post_id: number;
   created_at: string;
   updated_at: string;
-  author: User;
+  author: AuthorCard;
   likes_count: number;
   is_liked?: boolean;
 }
@@ -356,6 +359,19 @@ class ApiClient {
     return this.request(`/api/v1/interactions/posts/${postId}/comments`);
   }
 
+  async getInteractionState(postIds: number[]): Promise<ApiResponse<{ liked: number[]; reposted: number[] }>> {
+    return this.request(`/api/v1/interactions/state?post_ids=${postIds.join(',')}`);
+  }
+
+  async batchInteractions(
+    operations: { action: 'like' | 'unlike' | 'repost' | 'unrepost'; post_id: number }[]
+  ): Promise<ApiResponse<{ results: { action: string; post_id: number; found: boolean; changed: boolean }[] }>> {
+    return this.request('/api/v1/interactions/batch', {
+      method: 'POST',
+      body: JSON.stringify({ operations }),
+    });
+  }
+
   // Token management
   setAccessToken(token: string): void {
     this.accessToken = token;
@@ -401,6 +417,19 @@ class ApiClient {
     });
   }
 
+  async deleteAccount(password: string): Promise<ApiResponse<{ status: string; stage: string; deleted_rows: number; requested_at: string }>> {
+    // The account is deactivated at once and its data purged in the background
+    const response = await this.request<{ status: string; stage: string; deleted_rows: number; requested_at: string }>('/api/v1/users/me', {
+      method: 'DELETE',
+      body: JSON.stringify({ password }),
+    });
+
+    if (response.data) {
+      this.clearTokens();
+    }
+    return response;
+  }
+
   async followUser(userId: number): Promise<ApiResponse<{ message: string }>> {
     return this.request<{ message: string }>(`/api/v1/users/${userId}/follow`, {
       method: 'POST',